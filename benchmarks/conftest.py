@@ -0,0 +1,189 @@
+# benchmarks/conftest.py
+"""
+Timing and peak-memory harness for the benchmark suite.
+
+Run with `python -m pytest benchmarks` (they are not part of `tests/`).
+Each benchmark calls the `bench` fixture, which records the best wall time
+over a few rounds plus the tracemalloc peak of one extra round, and fails
+if either exceeds the stored baseline by more than --bench-tolerance.
+
+  --bench-sizes 1k,100k,1m   ledger sizes to run (default 1k,100k)
+  --bench-save               write this run's numbers as the new baseline
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC)
+
+# Use the offscreen platform to avoid xcb plugin errors in headless CI
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from ledger_gen import SIZES, generate, write_csv  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results.json")
+
+# Slack added to every timing limit so sub-millisecond benchmarks (a single
+# append) do not fail on scheduler noise
+NOISE_FLOOR_SECONDS = 0.002
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "splitter_app benchmarks")
+    group.addoption("--bench-sizes", default="1k,100k",
+                    help=f"comma-separated ledger sizes from {', '.join(SIZES)}")
+    group.addoption("--bench-baseline", default=BASELINE_PATH,
+                    help="baseline JSON to compare against")
+    group.addoption("--bench-tolerance", type=float, default=0.5,
+                    help="allowed slowdown/growth over the baseline (0.5 = +50%%)")
+    group.addoption("--bench-save", action="store_true",
+                    help="store this run as the baseline instead of comparing")
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        names = [s.strip() for s in metafunc.config.getoption("bench_sizes").split(",") if s.strip()]
+        unknown = [n for n in names if n not in SIZES]
+        if unknown:
+            raise pytest.UsageError(f"Unknown --bench-sizes: {', '.join(unknown)}")
+        metafunc.parametrize("rows", [SIZES[n] for n in names], ids=names)
+
+
+def pytest_configure(config):
+    config._bench_results = {}
+    path = config.getoption("bench_baseline")
+    try:
+        with open(path, encoding="utf-8") as f:
+            config._bench_baseline = json.load(f)
+    except (OSError, ValueError):
+        config._bench_baseline = {}
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    results = config._bench_results
+    if not results:
+        return
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    if config.getoption("bench_save"):
+        baseline = dict(config._bench_baseline, **results)
+        with open(config.getoption("bench_baseline"), "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config._bench_results
+    if not results:
+        return
+    baseline = config._bench_baseline
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'benchmark':<48} {'best ms':>10} {'peak MiB':>9} {'vs base':>8}")
+    for name, rec in sorted(results.items()):
+        base = baseline.get(name)
+        ratio = f"{rec['seconds'] / base['seconds']:.2f}x" if base and base["seconds"] else "-"
+        terminalreporter.write_line(
+            f"{name:<48} {rec['seconds'] * 1000:10.2f} "
+            f"{rec['peak_bytes'] / 2**20:9.2f} {ratio:>8}"
+        )
+
+
+class Bench:
+    """Measures one benchmark and checks it against the baseline."""
+
+    def __init__(self, name: str, config) -> None:
+        self.name = name
+        self.config = config
+
+    def __call__(
+        self,
+        fn: Callable[[], object],
+        rounds: int = 5,
+        setup: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, float]:
+        """
+        Time *fn* over *rounds* (calling *setup* untimed before each), then
+        run it once more under tracemalloc for the peak allocation.
+        """
+        times = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        times.sort()
+        record = {
+            "seconds": times[0],
+            "median_seconds": times[len(times) // 2],
+            "peak_bytes": peak,
+        }
+        self.config._bench_results[self.name] = record
+        self._check(record)
+        return record
+
+    def _check(self, record: Dict[str, float]) -> None:
+        if self.config.getoption("bench_save"):
+            return
+        base = self.config._bench_baseline.get(self.name)
+        if not base:
+            return
+        limit = 1.0 + self.config.getoption("bench_tolerance")
+        slack = {"seconds": NOISE_FLOOR_SECONDS, "peak_bytes": 0}
+        for key in ("seconds", "peak_bytes"):
+            if base.get(key) and record[key] > base[key] * limit + slack[key]:
+                pytest.fail(
+                    f"{self.name}: {key} {record[key]:.6g} exceeds baseline "
+                    f"{base[key]:.6g} by more than {limit - 1:.0%}",
+                    pytrace=False,
+                )
+
+
+@pytest.fixture
+def bench(request):
+    return Bench(request.node.name, request.config)
+
+
+@pytest.fixture(scope="session")
+def ledgers():
+    """Generated transactions per row count, shared across benchmarks."""
+    cache = {}
+
+    def get(rows: int):
+        if rows not in cache:
+            cache[rows] = generate(rows)
+        return cache[rows]
+    return get
+
+
+@pytest.fixture(scope="session")
+def ledger_csv(tmp_path_factory, ledgers):
+    """Path of a generated CSV for (rows, layout); written once per session."""
+    cache = {}
+
+    def get(rows: int, layout: str = "current") -> str:
+        key = (rows, layout)
+        if key not in cache:
+            path = tmp_path_factory.mktemp("ledgers") / f"{layout}-{rows}.csv"
+            write_csv(str(path), ledgers(rows), layout)
+            cache[key] = str(path)
+        return cache[key]
+    return get
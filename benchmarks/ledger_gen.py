@@ -0,0 +1,95 @@
+# benchmarks/ledger_gen.py
+"""
+Deterministic synthetic ledgers for the benchmark suite.
+The same (rows, seed) always yields the same transactions, written in
+either CSV layout CSVRepository understands:
+
+  current: serial, description, paid_by, date, group, category, split, amount
+  legacy:  serial, description, paid_by, group, date, amount, category, split label
+
+Usage: python benchmarks/ledger_gen.py ROWS OUT.csv [--legacy] [--seed N]
+"""
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from splitter_app.config import CATEGORY_MAP, PARTICIPANTS
+from splitter_app.models import Transaction
+
+LAYOUTS = ("current", "legacy")
+
+# Row counts the suite knows by name
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Payer fractions and the legacy labels they were written as
+SPLIT_LABELS = {
+    0.0: "Ower pays (0/1)",
+    0.3: "Custom (3/10)",
+    0.5: "Even (1/2 each)",
+    1.0: "Payer pays (1/1)",
+}
+
+GROUPS = 40
+START_DATE = datetime.date(2020, 1, 1)
+
+
+def generate(rows: int, seed: int = 0) -> List[Transaction]:
+    """*rows* transactions with unique per-category serials, in date order."""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_MAP)
+    splits = list(SPLIT_LABELS)
+    counters = {letter: 0 for letter in CATEGORY_MAP.values()}
+    txns = []
+    for i in range(rows):
+        category = rng.choice(categories)
+        letter = CATEGORY_MAP[category]
+        counters[letter] += 1
+        txns.append(Transaction(
+            serial_number=f"{letter}{counters[letter]:03d}",
+            description=f"{category} #{i}",
+            paid_by=rng.choice(PARTICIPANTS),
+            date=(START_DATE + datetime.timedelta(days=i * 2000 // max(rows, 1))).isoformat(),
+            group=f"group{rng.randrange(GROUPS)}",
+            category=category,
+            split=rng.choice(splits),
+            amount=rng.randrange(1, 500_000) / 100,
+        ))
+    return txns
+
+
+def to_row(txn: Transaction, layout: str = "current") -> List[str]:
+    """Format *txn* as a CSV row in *layout*."""
+    if layout == "current":
+        return txn.to_csv_row()
+    if layout == "legacy":
+        return [
+            txn.serial_number, txn.description, txn.paid_by, txn.group,
+            txn.date, f"{txn.amount:.2f}", txn.category, SPLIT_LABELS[txn.split],
+        ]
+    raise ValueError(f"Unknown layout: {layout!r}")
+
+
+def write_csv(path: str, txns: List[Transaction], layout: str = "current") -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(to_row(t, layout) for t in txns)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic ledger CSV.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_csv(args.out, generate(args.rows, args.seed),
+              "legacy" if args.legacy else "current")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/test_bench_controller.py
+"""Share allocation, group summary and view refresh on generated ledgers."""
+import pytest
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+import splitter_app.controllers as controllers
+from splitter_app.config import CATEGORY_MAP, PARTICIPANTS
+from splitter_app.controllers import SplitterController
+from splitter_app.models import TransactionTable
+from splitter_app.ui.main_window import MainWindow
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def controller(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(controllers, "LOCAL_CSV_PATH", str(tmp_path / "txns.csv"))
+    return SplitterController(MainWindow(PARTICIPANTS, list(CATEGORY_MAP)))
+
+
+def test_allocate_shares(bench, ledgers, rows):
+    txns = ledgers(rows)
+    allocate = SplitterController._allocate_shares
+    bench(lambda: [allocate(t.amount, t.split, t.paid_by, PARTICIPANTS) for t in txns],
+          rounds=3)
+
+
+def test_calculate_group_summary(bench, controller, ledgers, rows):
+    table = TransactionTable.from_transactions(ledgers(rows))
+    summary = {}
+    bench(lambda: summary.update(controller._calculate_group_summary(table)), rounds=3)
+    assert summary
+
+
+def test_refresh_view(bench, controller, ledgers, rows):
+    # Fresh table each round: model reset, balances rebuilt, group table filled
+    txns = ledgers(rows)
+    tables = []
+    bench(lambda: controller._refresh_view(tables[-1]),
+          setup=lambda: tables.append(TransactionTable.from_transactions(txns)),
+          rounds=3)
+    assert controller.model.rowCount() == rows
+    assert controller.window.group_summary_table.rowCount() > 1
+
+
+def test_stream_into_view(bench, controller, ledgers, rows):
+    # The startup load: partial batches extend the model behind the table view
+    txns = ledgers(rows)
+    batches = [txns[i:i + controllers.LOAD_CHUNK_ROWS]
+               for i in range(0, rows, controllers.LOAD_CHUNK_ROWS)]
+
+    def stream():
+        controller.model.set_table(TransactionTable())
+        for batch in batches:
+            controller.model.extend(batch)
+    bench(stream, rounds=3)
+    assert controller.model.rowCount() == rows
+
+
+def test_sort_view(bench, controller, ledgers, rows):
+    # A header click on Amount, then on Description, over the loaded ledger
+    controller.model.set_table(TransactionTable.from_transactions(ledgers(rows)))
+    table = controller.window.table
+
+    def sort():
+        table.sortByColumn(5, Qt.SortOrder.AscendingOrder)
+        table.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+    bench(sort, rounds=3,
+          setup=lambda: table.sortByColumn(-1, Qt.SortOrder.AscendingOrder))
+    assert controller.model.rowCount() == rows
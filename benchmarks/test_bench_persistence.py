@@ -0,0 +1,51 @@
+# benchmarks/test_bench_persistence.py
+"""CSVRepository load/save/delete on generated ledgers."""
+import itertools
+import shutil
+
+import pytest
+
+from splitter_app.models import Transaction
+from splitter_app.persistence import CSVRepository
+
+from ledger_gen import LAYOUTS
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_load_all(bench, ledger_csv, rows, layout):
+    # Cold parse of the whole file, as at app launch without a snapshot
+    path = ledger_csv(rows, layout)
+    loaded = []
+    bench(lambda: loaded.append(len(CSVRepository(path, snapshot_cache=False).load_all())),
+          rounds=3)
+    assert loaded[0] == rows
+
+
+def test_load_all_snapshot(bench, ledger_csv, rows, tmp_path, monkeypatch):
+    # Warm launch served from the <csv>.snapshot cache
+    monkeypatch.setattr("splitter_app.persistence.SNAPSHOT_MIN_BYTES", 0)
+    path = str(tmp_path / "txns.csv")
+    shutil.copyfile(ledger_csv(rows), path)
+    CSVRepository(path).load_all()
+    bench(lambda: CSVRepository(path).load_all(), rounds=3)
+
+
+def test_save(bench, ledger_csv, rows, tmp_path):
+    # Append one entry to a loaded ledger
+    path = str(tmp_path / "txns.csv")
+    shutil.copyfile(ledger_csv(rows), path)
+    repo = CSVRepository(path, snapshot_cache=False)
+    repo.load_all()
+    numbers = itertools.count(1)
+    bench(lambda: repo.save(Transaction(
+        f"Z{next(numbers):06d}", "bench", "Adrian", "2025-01-01", "general", "Other", 0.5, 12.34)))
+
+
+def test_delete(bench, ledger_csv, ledgers, rows, tmp_path):
+    # Tombstone one entry in a loaded ledger (too few to trigger compaction)
+    path = str(tmp_path / "txns.csv")
+    shutil.copyfile(ledger_csv(rows), path)
+    repo = CSVRepository(path, snapshot_cache=False)
+    repo.load_all()
+    serials = iter([t.serial_number for t in ledgers(rows)])
+    bench(lambda: repo.delete(next(serials)))
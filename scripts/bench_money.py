@@ -0,0 +1,49 @@
+# scripts/bench_money.py
+"""
+Compare the float-dollar and integer-cents share allocation paths on a
+synthetic ledger. Usage: python scripts/bench_money.py [rows]
+"""
+import sys
+import os
+import timeit
+
+# Add the src directory (and the benchmark suite's ledger generator) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from ledger_gen import generate
+from splitter_app.config import PARTICIPANTS
+from splitter_app.ledger import LedgerState, allocate_cents, allocate_shares, share_matrix
+from splitter_app.models import TransactionTable
+
+
+def _best(fn, repeat=5) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main(rows: int) -> None:
+    txns = generate(rows)
+    table = TransactionTable.from_transactions(txns)
+
+    results = {
+        "scalar float": _best(lambda: [
+            allocate_shares(t.amount, t.split, t.paid_by, PARTICIPANTS) for t in txns]),
+        "scalar cents": _best(lambda: [
+            allocate_cents(t.amount_cents, t.split, t.paid_by, PARTICIPANTS) for t in txns]),
+        "batch float": _best(lambda: share_matrix(table, PARTICIPANTS)),
+        "batch cents": _best(lambda: share_matrix(table, PARTICIPANTS, cents=True)),
+        "rebuild (cents)": _best(lambda: LedgerState.from_transactions(table, PARTICIPANTS)),
+    }
+    print(f"{rows} rows")
+    for name, secs in results.items():
+        print(f"  {name:<16} {secs * 1000:9.2f} ms")
+
+    # Drift: summing rounded float shares vs exact integer cents
+    shares, _ = share_matrix(table, PARTICIPANTS)
+    cents, _ = share_matrix(table, PARTICIPANTS, cents=True)
+    drift = abs(float(shares.sum()) - int(cents.sum()) / 100)
+    print(f"  float vs cents total drift: {drift:.10f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,53 @@
+# scripts/bench_snapshot.py
+"""
+Compare a cold CSV load (full parse) with a warm one served from the
+"<csv>.snapshot" cache, and with a cache hit whose CSV has grown since.
+Usage: python scripts/bench_snapshot.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add the src directory (and the benchmark suite's ledger generator) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from ledger_gen import generate
+from splitter_app.persistence import CSVRepository, _encode_row
+
+
+def _load(path: str, cache: bool = True) -> float:
+    """Time a first load_all() in a fresh repository, as at app launch."""
+    repo = CSVRepository(path, snapshot_cache=cache)
+    t0 = time.perf_counter()
+    repo.load_all()
+    return time.perf_counter() - t0
+
+
+def main(rows: int) -> None:
+    # The last 1% stands in for rows another device appends later
+    txns = generate(rows + max(rows // 100, 1))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "transactions.csv")
+        with open(path, 'wb') as f:
+            f.write(b''.join(_encode_row(t) for t in txns[:rows]))
+
+        results = {
+            "no cache": min(_load(path, cache=False) for _ in range(3)),
+            "cold (writes)": _load(path),
+            "warm": min(_load(path) for _ in range(3)),
+        }
+        # Another device appended 1%: the cache covers the prefix
+        with open(path, 'ab') as f:
+            f.write(b''.join(_encode_row(t) for t in txns[rows:]))
+        results["warm + 1% tail"] = _load(path)
+
+        print(f"{rows} rows, {os.path.getsize(path) / 1e6:.1f} MB CSV, "
+              f"{os.path.getsize(path + '.snapshot') / 1e6:.1f} MB snapshot")
+        for name, secs in results.items():
+            print(f"  {name:<16} {secs * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
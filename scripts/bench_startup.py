@@ -0,0 +1,67 @@
+# scripts/bench_startup.py
+"""
+Measure the import cost of splitter_app.main with `python -X importtime`
+and fail if it exceeds a budget, or if the Google client stack is imported
+before a sync runs.
+Usage: python scripts/bench_startup.py [--budget MS] [--runs N] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Cumulative import time of splitter_app.main, best of --runs, in ms
+DEFAULT_BUDGET_MS = 500.0
+
+# Only needed once a sync starts; see services.drive._google_api
+LAZY_MODULES = ("googleapiclient", "google_auth_oauthlib", "google.auth.transport.requests")
+
+
+def importtime(module: str) -> Dict[str, float]:
+    """Import *module* in a fresh interpreter; cumulative ms per imported module."""
+    env = dict(os.environ, PYTHONPATH=SRC, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000.0
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail above this many ms (default %(default)s)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [importtime("splitter_app.main") for _ in range(args.runs)]
+    best = min(runs, key=lambda t: t["splitter_app.main"])
+    total = best["splitter_app.main"]
+
+    print(f"splitter_app.main: {total:.1f} ms (best of {args.runs}, budget {args.budget:.0f} ms)")
+    for name, ms in sorted(best.items(), key=lambda kv: kv[1], reverse=True)[1:args.top + 1]:
+        print(f"  {name:<40} {ms:9.1f} ms")
+
+    eager = [name for name in best if name.startswith(LAZY_MODULES)]
+    if eager:
+        print("FAIL: imported before a sync runs: " + ", ".join(sorted(eager)))
+        return 1
+    if total > args.budget:
+        print(f"FAIL: import time over budget by {total - args.budget:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# src/splitter_app/cli.py
+"""
+Headless command line for the Contribution Splitter ledger.
+
+Runs the same repository, allocation and Drive sync code as the app without
+importing PySide6, for batch jobs on machines with no Qt install:
+
+  python -m splitter_app.cli import other.csv
+  python -m splitter_app.cli export out.csv --group trip
+  python -m splitter_app.cli balance
+  python -m splitter_app.cli groups --json
+  python -m splitter_app.cli delete --before 2023-01-01 --dry-run
+  python -m splitter_app.cli sync
+
+--csv points every command at a different ledger (default LOCAL_CSV_PATH).
+Imports and deletes are journaled like edits in the app, so the next sync
+uploads them instead of undoing them.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Callable, List, Optional
+
+from splitter_app import config
+from splitter_app.ledger import LedgerState
+from splitter_app.models import Transaction, TransactionTable, format_balance, format_cents
+from splitter_app.persistence import CSVRepository
+from splitter_app.services.drive import SyncJournal
+
+EXPORT_FORMATS = ("csv", "json")
+
+
+def _repo() -> CSVRepository:
+    return CSVRepository(config.LOCAL_CSV_PATH)
+
+
+def _filter(args) -> Optional[Callable[[Transaction], bool]]:
+    """Predicate built from the --group/--paid-by/... options; None if none given."""
+    checks = []
+    if args.serial:
+        serials = set(args.serial)
+        checks.append(lambda t: t.serial_number in serials)
+    if args.group:
+        checks.append(lambda t: t.group == args.group)
+    if args.paid_by:
+        checks.append(lambda t: t.paid_by == args.paid_by)
+    if args.category:
+        checks.append(lambda t: t.category == args.category)
+    if args.after:
+        checks.append(lambda t: t.date >= args.after)
+    if args.before:
+        checks.append(lambda t: t.date < args.before)
+    if not checks:
+        return None
+    return lambda t: all(check(t) for check in checks)
+
+
+def _selected(args) -> List[Transaction]:
+    rows = _repo().load_all()
+    match = _filter(args)
+    return rows if match is None else [t for t in rows if match(t)]
+
+
+def cmd_import(args) -> int:
+    repo = _repo()
+    journal = SyncJournal()
+    if args.sheet:
+        # Pulls in the Google client stack, so only on request
+        from splitter_app.services.sheets import load_transactions
+        incoming = load_transactions()
+    else:
+        # Either CSV layout; tombstones in the source are honoured
+        incoming = CSVRepository(args.source, snapshot_cache=False).load_all()
+    # Taken serials get the next free number, chosen under the write lock
+    renumbered = repo.save_renumbered(
+        incoming, lambda t: config.CATEGORY_MAP.get(t.category, "Z")
+    )
+    for t in incoming:
+        journal.record_add(t.serial_number)
+    print(f"Imported {len(incoming)} transactions ({renumbered} renumbered)")
+    return 0
+
+
+def cmd_export(args) -> int:
+    rows = _selected(args)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.format == "json":
+            json.dump([
+                {"serial_number": t.serial_number, "description": t.description,
+                 "paid_by": t.paid_by, "date": t.date, "group": t.group,
+                 "category": t.category, "split": t.split, "amount": t.amount}
+                for t in rows
+            ], out, indent=2)
+            out.write("\n")
+        else:
+            csv.writer(out).writerows(t.to_csv_row() for t in rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.output != "-":
+        print(f"Exported {len(rows)} transactions to {args.output}")
+    return 0
+
+
+def _ledger(args) -> LedgerState:
+    return LedgerState.from_transactions(
+        TransactionTable.from_transactions(_selected(args)), config.PARTICIPANTS
+    )
+
+
+def cmd_balance(args) -> int:
+    ledger = _ledger(args)
+    net = ledger.net_balance_cents()
+    if args.json:
+        print(json.dumps({
+            "total": format_cents(ledger.total_cents),
+            "net": {p: format_cents(net[p]) for p in config.PARTICIPANTS},
+        }, indent=2))
+        return 0
+    print(f"Total: ${format_cents(ledger.total_cents)}")
+    for p in config.PARTICIPANTS:
+        print(f"{p}: {format_balance(net[p])}")
+    return 0
+
+
+def cmd_groups(args) -> int:
+    """Per-group net balance (paid – owed), as in the app's group table."""
+    ledger = _ledger(args)
+    participants = config.PARTICIPANTS
+    summary = {
+        group: {
+            p: ledger.group_paid_cents[group].get(p, 0) - owed.get(p, 0)
+            for p in participants
+        }
+        for group, owed in ledger.group_owed_cents.items()
+    }
+    totals = {p: sum(bal[p] for bal in summary.values()) for p in participants}
+    if args.json:
+        print(json.dumps({
+            "groups": {g: {p: format_cents(c) for p, c in bal.items()} for g, bal in summary.items()},
+            "total": {p: format_cents(c) for p, c in totals.items()},
+        }, indent=2))
+        return 0
+    width = max([len("Group"), len("Total")] + [len(g) for g in summary])
+    print(f"{'Group':<{width}}  " + "  ".join(f"{p:>12}" for p in participants))
+    for group, bal in list(summary.items()) + [("Total", totals)]:
+        print(f"{group:<{width}}  " + "  ".join(f"{format_balance(bal[p]):>12}" for p in participants))
+    return 0
+
+
+def cmd_delete(args) -> int:
+    match = _filter(args)
+    if match is None:
+        print("Refusing to delete everything; give at least one filter", file=sys.stderr)
+        return 2
+    repo = _repo()
+    doomed = [t for t in repo.load_all() if match(t)]
+    if args.dry_run or not doomed:
+        for t in doomed:
+            print(",".join(t.to_csv_row()))
+        print(f"{len(doomed)} transactions {'would be ' if args.dry_run else ''}deleted")
+        return 0
+    # Matched again under the write lock, so rows saved since the load above
+    # survive; deleted numbers stay reserved
+    doomed = repo.delete_where(match)
+    journal = SyncJournal()
+    for t in doomed:
+        journal.record_delete(t.serial_number)
+    print(f"{len(doomed)} transactions deleted")
+    return 0
+
+
+def cmd_sync(args) -> int:
+    # Imported here: the OAuth and Drive clients are only needed to sync
+    from splitter_app.services.auth import ensure_credentials
+    from splitter_app.services.drive import sync_csv
+
+    ensure_credentials()
+    result = sync_csv(SyncJournal())
+    print(f"Downloaded: {'yes' if result.downloaded else 'no'} | "
+          f"uploaded: {'yes' if result.uploaded else 'no'} | "
+          f"pulled {result.pulled} | dropped {result.dropped} | "
+          f"conflicts {len(result.conflicts)}")
+    return 0
+
+
+def _add_filters(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("filters")
+    group.add_argument("--serial", action="append", help="serial number (repeatable)")
+    group.add_argument("--group")
+    group.add_argument("--paid-by")
+    group.add_argument("--category")
+    group.add_argument("--after", metavar="DATE", help="on or after YYYY-MM-DD")
+    group.add_argument("--before", metavar="DATE", help="before YYYY-MM-DD")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m splitter_app.cli",
+        description="Headless ledger operations for the Contribution Splitter.",
+    )
+    parser.add_argument("--csv", help=f"ledger to use (default {config.LOCAL_CSV_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="append transactions from a CSV file or the sheet")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("source", nargs="?", help="CSV file in either layout")
+    source.add_argument("--sheet", action="store_true", help="read the configured Google Sheet")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="write (filtered) transactions")
+    p.add_argument("output", help="output file, or - for stdout")
+    p.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    _add_filters(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("balance", help="total and net balance per participant")
+    p.add_argument("--json", action="store_true")
+    _add_filters(p)
+    p.set_defaults(func=cmd_balance)
+
+    p = sub.add_parser("groups", help="net balance per group and participant")
+    p.add_argument("--json", action="store_true")
+    _add_filters(p)
+    p.set_defaults(func=cmd_groups)
+
+    p = sub.add_parser("delete", help="delete every transaction matching the filters")
+    p.add_argument("--dry-run", action="store_true", help="only list what would go")
+    _add_filters(p)
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser("sync", help="merge the ledger with Google Drive")
+    p.set_defaults(func=cmd_sync)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.csv:
+        # drive/sync read config dynamically, so this redirects them too;
+        # absolute, as the sidecar and sync files are derived from it
+        config.LOCAL_CSV_PATH = os.path.abspath(args.csv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ Central configuration for the Contribution Splitter app:
 - Google Drive integration constants
 - Local file paths
 - Default participants and categories
+- Optional timing trace output
 - Category-to-letter mapping for serial numbers
 - Support for loading OAuth credentials from an external path via env var or default config location
 """
@@ -45,6 +46,12 @@ ENV_SHEETS_RANGE_VAR = "GOOGLE_SHEETS_RANGE"
 SHEETS_SPREADSHEET_ID: str = os.getenv(ENV_SHEETS_ID_VAR, "")
 SHEETS_RANGE: str = os.getenv(ENV_SHEETS_RANGE_VAR, "Sheet1!A:H")
 
+# --- Tracing ---
+# Set to a file path to record timing spans (see splitter_app.tracing); the
+# Chrome trace and latency histograms are written there on exit
+ENV_TRACE_VAR = "SPLITTER_TRACE"
+TRACE_PATH: str = os.getenv(ENV_TRACE_VAR, "")
+
 # Path to OAuth2 credentials JSON
 # Priority:
 # 1) Path from ENV_CREDENTIALS_VAR
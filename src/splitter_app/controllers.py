@@ -1,11 +1,16 @@
 # src/splitter_app/controllers.py
 
-from collections import defaultdict
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Union
 from PySide6.QtWidgets import QTableWidgetItem
 
-from splitter_app.models import Transaction
+from splitter_app.ledger import LedgerState, allocate_shares
+from splitter_app.models import (
+    Transaction, TransactionTable, format_balance, format_cents,
+)
 from splitter_app.persistence import CSVRepository
+from splitter_app.tracing import traced
+from splitter_app.ui.transaction_model import TransactionTableModel
+from splitter_app.workers import InlineRunner
 from splitter_app.config import (
     LOCAL_CSV_PATH,
     PARTICIPANTS,
@@ -13,223 +18,306 @@ from splitter_app.config import (
 )
 
 
+# Rows streamed into the table per partial result while the ledger loads
+LOAD_CHUNK_ROWS = 5000
+
+# Merging a synced copy edits the view row by row up to this many removed
+# rows; beyond it the model is simply reset to the fresh table
+MERGE_RESET_ROWS = 100
+
+
 class SplitterController:
     """
     Controller for the Contribution Splitter app.
     Connects the UI (MainWindow) signals to business logic,
     manages transactions via CSVRepository, and updates the UI.
+
+    Repository I/O and full-ledger aggregation run through `runner`.
+    main() passes a BackgroundRunner so they stay off the GUI thread; the
+    default InlineRunner runs them synchronously. Drive syncs run through
+    `sync_runner` instead (a ThreadRunner in main()), so a slow network or
+    OAuth prompt never delays a save. Only the task functions
+    (`_*_task`, `_read_snapshot`) touch the repository and `_repo_stamp`;
+    the `on_done` callbacks touch the model, ledger and widgets.
     """
 
-    def __init__(self, window):
+    def __init__(self, window, runner=None, journal=None, sync_runner=None):
         self.window = window
         self.repo = CSVRepository(LOCAL_CSV_PATH)
+        self.runner = runner if runner is not None else InlineRunner()
+        self.sync_runner = sync_runner if sync_runner is not None else InlineRunner()
+        # Optional services.drive.SyncJournal noting adds/deletes for sync
+        self.journal = journal
+        # In-memory copy of the ledger plus its running balance totals.
+        # Rebuilt only on first load or when the CSV changed behind our back.
+        self.txns = TransactionTable()
+        self.ledger = LedgerState(PARTICIPANTS)
+        self._repo_stamp = None
+        # The view reads rows straight from self.txns through this model
+        self.model = TransactionTableModel(self.txns)
+        window.set_transaction_model(self.model)
         # Connect UI signals to controller methods
         window.transaction_added.connect(self.add_transaction)
         window.transaction_deleted.connect(self.delete_transaction)
 
-    def initialize(self):
+    def initialize(self, on_loaded: Optional[Callable[[], None]] = None):
         """Load initial data from CSV and update the UI."""
-        txns = self.repo.load_all()
-        self._refresh_view(txns)
+        def done(ledger):
+            self._on_loaded(ledger)
+            if on_loaded is not None:
+                on_loaded()
+
+        self.txns = TransactionTable()
+        self.model.set_table(self.txns)
+        self.runner.submit(
+            self._load_task,
+            on_done=done,
+            on_partial=self.model.extend,
+            on_error=self._on_task_failed,
+        )
+
+    def sync(
+        self,
+        fetch: Callable[[], object],
+        on_done: Optional[Callable[[object], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        """
+        Run *fetch* (e.g. refresh credentials and sync the CSV with Drive)
+        on `sync_runner`, then re-read the ledger on the writer and merge
+        whatever changed on disk into the view without resetting it.
+        *fetch* should hand its local-file steps to `self.runner.call` so
+        they stay ordered with saves. *on_done* receives fetch's return value.
+        """
+        on_error = on_error or self._on_task_failed
+
+        def fetched(outcome):
+            def done(snapshot):
+                self._merge_snapshot(snapshot)
+                if on_done is not None:
+                    on_done(outcome)
+            self.runner.submit(lambda report: self._snapshot_if_changed(),
+                               on_done=done, on_error=on_error)
+
+        self.sync_runner.submit(lambda report: fetch(), on_done=fetched, on_error=on_error)
 
     def add_transaction(self, data: dict):
         """Create Transaction, save it, and refresh UI."""
-        serial = self._generate_serial(data["category"])
-        txn = Transaction(
-            serial_number=serial,
-            description=data["description"],
-            paid_by=data["paid_by"],
-            date=data["date"],
-            group=data["group"],
-            category=data["category"],
-            split=data["split"],
-            amount=float(data["amount"]),
-        )
-        self.repo.save(txn)
-        self._refresh_view(self.repo.load_all())
+        def task(report):
+            txn = Transaction(
+                serial_number="",
+                description=data["description"],
+                paid_by=data["paid_by"],
+                date=data["date"],
+                group=data["group"],
+                category=data["category"],
+                split=data["split"],
+                amount=float(data["amount"]),
+            )
+            # The serial is picked under the repository's write lock, so
+            # another writer (a second app, the CLI) cannot take it too
+            txn = self.repo.save_new(txn, self._serial_letter(data["category"]))
+            snapshot = self._snapshot_after_write()
+            if self.journal is not None:
+                self.journal.record_add(txn.serial_number)
+            return snapshot, txn
+
+        def done(result):
+            snapshot, txn = result
+            if snapshot is not None:
+                # Read after the save, so it already holds txn
+                self._apply_snapshot(snapshot)
+            else:
+                self.model.append(txn)
+                self.ledger.apply(txn)
+            self._refresh_view(self.txns, self.ledger)
+
+        self.runner.submit(task, on_done=done, on_error=self._on_task_failed)
 
     def delete_transaction(self, serial_number: str):
         """Delete by serial_number and refresh UI."""
-        self.repo.delete(serial_number)
-        self._refresh_view(self.repo.load_all())
-
-    @staticmethod
-    def _allocate_shares(
-        amount: float,
-        split: float,
-        payer: str,
-        participants: List[str],
-    ) -> Dict[str, float]:
+        def task(report):
+            self.repo.delete(serial_number)
+            snapshot = self._snapshot_after_write()
+            if self.journal is not None:
+                self.journal.record_delete(serial_number)
+            return snapshot
+
+        def done(snapshot):
+            if snapshot is not None:
+                self._apply_snapshot(snapshot)
+            else:
+                for t in self.model.remove_serial(serial_number):
+                    self.ledger.revert(t)
+            self._refresh_view(self.txns, self.ledger)
+
+        self.runner.submit(task, on_done=done, on_error=self._on_task_failed)
+
+    # --- Worker side ---------------------------------------------------------
+    def _load_task(self, report) -> LedgerState:
+        """Read the CSV, stream rows to the view, and total them up."""
+        rows = self.repo.load_all()
+        self._repo_stamp = self.repo.stamp()
+        for start in range(0, len(rows), LOAD_CHUNK_ROWS):
+            report(rows[start:start + LOAD_CHUNK_ROWS])
+        ledger = LedgerState(PARTICIPANTS)
+        ledger.rebuild(rows)
+        return ledger
+
+    def _read_snapshot(self):
+        """Re-read the repository into a fresh (table, ledger) pair."""
+        table = TransactionTable.from_transactions(self.repo.load_all())
+        ledger = LedgerState(PARTICIPANTS)
+        ledger.rebuild(table)
+        self._repo_stamp = self.repo.stamp()
+        return table, ledger
+
+    def _snapshot_if_changed(self):
+        """A fresh snapshot if another process modified the CSV, else None."""
+        if self.repo.stamp() != self._repo_stamp:
+            return self._read_snapshot()
+        return None
+
+    def _snapshot_after_write(self):
         """
-        Allocate `amount` among participants based on `split`:
-        - payer gets `round(amount * split, 2)`
-        - the remaining is split equally (and rounded) among the others,
-          with the last ower absorbing any tiny rounding diff
-        Guarantees that sum(shares.values()) == round(amount, 2).
+        Like _snapshot_if_changed(), after our own save or delete: that
+        write alone does not count, but one by another process before or
+        during it does.
         """
-        # Include the payer in the share map even if they are not listed in
-        # participants to avoid misallocation.
-        shares = {p: 0.0 for p in participants}
-        if payer not in shares:
-            shares[payer] = 0.0
-
-        n = len(shares)
-
-        # No owers: payer covers full amount
-        if n == 1:
-            shares[payer] = round(amount, 2)
-            return shares
-
-        # 1) Payer’s portion
-        raw_payer = amount * split
-        payer_amt = round(raw_payer, 2)
-        shares[payer] = payer_amt
-
-        # 2) Remainder to the others
-        if n > 1:
-            raw_remainder = amount - raw_payer
-            count = n - 1
-            base = round(raw_remainder / count, 2)
-
-            others = [p for p in participants if p != payer]
-            # assign base to each except last
-            for o in others[:-1]:
-                shares[o] = base
-            # last absorbs any rounding dust
-            last = round(raw_remainder - base * (count - 1), 2)
-            shares[others[-1]] = last
-
-        return shares
-
-    def _refresh_view(self, txns: List[Transaction]):
+        stamp = self.repo.stamp()
+        if not self.repo.only_own_write(self._repo_stamp, stamp):
+            return self._read_snapshot()
+        self._repo_stamp = stamp
+        return None
+
+    # --- GUI side ------------------------------------------------------------
+    def _on_loaded(self, ledger: LedgerState):
+        self.ledger = ledger
+        self._refresh_view(self.txns, self.ledger)
+
+    def _apply_snapshot(self, snapshot):
+        if snapshot is None:
+            return
+        self.txns, self.ledger = snapshot
+        self.model.set_table(self.txns)
+
+    def _merge_snapshot(self, snapshot):
+        """Apply only the rows that differ between the view and *snapshot*."""
+        if snapshot is None:
+            return
+        table, ledger = snapshot
+        old_keys = self.txns.row_keys()
+        new_keys = table.row_keys()
+        if old_keys != new_keys:
+            new_set = set(new_keys)
+            gone = {k[0] for k in old_keys if k not in new_set}
+            if len(gone) > MERGE_RESET_ROWS:
+                self.txns = table
+                self.model.set_table(table)
+            else:
+                old_set = set(old_keys)
+                for serial in gone:
+                    self.model.remove_serial(serial)
+                # Removing is per serial, so re-add surviving duplicates too
+                self.model.extend([
+                    table.row(i).to_transaction()
+                    for i, k in enumerate(new_keys)
+                    if k not in old_set or k[0] in gone
+                ])
+        self.ledger = ledger
+        self._refresh_view(self.txns, self.ledger)
+
+    def _on_task_failed(self, exc: Exception):
+        self.window.show_error("Ledger Error", str(exc))
+
+    # Kept on the controller for callers that predate splitter_app.ledger.
+    _allocate_shares = staticmethod(allocate_shares)
+
+    @traced("view.refresh")
+    def _refresh_view(
+        self,
+        txns: Union[TransactionTable, List[Transaction]],
+        ledger: Optional[LedgerState] = None,
+    ):
         """Populate the transactions table, summary label, and group summary."""
-        # 1) Transactions table
-        table = self.window.table
-        # -------- Prevent the builtin sorter from kicking in mid-populate
-        table.setSortingEnabled(False)
-        table.clearContents()
-        # -----------------
-        table.setRowCount(len(txns))
-        for row, t in enumerate(txns):
-            table.setItem(row, 0, QTableWidgetItem(t.serial_number))
-            table.setItem(row, 1, QTableWidgetItem(t.description))
-            table.setItem(row, 2, QTableWidgetItem(t.paid_by))
-            table.setItem(row, 3, QTableWidgetItem(t.group))
-            table.setItem(row, 4, QTableWidgetItem(t.date))
-            table.setItem(row, 5, QTableWidgetItem(f"{t.amount:.2f}"))
-            table.setItem(row, 6, QTableWidgetItem(t.category))
-            table.setItem(row, 7, QTableWidgetItem(f"{t.split:.1f}"))
-
-        # Re-enable sorting after populating
-        table.setSortingEnabled(True)
+        if not isinstance(txns, TransactionTable):
+            txns = TransactionTable.from_transactions(txns)
+        if ledger is None:
+            ledger = LedgerState.from_transactions(txns, PARTICIPANTS)
+
+        # 1) Transactions table: the model formats cells lazily, so only a
+        #    different ledger object needs a model reset
+        if txns is not self.model.table:
+            self.model.set_table(txns)
 
         # 2) Overall summary label (net balances, not just shares)
-        total = round(sum(t.amount for t in txns), 2)
+        total = format_cents(ledger.total_cents)
         participants = PARTICIPANTS
 
         # If no participants, just show total
         if not participants:
-            self.window.summary_label.setText(f"Total: ${total:.2f}")
+            self.window.summary_label.setText(f"Total: ${total}")
         else:
-            # Compute net balance = what each paid minus what each owes
-            net_balances = {p: 0.0 for p in participants}
-            for t in txns:
-                # 1) Credit the payer for the full amount
-                net_balances[t.paid_by] += t.amount
-                # 2) Debit everyone their fair share
-                shares = self._allocate_shares(
-                    amount=t.amount,
-                    split=t.split,
-                    payer=t.paid_by,
-                    participants=participants,
-                )
-                for p, share_amt in shares.items():
-                    net_balances[p] -= share_amt
+            # Net balance = what each paid minus what each owes
+            net_balances = ledger.net_balance_cents()
 
             # Build the display string
-            parts = [f"Total: ${total:.2f}"]
+            parts = [f"Total: ${total}"]
             for p in participants:
-                bal = net_balances[p]
-                if bal < 0:
-                    parts.append(f"{p}: -${abs(bal):.2f}")
-                else:
-                    parts.append(f"{p}: ${bal:.2f}")
+                parts.append(f"{p}: {format_balance(net_balances[p])}")
 
             self.window.summary_label.setText("\n".join(parts))
 
         # 3) Group summary (shares vs paid → net balance)
-        from collections import defaultdict  # should already be at top of file
-
-        share_summary = self._calculate_group_summary(txns)
-        # Build per-group “paid” totals
-        paid_summary = defaultdict(lambda: {p: 0.0 for p in PARTICIPANTS})
-        for t in txns:
-            paid_summary[t.group][t.paid_by] += t.amount
+        self._populate_group_summary(ledger.group_owed_cents, ledger.group_paid_cents)
 
-        # Populate with both owed (share_summary) and paid → net
-        self._populate_group_summary(share_summary, paid_summary)
 
+    @staticmethod
+    def _serial_letter(category: str) -> str:
+        """Serial-number letter for *category* ("Z" if unmapped)."""
+        return CATEGORY_MAP.get(category, "Z")
 
     def _generate_serial(self, category: str) -> str:
-        """Generate a new serial_number based on category map and existing txns."""
-        letter = CATEGORY_MAP.get(category, "Z")
-        existing = [t for t in self.repo.load_all() if t.category == category]
-        next_num = len(existing) + 1
-        return f"{letter}{next_num:03d}"
+        """Preview the next serial_number from the category letter's counter."""
+        return self.repo.next_serial(self._serial_letter(category))
 
     def _calculate_group_summary(
-        self, txns: List[Transaction]
+        self, txns: Union[TransactionTable, List[Transaction]]
     ) -> Dict[str, Dict[str, float]]:
         """
         Build a dict of group → (participant → total_share)
         reusing the same allocation logic to keep it consistent.
         """
-        participants = PARTICIPANTS
-        summary: Dict[str, Dict[str, float]] = defaultdict(
-            lambda: {p: 0.0 for p in participants}
-        )
-
-        for t in txns:
-            shares = self._allocate_shares(
-                amount=t.amount,
-                split=t.split,
-                payer=t.paid_by,
-                participants=participants,
-            )
-            for p, amt in shares.items():
-                summary[t.group][p] += amt
-
-        return summary
+        return LedgerState.from_transactions(txns, PARTICIPANTS).group_owed
 
+    @traced("view.group_summary")
     def _populate_group_summary(
         self,
-        share_summary: Dict[str, Dict[str, float]],
-        paid_summary: Dict[str, Dict[str, float]],
+        share_summary: Dict[str, Dict[str, int]],
+        paid_summary: Dict[str, Dict[str, int]],
     ):
         """
         Update the group summary table in the UI:
         for each (group, participant) show net balance = paid – owed,
         formatted as “-$xx.xx” if negative, “$xx.xx” if ≥0.
+        Both summaries are in integer cents.
         """
         table = self.window.group_summary_table
         rows = len(share_summary)
         table.setRowCount(rows + 1)
 
-        totals = {p: 0.0 for p in PARTICIPANTS}
+        totals = {p: 0 for p in PARTICIPANTS}
 
         for row, (group, owed_map) in enumerate(share_summary.items()):
             table.setItem(row, 0, QTableWidgetItem(group))
             for col, p in enumerate(PARTICIPANTS, start=1):
-                owed = owed_map.get(p, 0.0)
-                paid = paid_summary[group].get(p, 0.0)
+                owed = owed_map.get(p, 0)
+                paid = paid_summary[group].get(p, 0)
                 bal = paid - owed
                 totals[p] += bal
-                text = f"-${abs(bal):.2f}" if bal < 0 else f"${bal:.2f}"
-                table.setItem(row, col, QTableWidgetItem(text))
+                table.setItem(row, col, QTableWidgetItem(format_balance(bal)))
 
         total_row = rows
         table.setItem(total_row, 0, QTableWidgetItem("Total"))
         for col, p in enumerate(PARTICIPANTS, start=1):
-            bal = totals[p]
-            text = f"-${abs(bal):.2f}" if bal < 0 else f"${bal:.2f}"
-            table.setItem(total_row, col, QTableWidgetItem(text))
+            table.setItem(total_row, col, QTableWidgetItem(format_balance(totals[p])))
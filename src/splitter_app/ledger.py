@@ -0,0 +1,374 @@
+# src/splitter_app/ledger.py
+"""
+Balance bookkeeping for the Contribution Splitter app:
+- Share allocation for a single transaction or a whole TransactionTable,
+  in float dollars or exact integer cents
+- Running per-participant and per-group paid/owed totals that can apply or
+  revert one transaction at a time instead of recomputing the whole ledger
+"""
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from splitter_app.models import Transaction, TransactionTable
+from splitter_app.tracing import traced
+
+
+def allocate_shares(
+    amount: float,
+    split: float,
+    payer: str,
+    participants: List[str],
+) -> Dict[str, float]:
+    """
+    Allocate `amount` among participants based on `split`:
+    - payer gets `round(amount * split, 2)`
+    - the remaining is split equally (and rounded) among the others,
+      with the last ower absorbing any tiny rounding diff
+    Guarantees that sum(shares.values()) == round(amount, 2).
+    """
+    # Include the payer in the share map even if they are not listed in
+    # participants to avoid misallocation.
+    shares = {p: 0.0 for p in participants}
+    if payer not in shares:
+        shares[payer] = 0.0
+
+    n = len(shares)
+
+    # No owers: payer covers full amount
+    if n == 1:
+        shares[payer] = round(amount, 2)
+        return shares
+
+    # 1) Payer’s portion
+    raw_payer = amount * split
+    payer_amt = round(raw_payer, 2)
+    shares[payer] = payer_amt
+
+    # 2) Remainder to the others
+    if n > 1:
+        raw_remainder = amount - raw_payer
+        count = n - 1
+        base = round(raw_remainder / count, 2)
+
+        others = [p for p in participants if p != payer]
+        # assign base to each except last
+        for o in others[:-1]:
+            shares[o] = base
+        # last absorbs any rounding dust, including the payer's, so the
+        # shares always add back up to the rounded amount
+        last = round(round(amount, 2) - payer_amt - base * (count - 1), 2)
+        shares[others[-1]] = last
+
+    return shares
+
+
+def allocate_cents(
+    amount_cents: int,
+    split: float,
+    payer: str,
+    participants: List[str],
+) -> Dict[str, int]:
+    """
+    Integer-cents counterpart of `allocate_shares`:
+    - payer gets `round(amount_cents * split)` cents
+    - the remaining cents are split equally (rounded) among the others,
+      with the last ower taking whatever is left over
+    The shares always sum to exactly `amount_cents`.
+    """
+    shares = {p: 0 for p in participants}
+    if payer not in shares:
+        shares[payer] = 0
+
+    count = len(shares) - 1
+    if count == 0:
+        shares[payer] = amount_cents
+        return shares
+
+    payer_amt = round(amount_cents * split)
+    shares[payer] = payer_amt
+    remainder = amount_cents - payer_amt
+    base = round(remainder / count)
+    others = [p for p in participants if p != payer]
+    for o in others[:-1]:
+        shares[o] = base
+    shares[others[-1]] = remainder - base * (count - 1)
+    return shares
+
+
+def share_columns(table: TransactionTable, participants: List[str]) -> List[str]:
+    """Participants followed by any payer in *table* outside that list."""
+    return participants + [p for p in table.paid_by_pool.values if p not in participants]
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's round(x, 2).
+    np.round scales by 100 first, which can land on the wrong side of a
+    half-cent; those rare near-ties are re-rounded one by one.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def allocate_shares_batch(
+    amount: np.ndarray,
+    split: np.ndarray,
+    payer_cols: np.ndarray,
+    n_participants: int,
+    n_columns: int,
+) -> np.ndarray:
+    """
+    Vectorised `allocate_shares` for N transactions at once.
+
+    Columns 0..n_participants-1 are the participants in order; higher
+    columns are payers outside that list. *payer_cols* gives each row's
+    payer column. Returns an N×n_columns share matrix with the same rules
+    as the scalar routine, so every row sums to round(amount, 2) and the
+    last ower absorbs the rounding dust.
+    """
+    amount = np.asarray(amount, dtype=np.float64)
+    split = np.asarray(split, dtype=np.float64)
+    payer_cols = np.asarray(payer_cols, dtype=np.intp)
+    n = len(amount)
+    rows = np.arange(n)
+    shares = np.zeros((n, n_columns))
+
+    payer_listed = payer_cols < n_participants
+    # Owers: every participant except the payer
+    count = n_participants - payer_listed.astype(np.intp)
+    has_owers = count > 0
+
+    total = _round2(amount)
+    raw_payer = amount * split
+    payer_amt = _round2(raw_payer)
+    safe_count = np.where(has_owers, count, 1)
+    base = _round2((amount - raw_payer) / safe_count)
+    last = _round2(total - payer_amt - base * (safe_count - 1))
+
+    # Everyone but the payer gets the base share ...
+    shares[:, :n_participants] = base[:, None]
+    # ... the last ower (the last participant, unless that is the payer)
+    # gets the remainder, and the payer their own portion.
+    last_col = np.where(
+        payer_cols == n_participants - 1, n_participants - 2, n_participants - 1
+    )
+    shares[rows[has_owers], last_col[has_owers]] = last[has_owers]
+    shares[rows, payer_cols] = np.where(has_owers, payer_amt, total)
+    return shares
+
+
+def allocate_cents_batch(
+    amount_cents: np.ndarray,
+    split: np.ndarray,
+    payer_cols: np.ndarray,
+    n_participants: int,
+    n_columns: int,
+) -> np.ndarray:
+    """
+    Vectorised `allocate_cents`; see `allocate_shares_batch` for the column
+    layout. Returns an int64 N×n_columns matrix whose rows sum exactly to
+    *amount_cents*.
+    """
+    amount_cents = np.asarray(amount_cents, dtype=np.int64)
+    split = np.asarray(split, dtype=np.float64)
+    payer_cols = np.asarray(payer_cols, dtype=np.intp)
+    n = len(amount_cents)
+    rows = np.arange(n)
+    shares = np.zeros((n, n_columns), dtype=np.int64)
+
+    count = n_participants - (payer_cols < n_participants).astype(np.int64)
+    has_owers = count > 0
+    safe_count = np.where(has_owers, count, 1)
+
+    # np.rint rounds half to even, exactly like Python's round() on floats
+    payer_amt = np.rint(amount_cents * split).astype(np.int64)
+    remainder = amount_cents - payer_amt
+    base = np.rint(remainder / safe_count).astype(np.int64)
+    last = remainder - base * (safe_count - 1)
+
+    shares[:, :n_participants] = base[:, None]
+    last_col = np.where(
+        payer_cols == n_participants - 1, n_participants - 2, n_participants - 1
+    )
+    shares[rows[has_owers], last_col[has_owers]] = last[has_owers]
+    shares[rows, payer_cols] = np.where(has_owers, payer_amt, amount_cents)
+    return shares
+
+
+@traced("ledger.share_matrix")
+def share_matrix(
+    table: TransactionTable, participants: List[str], cents: bool = False
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Allocate every row of *table* like `allocate_shares`, or like
+    `allocate_cents` when *cents* is true.
+    Returns an N×P matrix of shares and its column labels (see share_columns).
+    """
+    columns = share_columns(table, participants)
+    col_of = {p: c for c, p in enumerate(columns)}
+    payer_cols = np.array(
+        [col_of[p] for p in table.paid_by_pool.values], dtype=np.intp
+    )[table.paid_by_codes]
+    if cents:
+        shares = allocate_cents_batch(
+            table.amount_cents, table.split, payer_cols, len(participants), len(columns)
+        )
+    else:
+        shares = allocate_shares_batch(
+            table.amount, table.split, payer_cols, len(participants), len(columns)
+        )
+    return shares, columns
+
+
+class LedgerState:
+    """
+    Running totals for a ledger of transactions.
+
+    Keeps what each participant paid and owes, overall and per group, so a
+    single add or delete only costs one share allocation. Call `rebuild`
+    after a full (re)load of the transactions.
+
+    Totals are kept as integer cents so repeated apply/revert never drift;
+    the dollar attributes (`total`, `paid`, `group_owed`, ...) are derived.
+    """
+
+    def __init__(self, participants: List[str]) -> None:
+        """
+        :param participants: Participants whose balances are tracked.
+        """
+        self.participants = list(participants)
+        self.reset()
+
+    @classmethod
+    def from_transactions(
+        cls,
+        txns: Union[TransactionTable, Iterable[Transaction]],
+        participants: List[str],
+    ) -> "LedgerState":
+        """Build a state holding the totals of *txns*."""
+        state = cls(participants)
+        state.rebuild(txns)
+        return state
+
+    def reset(self) -> None:
+        """Drop all totals."""
+        self.total_cents = 0
+        self.paid_cents: Dict[str, int] = self._blank()
+        self.owed_cents: Dict[str, int] = self._blank()
+        self.group_paid_cents: Dict[str, Dict[str, int]] = {}
+        self.group_owed_cents: Dict[str, Dict[str, int]] = {}
+        # Number of live transactions per group, so emptied groups disappear
+        # from the summary just like they would after a full recompute.
+        self._group_counts: Dict[str, int] = {}
+
+    @traced("ledger.rebuild")
+    def rebuild(self, txns: Union[TransactionTable, Iterable[Transaction]]) -> None:
+        """Recompute every total from scratch with whole-ledger array reductions."""
+        self.reset()
+        table = (
+            txns if isinstance(txns, TransactionTable)
+            else TransactionTable.from_transactions(txns)
+        )
+        if not len(table):
+            return
+
+        owed, cols = share_matrix(table, self.participants, cents=True)
+        col_of = {p: c for c, p in enumerate(cols)}
+        payer_cols = np.array(
+            [col_of[p] for p in table.paid_by_pool.values], dtype=np.intp
+        )[table.paid_by_codes]
+        paid = np.zeros_like(owed)
+        paid[np.arange(len(table)), payer_cols] = table.amount_cents
+
+        n_groups = len(table.group_pool.values)
+        counts = np.bincount(table.group_codes, minlength=n_groups)
+        group_paid = np.zeros((n_groups, len(cols)), dtype=np.int64)
+        group_owed = np.zeros((n_groups, len(cols)), dtype=np.int64)
+        np.add.at(group_paid, table.group_codes, paid)
+        np.add.at(group_owed, table.group_codes, owed)
+
+        self.total_cents = int(table.amount_cents.sum())
+        self.paid_cents = dict(zip(cols, paid.sum(axis=0).tolist()))
+        self.owed_cents = dict(zip(cols, owed.sum(axis=0).tolist()))
+        for g, group in enumerate(table.group_pool.values):
+            # The pool may still name groups whose rows were all removed
+            if counts[g]:
+                self._group_counts[group] = int(counts[g])
+                self.group_paid_cents[group] = dict(zip(cols, group_paid[g].tolist()))
+                self.group_owed_cents[group] = dict(zip(cols, group_owed[g].tolist()))
+
+    def apply(self, txn: Transaction) -> None:
+        """Add one transaction's contribution to the totals."""
+        self._add(txn, 1)
+
+    def revert(self, txn: Transaction) -> None:
+        """Remove one previously applied transaction from the totals."""
+        self._add(txn, -1)
+
+    def net_balance_cents(self) -> Dict[str, int]:
+        """Return participant → paid minus owed, in cents."""
+        return {
+            p: self.paid_cents.get(p, 0) - self.owed_cents.get(p, 0)
+            for p in self.participants
+        }
+
+    def net_balances(self) -> Dict[str, float]:
+        """Return participant → paid minus owed over the whole ledger."""
+        return {p: c / 100 for p, c in self.net_balance_cents().items()}
+
+    @property
+    def total(self) -> float:
+        return self.total_cents / 100
+
+    @property
+    def paid(self) -> Dict[str, float]:
+        return _dollars(self.paid_cents)
+
+    @property
+    def owed(self) -> Dict[str, float]:
+        return _dollars(self.owed_cents)
+
+    @property
+    def group_paid(self) -> Dict[str, Dict[str, float]]:
+        return {g: _dollars(m) for g, m in self.group_paid_cents.items()}
+
+    @property
+    def group_owed(self) -> Dict[str, Dict[str, float]]:
+        return {g: _dollars(m) for g, m in self.group_owed_cents.items()}
+
+    def _blank(self) -> Dict[str, int]:
+        return {p: 0 for p in self.participants}
+
+    def _add(self, txn: Transaction, sign: int) -> None:
+        group = txn.group
+        if group not in self._group_counts:
+            self._group_counts[group] = 0
+            self.group_paid_cents[group] = self._blank()
+            self.group_owed_cents[group] = self._blank()
+
+        cents = txn.amount_cents
+        self.total_cents += sign * cents
+        self.paid_cents[txn.paid_by] = self.paid_cents.get(txn.paid_by, 0) + sign * cents
+        group_paid = self.group_paid_cents[group]
+        group_paid[txn.paid_by] = group_paid.get(txn.paid_by, 0) + sign * cents
+
+        shares = allocate_cents(cents, txn.split, txn.paid_by, self.participants)
+        group_owed = self.group_owed_cents[group]
+        for p, share in shares.items():
+            self.owed_cents[p] = self.owed_cents.get(p, 0) + sign * share
+            group_owed[p] = group_owed.get(p, 0) + sign * share
+
+        self._group_counts[group] += sign
+        if self._group_counts[group] <= 0:
+            del self._group_counts[group]
+            del self.group_paid_cents[group]
+            del self.group_owed_cents[group]
+
+
+def _dollars(cents_map: Dict[str, int]) -> Dict[str, float]:
+    return {p: c / 100 for p, c in cents_map.items()}
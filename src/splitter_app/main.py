@@ -8,97 +8,168 @@ from PySide6.QtGui import QDesktopServices
 from PySide6.QtCore import QUrl
 from splitter_app.ui.main_window import MainWindow
 from splitter_app.controllers import SplitterController
-from splitter_app.services.drive import download_csv, upload_csv
+from splitter_app.startup import StartupMetrics
+from splitter_app.workers import BackgroundRunner, ThreadRunner
+from splitter_app.services.drive import SyncJournal, sync_csv
 from splitter_app.config import (
     PARTICIPANTS,
     TRANSACTION_CATEGORIES,
     LOCAL_CSV_PATH,
     DRIVE_FILE_ID,
 )
-from splitter_app.services.auth import ensure_credentials
 
-def main():
+# How long closing the window waits for a startup sync still in flight
+# (e.g. an OAuth prompt the user never answered) before giving up on it
+SYNC_EXIT_WAIT_MS = 10_000
+
+
+class _AuthError(Exception):
+    """ensure_credentials() failed during the background sync."""
+
+
+def _fetch_remote(journal, exclusive):
     """
-    Entry point for the Contribution Splitter application.
-    Applies theming, syncs CSV with Drive, shows the UI, and uploads on exit.
+    Refresh the OAuth token and sync the CSV with Drive (runs on the sync
+    thread); *exclusive* runs the local-file swap on the writer thread.
     """
-    # 1) Create the QApplication early so we can show message boxes
-    app = QApplication(sys.argv)
-    apply_light_minimal_theme(app)
-
-    # 2) First-run: make sure we have a token.json, then sync down with Drive
+    # Imported here: the OAuth stack is slow to load and only needed to sync
+    from splitter_app.services.auth import ensure_credentials
     try:
-        token_path = ensure_credentials()
+        ensure_credentials()
     except Exception as e:
+        raise _AuthError(e) from e
+    return sync_csv(journal, exclusive=exclusive)
+
+
+def _report_conflicts(result):
+    """Tell the user about local entries the sync had to change."""
+    if not result.conflicts:
+        return
+    lines = [f"{c.serial_number}: {c.reason}" for c in result.conflicts]
+    QMessageBox.warning(
+        None,
+        "Sync Conflicts",
+        "Some entries were changed on another machine:\n" + "\n".join(lines)
+    )
+
+
+def _offer_access_request(e: Exception):
+    """Ask whether to open the Drive file page to request access."""
+    response = QMessageBox.question(
+        None,
+        "Request Access",
+        f"{e}\n\nRequest access to the Drive file?",
+        QMessageBox.Yes | QMessageBox.No,
+    )
+    if response == QMessageBox.Yes:
+        url = QUrl(f"https://drive.google.com/file/d/{DRIVE_FILE_ID}/view")
+        QDesktopServices.openUrl(url)
+
+
+def _handle_sync_error(e: Exception) -> bool:
+    """Report a failed startup sync; returns True if the app must quit."""
+    if isinstance(e, _AuthError):
         QMessageBox.critical(
             None,
             "Authentication Error",
             f"Could not complete Google OAuth flow:\n{e}"
         )
-        sys.exit(1)
-
-    try:
-        download_csv()
-    except PermissionError as e:
+        return True
+    if isinstance(e, PermissionError):
         QMessageBox.critical(
             None,
             "File Permission Error",
             str(e)
         )
-        sys.exit(1)
-    except FileNotFoundError as e:
-        response = QMessageBox.question(
-            None,
-            "Request Access",
-            f"{e}\n\nRequest access to the Drive file?",
-            QMessageBox.Yes | QMessageBox.No,
-        )
-        if response == QMessageBox.Yes:
-            url = QUrl(f"https://drive.google.com/file/d/{DRIVE_FILE_ID}/view")
-            QDesktopServices.openUrl(url)
-        # continue with whatever local data exists
-    except Exception as e:
+        return True
+    if isinstance(e, FileNotFoundError):
+        _offer_access_request(e)
+    else:
         QMessageBox.warning(
             None,
             "Download Error",
             f"Could not download transactions from Drive:\n{e}"
         )
-        # continue with whatever local data exists
+    # continue with whatever local data exists
+    return False
+
+
+def main():
+    """
+    Entry point for the Contribution Splitter application.
+    Applies theming, shows the UI with the local CSV, syncs with Drive in
+    the background, and syncs again on exit.
+    """
+    metrics = StartupMetrics()
+
+    # 1) Create the QApplication early so we can show message boxes
+    app = QApplication(sys.argv)
+    apply_light_minimal_theme(app)
 
-    # 3) Show UI
+    # 2) Show UI straight away; the last local transactions.csv fills it
     window = MainWindow(
         participants=PARTICIPANTS,
         categories=TRANSACTION_CATEGORIES,
     )
+    metrics.watch_first_paint(window)
     window.show()
 
-    # 4) Wire up controller
-    controller = SplitterController(window)
-    controller.initialize()
+    # 3) Wire up controller; loading and saving run on a worker thread and
+    #    are journaled for the next delta sync
+    journal = SyncJournal()
+    controller = SplitterController(
+        window, runner=BackgroundRunner(), journal=journal, sync_runner=ThreadRunner()
+    )
+    controller.initialize(on_loaded=lambda: metrics.mark("local_ledger"))
+
+    # 4) Token refresh + Drive sync on their own thread; only the local-file
+    #    swap queues with saves, and the merged copy is folded into the view
+    #    when it lands
+    fatal = []
+
+    def on_synced(result):
+        metrics.mark("drive_sync")
+        metrics.report()
+        _report_conflicts(result)
+
+    def on_sync_failed(e):
+        metrics.mark("drive_sync")
+        metrics.report()
+        if _handle_sync_error(e):
+            fatal.append(e)
+            app.exit(1)
+
+    controller.sync(
+        lambda: _fetch_remote(journal, controller.runner.call),
+        on_done=on_synced, on_error=on_sync_failed,
+    )
 
     # 5) Run event loop & sync up on exit
     try:
         exit_code = app.exec()
     finally:
-        # Upload updated CSV
+        # Give the startup sync a bounded time to finish (its local swap
+        # needs the writer, so the writer is drained after it), then let
+        # queued saves/deletes reach the disk
+        sync_done = controller.sync_runner.wait(SYNC_EXIT_WAIT_MS)
+        controller.runner.wait()
+        if fatal:
+            sys.exit(exit_code)
+        if not sync_done:
+            # Its journal is kept, so the next launch uploads these edits
+            print("Drive sync still running at exit; skipping the exit sync")
+            sys.exit(exit_code)
+        # Merge with Drive again; uploads only if the ledger changed
         if os.path.exists(LOCAL_CSV_PATH):
             try:
-                upload_csv()
+                _report_conflicts(sync_csv(journal))
             except FileNotFoundError as e:
-                response = QMessageBox.question(
-                    None,
-                    "Request Access",
-                    f"{e}\n\nRequest access to the Drive file?",
-                    QMessageBox.Yes | QMessageBox.No,
-                )
-                if response == QMessageBox.Yes:
-                    url = QUrl(f"https://drive.google.com/file/d/{DRIVE_FILE_ID}/view")
-                    QDesktopServices.openUrl(url)
+                _offer_access_request(e)
             except Exception as e:
                 QMessageBox.warning(
                     None,
                     "Upload Error",
-                    f"Could not upload transactions to Drive:\n{e}"
+                    f"Could not sync transactions with Drive:\n{e}"
                 )
         else:
             QMessageBox.information(
@@ -1,9 +1,29 @@
 # src/splitter_app/models.py
 
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional
 
-@dataclass
+import numpy as np
+
+
+def to_cents(amount: float) -> int:
+    """Convert a dollar amount to whole cents (e.g. 12.34 → 1234)."""
+    return round(amount * 100)
+
+
+def format_cents(cents: int) -> str:
+    """Format whole cents as a plain dollar string without float math (1234 → "12.34")."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def format_balance(cents: int) -> str:
+    """Format a balance in cents as “-$xx.xx” if negative, “$xx.xx” if ≥0."""
+    return f"-${format_cents(-cents)}" if cents < 0 else f"${format_cents(cents)}"
+
+
+@dataclass(slots=True)
 class Transaction:
     """
     Represents a financial transaction entry.
@@ -17,6 +37,7 @@ class Transaction:
         category: Transaction category (e.g. "Food & Drinks").
         split: Fraction paid by the payer (0.0–1.0).
         amount: Transaction amount in CAD.
+    Use `amount_cents` for exact integer arithmetic.
     """
     serial_number: str
     description: str
@@ -27,6 +48,11 @@ class Transaction:
     split: float
     amount: float
 
+    @property
+    def amount_cents(self) -> int:
+        """The amount in whole cents."""
+        return to_cents(self.amount)
+
     @classmethod
     def from_csv_row(cls, row: List[str]) -> 'Transaction':
         """
@@ -58,3 +84,280 @@ class Transaction:
             f"{self.split:.1f}",
             f"{self.amount:.2f}",
         ]
+
+
+class _StringPool:
+    """Interns repeated strings (payers, groups, categories) as small int codes."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        """Return the code for *value*, adding it to the pool if new."""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value: str) -> Optional[int]:
+        """Return the code for *value*, or None if it was never interned."""
+        return self._codes.get(value)
+
+
+def _encode_date(date: str, pool: _StringPool) -> int:
+    """
+    Code an ISO date as the int YYYYMMDD. Anything else (e.g. an empty
+    string) is interned and stored as a negative code so nothing is lost.
+    """
+    if len(date) == 10 and date[4] == "-" and date[7] == "-":
+        y, m, d = date[:4], date[5:7], date[8:]
+        if y.isdigit() and m.isdigit() and d.isdigit():
+            return int(y) * 10000 + int(m) * 100 + int(d)
+    return -1 - pool.code(date)
+
+
+def _decode_date(code: int, pool: _StringPool) -> str:
+    if code < 0:
+        return pool.values[-1 - code]
+    return f"{code // 10000:04d}-{code // 100 % 100:02d}-{code % 100:02d}"
+
+
+class TransactionTable:
+    """
+    Columnar, array-backed storage for a ledger of transactions.
+
+    paid_by, group and category are interned into int32 code arrays, dates
+    are int-coded as YYYYMMDD, split is a float64 array and amounts are kept
+    as int64 cents, so whole-ledger aggregates can run as exact NumPy
+    reductions. Indexing or iterating
+    yields `TransactionRow` views that read like `Transaction` objects.
+    """
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self) -> None:
+        self.paid_by_pool = _StringPool()
+        self.group_pool = _StringPool()
+        self.category_pool = _StringPool()
+        self._odd_dates = _StringPool()
+        self.serial_numbers: List[str] = []
+        self.descriptions: List[str] = []
+        self._size = 0
+        self._alloc(self._INITIAL_CAPACITY)
+
+    @classmethod
+    def from_transactions(cls, txns: Iterable[Transaction]) -> "TransactionTable":
+        """Build a table holding *txns* in order."""
+        table = cls()
+        table.extend(txns)
+        return table
+
+    def _alloc(self, capacity: int) -> None:
+        old = getattr(self, "_paid_by", None)
+        n = self._size
+        new = {
+            "_paid_by": np.zeros(capacity, dtype=np.int32),
+            "_group": np.zeros(capacity, dtype=np.int32),
+            "_category": np.zeros(capacity, dtype=np.int32),
+            "_date": np.zeros(capacity, dtype=np.int32),
+            "_split": np.zeros(capacity, dtype=np.float64),
+            "_cents": np.zeros(capacity, dtype=np.int64),
+        }
+        for name, arr in new.items():
+            if old is not None:
+                arr[:n] = getattr(self, name)[:n]
+            setattr(self, name, arr)
+
+    # --- Column views (length == len(self)) ---------------------------------
+    @property
+    def paid_by_codes(self) -> np.ndarray:
+        return self._paid_by[:self._size]
+
+    @property
+    def group_codes(self) -> np.ndarray:
+        return self._group[:self._size]
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._category[:self._size]
+
+    @property
+    def date_codes(self) -> np.ndarray:
+        return self._date[:self._size]
+
+    @property
+    def split(self) -> np.ndarray:
+        return self._split[:self._size]
+
+    @property
+    def amount_cents(self) -> np.ndarray:
+        return self._cents[:self._size]
+
+    @property
+    def amount(self) -> np.ndarray:
+        """Amounts in dollars (a float64 copy of amount_cents / 100)."""
+        return self.amount_cents / 100
+
+    # --- Mutation ------------------------------------------------------------
+    def append(self, txn: Transaction) -> None:
+        """Add one transaction at the end of the table."""
+        self.extend([txn])
+
+    def extend(self, txns: Iterable[Transaction]) -> None:
+        """Add transactions at the end of the table."""
+        for t in txns:
+            i = self._size
+            if i == len(self._cents):
+                self._alloc(2 * len(self._cents))
+            self.serial_numbers.append(t.serial_number)
+            self.descriptions.append(t.description)
+            self._paid_by[i] = self.paid_by_pool.code(t.paid_by)
+            self._group[i] = self.group_pool.code(t.group)
+            self._category[i] = self.category_pool.code(t.category)
+            self._date[i] = _encode_date(t.date, self._odd_dates)
+            self._split[i] = t.split
+            self._cents[i] = t.amount_cents
+            self._size += 1
+
+    def indices_of(self, serial_number: str) -> List[int]:
+        """Return the row indexes holding *serial_number*."""
+        return [i for i, s in enumerate(self.serial_numbers) if s == serial_number]
+
+    def remove_serial(self, serial_number: str) -> List[Transaction]:
+        """Remove every row with *serial_number*; returns the removed rows."""
+        hits = self.indices_of(serial_number)
+        if not hits:
+            return []
+        removed = [self.row(i).to_transaction() for i in hits]
+        keep = np.ones(self._size, dtype=bool)
+        keep[hits] = False
+        n = int(keep.sum())
+        for name in ("_paid_by", "_group", "_category", "_date", "_split", "_cents"):
+            arr = getattr(self, name)
+            arr[:n] = arr[:self._size][keep]
+        hit_set = set(hits)
+        self.serial_numbers = [s for i, s in enumerate(self.serial_numbers) if i not in hit_set]
+        self.descriptions = [d for i, d in enumerate(self.descriptions) if i not in hit_set]
+        self._size = n
+        return removed
+
+    # --- Access ---------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._size
+
+    def row(self, index: int) -> "TransactionRow":
+        """Return a view of row *index*."""
+        if not -self._size <= index < self._size:
+            raise IndexError("TransactionTable index out of range")
+        return TransactionRow(self, index % self._size)
+
+    def __getitem__(self, index: int) -> "TransactionRow":
+        return self.row(index)
+
+    def __iter__(self) -> Iterator["TransactionRow"]:
+        for i in range(self._size):
+            yield TransactionRow(self, i)
+
+    def to_transactions(self) -> List[Transaction]:
+        """Materialise every row as a Transaction."""
+        return [r.to_transaction() for r in self]
+
+    def row_keys(self) -> List[tuple]:
+        """One hashable tuple of every field per row, for diffing two tables."""
+        n = self._size
+        paid = self.paid_by_pool.values
+        groups = self.group_pool.values
+        cats = self.category_pool.values
+        return list(zip(
+            self.serial_numbers,
+            self.descriptions,
+            [paid[c] for c in self._paid_by[:n].tolist()],
+            [_decode_date(c, self._odd_dates) for c in self._date[:n].tolist()],
+            [groups[c] for c in self._group[:n].tolist()],
+            [cats[c] for c in self._category[:n].tolist()],
+            self._split[:n].tolist(),
+            self._cents[:n].tolist(),
+        ))
+
+
+class TransactionRow:
+    """
+    Read-only view of one row of a TransactionTable, with the same
+    attributes as Transaction. Views are positional: removing rows from the
+    table shifts what later views point to.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: TransactionTable, index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def serial_number(self) -> str:
+        return self._table.serial_numbers[self._index]
+
+    @property
+    def description(self) -> str:
+        return self._table.descriptions[self._index]
+
+    @property
+    def paid_by(self) -> str:
+        return self._table.paid_by_pool.values[self._table._paid_by[self._index]]
+
+    @property
+    def date(self) -> str:
+        return _decode_date(int(self._table._date[self._index]), self._table._odd_dates)
+
+    @property
+    def group(self) -> str:
+        return self._table.group_pool.values[self._table._group[self._index]]
+
+    @property
+    def category(self) -> str:
+        return self._table.category_pool.values[self._table._category[self._index]]
+
+    @property
+    def split(self) -> float:
+        return float(self._table._split[self._index])
+
+    @property
+    def amount(self) -> float:
+        return int(self._table._cents[self._index]) / 100
+
+    @property
+    def amount_cents(self) -> int:
+        return int(self._table._cents[self._index])
+
+    def to_transaction(self) -> Transaction:
+        """Copy this row into a standalone Transaction."""
+        return Transaction(
+            serial_number=self.serial_number,
+            description=self.description,
+            paid_by=self.paid_by,
+            date=self.date,
+            group=self.group,
+            category=self.category,
+            split=self.split,
+            amount=self.amount,
+        )
+
+    def to_csv_row(self) -> List[str]:
+        """Export the row like Transaction.to_csv_row."""
+        return self.to_transaction().to_csv_row()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Transaction, TransactionRow)):
+            return self.to_transaction() == (
+                other if isinstance(other, Transaction) else other.to_transaction()
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TransactionRow({self.to_transaction()!r})"
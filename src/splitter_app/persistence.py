@@ -3,15 +3,33 @@
 CSV-based repository for storing and loading transactions.
 Handles reading, appending, and deleting entries in the CSV file.
 Adds support for legacy CSV formats with split descriptions.
+Keeps an in-memory snapshot so repeated loads only parse newly appended bytes.
+Tracks per-letter serial high-water marks in a sidecar file next to the CSV.
+Deletes append tombstone rows; the file is compacted once enough accumulate.
+Caches the parsed ledger in a columnar snapshot file so later launches skip
+parsing everything that was already parsed once.
+Also provides a SQLite-backed repository with the same interface.
 """
 import csv
+import dataclasses
+import hashlib
+import io
+import json
+import marshal
 import os
 import re
+import sqlite3
+import stat
+import sys
+import tempfile
+import time
 from contextlib import contextmanager
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from splitter_app.models import Transaction
 from splitter_app.config import PARTICIPANTS
+from splitter_app.tracing import span, traced
 
 
 # Cross-platform file locking shim: use fcntl on POSIX, msvcrt on Windows
@@ -57,98 +75,984 @@ except Exception:  # Windows: provide best-effort locking via msvcrt
     fcntl = _FcntlProxy()
 
 
+# Windows refuses to rename over a file that is open, so there the ledger
+# handle cannot double as the lock across a rewrite: every locked operation
+# locks "<csv>.lock" instead, and rewrites close the ledger before renaming
+# over it while that lock is still held.
+_LOCK_FILE = os.name == 'nt'
+
+# How long _replace() keeps retrying a rename refused with PermissionError,
+# e.g. while a virus scanner or another program briefly has the file open
+_REPLACE_RETRY_SECONDS = 5.0
+
+
+# Bytes just before the parsed offset that must still match before an
+# incremental tail read is trusted (guards against files replaced wholesale).
+_TAIL_GUARD_BYTES = 64
+
+
+# First cell of the row appended by delete(): "<marker>,<serial_number>"
+TOMBSTONE_MARKER = "#deleted"
+
+# Fraction of dead rows (tombstoned entries plus markers) that triggers compaction
+COMPACT_THRESHOLD = 0.25
+
+# On-disk snapshot cache: files (or newly parsed tails) at least this big
+# get their parsed form written to "<csv>.snapshot"; smaller ones are cheap
+# enough to parse. The format is marshal, so it is keyed to the interpreter.
+SNAPSHOT_MIN_BYTES = 256 * 1024
+_SNAPSHOT_FORMAT = (1, marshal.version, sys.version_info[:2])
+
+# Placeholder written in the snapshot columns for rows deleted by tombstones
+_HOLE = Transaction("", "", "", "", "", "", 0.0, 0.0)
+
+# Serial numbers are a category letter followed by a running number, e.g. "A001"
+_SERIAL_RE = re.compile(r"([A-Za-z]+)(\d+)")
+
+
+def _split_serial(serial_number: str) -> Optional[Tuple[str, int]]:
+    """Split "A012" into ("A", 12); None if it does not look like a serial."""
+    m = _SERIAL_RE.fullmatch(serial_number)
+    return (m.group(1), int(m.group(2))) if m else None
+
+
+def _file_stamp(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """
+    (size, mtime_ns, device, inode) identifying one version of a file.
+    The inode changes when another writer swaps in a new file with
+    os.replace, even if the new file happens to extend the old one.
+    """
+    return st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino
+
+
+# Process umask, for giving new files the mode open() would. Read once at
+# import: os.umask can only be queried by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_temp(path: str, data: bytes) -> Tuple[str, Dict[str, float]]:
+    """
+    Write *data* to a new temp file next to *path* and fsync it.
+    The temp file takes *path*'s permissions (mkstemp creates it 0600), so
+    renaming it over *path* does not change them.
+    Returns the temp path and the seconds spent writing and syncing.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+    try:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as f:
+            t0 = time.perf_counter()
+            f.write(data)
+            f.flush()
+            t1 = time.perf_counter()
+            os.fsync(f.fileno())
+            t2 = time.perf_counter()
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, {"write": t1 - t0, "fsync": t2 - t1}
+
+
+def _replace(tmp_path: str, path: str) -> float:
+    """
+    Rename *tmp_path* over *path* durably, backing off while the rename is
+    refused with PermissionError; returns the seconds it took.
+    """
+    t0 = time.perf_counter()
+    delay = 0.01
+    while True:
+        try:
+            os.replace(tmp_path, path)
+            break
+        except PermissionError:
+            if time.perf_counter() - t0 >= _REPLACE_RETRY_SECONDS:
+                os.unlink(tmp_path)
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    # Persist the rename itself; directories cannot be opened on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return time.perf_counter() - t0
+
+
+def _atomic_write(path: str, data: bytes) -> Dict[str, float]:
+    """Write *data* to a sibling temp file, fsync it, then rename over *path*."""
+    tmp_path, timings = _write_temp(path, data)
+    timings["replace"] = _replace(tmp_path, path)
+    return timings
+
+
+# Fraction in a legacy split label, e.g. "Even (1/2 each)"
+_LEGACY_SPLIT_RE = re.compile(r"\((\d+)/(\d+)")
+
+# Cheap test for a numeric cell, used to tell the two layouts apart without
+# paying for a float() exception on every row of a legacy block
+_NUMBER_RE = re.compile(r"\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*")
+
+
+@lru_cache(maxsize=256)
+def _legacy_split(label: str) -> Optional[float]:
+    """Payer fraction for a legacy split label; None if it is unusable."""
+    m = _LEGACY_SPLIT_RE.search(label)
+    if not m:
+        # default to equal split
+        return round(1.0 / len(PARTICIPANTS), 1)
+    num, den = m.groups()
+    if int(den) == 0:
+        return None
+    return round(int(num) / int(den), 1)
+
+
+def _parse_current(row: List[str]) -> Optional[Transaction]:
+    """Parse [serial, desc, paid_by, date, group, category, split, amount]."""
+    try:
+        return Transaction.from_csv_row(row)
+    except (ValueError, IndexError):
+        return None
+
+
+def _parse_legacy(row: List[str]) -> Optional[Transaction]:
+    """Parse [serial, desc, paid_by, group, date, amount, category, split_label]."""
+    serial, desc, paid_by, group, date, amount_str, category, split_label = row[:8]
+    try:
+        amount = float(amount_str)
+    except ValueError:
+        return None
+    split = _legacy_split(split_label)
+    if split is None:
+        return None
+    return Transaction(
+        serial_number=serial,
+        description=desc,
+        paid_by=paid_by,
+        date=date,
+        group=group,
+        category=category,
+        split=split,
+        amount=amount,
+    )
+
+
+def _parse_rows(rows: Iterable[List[str]]) -> List[Union[Transaction, str]]:
+    """
+    Parse CSV rows in a single pass, in file order.
+    Transactions are returned as-is; delete markers as their serial string.
+
+    The layout is detected once per block of rows: after a legacy row, the
+    following rows go straight to the legacy parser unless their split
+    column is numeric, so mixed files only pay for an exception at the
+    boundaries between blocks.
+    """
+    items: List[Union[Transaction, str]] = []
+    legacy_block = False
+    for row in rows:
+        if len(row) < 8:
+            if len(row) == 2 and row[0] == TOMBSTONE_MARKER:
+                items.append(row[1])
+            continue
+        txn = None
+        if not legacy_block or _NUMBER_RE.fullmatch(row[6]):
+            txn = _parse_current(row)
+        legacy_block = txn is None
+        if legacy_block:
+            txn = _parse_legacy(row)
+        if txn:
+            items.append(txn)
+    return items
+
+
+def _parse_bytes(data: bytes) -> List[Union[Transaction, str]]:
+    """Parse a chunk of raw CSV bytes; see _parse_rows."""
+    return _parse_rows(csv.reader(io.StringIO(data.decode('utf-8'), newline='')))
+
+
+def _encode_rows(rows: List[List[str]]) -> bytes:
+    """Serialise rows exactly as csv.writer would write them to disk."""
+    buf = io.StringIO(newline='')
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue().encode('utf-8')
+
+
+def _encode_row(txn: Transaction) -> bytes:
+    """Serialise a single Transaction row."""
+    return _encode_rows([txn.to_csv_row()])
+
+
 class CSVRepository:
     """
     A repository that uses a CSV file as its backend storage.
+
+    Keeps an in-memory snapshot of the parsed file together with the size and
+    mtime it was taken at. Unchanged files are served from the snapshot, and
+    files that only grew (e.g. another process appended) are caught up by
+    parsing just the new bytes.
+
+    Deletes append a tombstone row instead of rewriting the file; the file is
+    compacted once tombstoned rows make up `compact_threshold` of it.
+
+    The first load in a process can start from "<csv>.snapshot", written
+    after parsing a large file. It is keyed by the CSV's size, mtime and a
+    BLAKE2 hash of the bytes it covers, so a grown CSV only has its new
+    tail parsed.
     """
 
-    def __init__(self, csv_path: str) -> None:
+    def __init__(
+        self,
+        csv_path: str,
+        compact_threshold: float = COMPACT_THRESHOLD,
+        snapshot_cache: bool = True,
+    ) -> None:
         """
         :param csv_path: Path to the CSV file storing transactions.
+        :param compact_threshold: Fraction of dead rows that triggers a rewrite.
+        :param snapshot_cache: Read and write the on-disk parsed snapshot.
         """
         self.csv_path = csv_path
+        self.serials_path = f"{csv_path}.serials.json"
+        self.lock_path = f"{csv_path}.lock"
+        self.snapshot_path = f"{csv_path}.snapshot" if snapshot_cache else None
+        self.compact_threshold = compact_threshold
+        # Seconds spent in the phases of the most recent locked operation,
+        # e.g. {"lock_wait": ..., "write": ..., "fsync": ..., "replace": ...}
+        self.write_timings: Dict[str, float] = {}
+        # Highest number ever handed out per serial letter. Persisted so that
+        # deleting the newest row never frees its serial for reuse.
+        self._serial_hwm: Optional[Dict[str, int]] = None
+        # (stamp before, stamp after) of this instance's latest write, so a
+        # caller can tell them apart from another process's
+        self._own_write: Optional[Tuple[tuple, tuple]] = None
+        self._reset_snapshot(None, b'', None)
 
     @contextmanager
     def _open_locked(self, mode: str, lock: int):
         """Open *csv_path* applying an advisory file lock."""
         # Ensure directory exists before attempting to open
-        os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
-        with open(self.csv_path, mode, newline='', encoding='utf-8') as f:
-            fcntl.flock(f, lock)
+        os.makedirs(os.path.dirname(os.path.abspath(self.csv_path)), exist_ok=True)
+        if _LOCK_FILE:
+            with open(self.lock_path, 'a+b') as lock_file:
+                self._lock(lock_file, lock)
+                try:
+                    # A rewrite may close this handle early to rename over it
+                    with self._open(mode) as f:
+                        yield f
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return
+        while True:
+            f = self._open(mode)
+            self._lock(f, lock)
+            # compact() may have renamed a new file into place while we were
+            # waiting; writing to the old handle would lose the data.
+            if self._is_current(f):
+                break
+            fcntl.flock(f, fcntl.LOCK_UN)
+            f.close()
+        with f:
             try:
                 yield f
             finally:
                 fcntl.flock(f, fcntl.LOCK_UN)
 
+    def _open(self, mode: str):
+        if 'b' in mode:
+            return open(self.csv_path, mode)
+        return open(self.csv_path, mode, newline='', encoding='utf-8')
+
+    def _lock(self, f, lock: int) -> None:
+        t0 = time.perf_counter()
+        fcntl.flock(f, lock)
+        if lock == fcntl.LOCK_EX:
+            self.write_timings = {"lock_wait": time.perf_counter() - t0}
+
+    def _is_current(self, f) -> bool:
+        """True if the open handle *f* still refers to the file at csv_path."""
+        try:
+            return os.path.samestat(os.fstat(f.fileno()), os.stat(self.csv_path))
+        except FileNotFoundError:
+            return False
+
+    def stamp(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Return (size, mtime_ns, device, inode) of the CSV file, or None if it
+        does not exist.
+        Callers compare stamps to notice changes made by other processes.
+        """
+        try:
+            st = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return _file_stamp(st)
+
+    def only_own_write(self, before: Optional[tuple], after: Optional[tuple]) -> bool:
+        """
+        True if nothing but this instance's latest write (a save, or a
+        delete and the compaction it triggered) happened between stamps
+        *before* and *after*.
+        """
+        return before == after or self._own_write == (before, after)
+
+    def _note_write(self, before: tuple, after: tuple) -> None:
+        """Record a write that took the file from stamp *before* to *after*."""
+        self._own_write = (before, after)
+
     def load_all(self) -> List[Transaction]:
         """
         Load all transactions from the CSV file, handling both new and legacy formats.
         Returns an empty list if the file does not exist or is empty.
         """
+        with span("repo.load_all") as s:
+            self._refresh()
+            rows = [t for t in self._rows if t is not None]
+            s.set(rows=len(rows))
+        return rows
+
+    def _refresh(self) -> None:
+        """Bring the snapshot up to date with the file on disk."""
         if not os.path.exists(self.csv_path):
-            return []
-
-        transactions: List[Transaction] = []
-        with self._open_locked('r', fcntl.LOCK_SH) as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if not row:
-                    continue
-                txn = None
-                # Try new format: [serial, desc, paid_by, date, group, category, split, amount]
-                if len(row) >= 8:
-                    try:
-                        txn = Transaction.from_csv_row(row)
-                    except (ValueError, IndexError):
-                        txn = None
-                if txn is None:
-                    # Fallback: legacy format [serial, desc, paid_by, group, date, amount, category, split_label]
-                    try:
-                        serial, desc, paid_by, group, date, amount_str, category, split_label = row[:8]
-                        amount = float(amount_str)
-                        # Parse a fraction in parentheses, e.g. "Even (1/2 each)"
-                        m = re.search(r"\((\d+)/(\d+)", split_label)
-                        if m:
-                            num, den = m.groups()
-                            split = round(int(num) / int(den), 1)
-                        else:
-                            # default to equal split
-                            split = round(1.0 / len(PARTICIPANTS), 1)
-                        txn = Transaction(
-                            serial_number=serial,
-                            description=desc,
-                            paid_by=paid_by,
-                            date=date,
-                            group=group,
-                            category=category,
-                            split=split,
-                            amount=amount,
-                        )
-                    except Exception:
-                        # Skip malformed legacy rows
-                        continue
-                if txn:
-                    transactions.append(txn)
-        return transactions
+            self._reset_snapshot([], b'', None)
+            return
+
+        with self._open_locked('rb', fcntl.LOCK_SH) as f:
+            self._catch_up(f)
+
+    def _catch_up(self, f) -> None:
+        """Sync the snapshot from the locked handle *f* if the file changed."""
+        st = os.fstat(f.fileno())
+        stamp = _file_stamp(st)
+        if self._rows is not None and stamp == self._snapshot_stamp:
+            return
+        # A replaced file (new inode) may rewrite rows before the old end
+        same_file = (
+            self._snapshot_stamp is not None and stamp[2:] == self._snapshot_stamp[2:]
+        )
+        if same_file and self._read_tail(f, st.st_size):
+            self._snapshot_stamp = stamp
+        elif self._rows is not None or not self._load_cache(f, stamp):
+            self._read_full(f)
+
+    def _read_full(self, f) -> None:
+        """Parse the whole file into a fresh snapshot."""
+        f.seek(0)
+        data = f.read()
+        st = os.fstat(f.fileno())
+        self._reset_snapshot([], data, _file_stamp(st))
+        self._apply(_parse_bytes(data))
+        if len(data) >= SNAPSHOT_MIN_BYTES:
+            self._write_cache(hashlib.blake2b(data))
+
+    def _load_cache(self, f, stamp: Tuple[int, int, int, int]) -> bool:
+        """
+        Start the snapshot from the on-disk cache if it still describes the
+        beginning of the file; parse whatever was appended after it.
+        Returns False on a miss.
+        """
+        if self.snapshot_path is None:
+            return False
+        try:
+            with open(self.snapshot_path, 'rb') as c:
+                cache = marshal.loads(c.read())
+            if cache["format"] != _SNAPSHOT_FORMAT:
+                return False
+            size = cache["size"]
+            cached_stamp = (size, cache["mtime_ns"])
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return False
+        if stamp[0] < size:
+            return False
+        digest = None
+        if stamp[:2] != cached_stamp:
+            # Same prefix bytes? (also covers a touched but unchanged file)
+            f.seek(0)
+            digest = hashlib.blake2b(f.read(size))
+            if digest.digest() != cache["digest"]:
+                return False
+
+        serials, descs, paid_by, dates, groups, categories, splits, amounts = cache["columns"]
+        rows: List[Optional[Transaction]] = list(map(
+            Transaction, serials, descs, paid_by, dates, groups, categories, splits, amounts
+        ))
+        holes = set(cache["holes"])
+        for i in holes:
+            rows[i] = None
+        index: Dict[str, List[int]] = {}
+        for i, serial in enumerate(serials):
+            if i not in holes:
+                index.setdefault(serial, []).append(i)
+
+        self._reset_snapshot(None, b'', stamp)
+        self._rows = rows
+        self._index = index
+        self._dead = cache["dead"]
+        self._markers = cache["markers"]
+        self._offset = size
+        self._tail_guard = cache["tail_guard"]
+        hwm = self._serials()
+        for letter, number in cache["hwm"].items():
+            hwm[letter] = max(hwm.get(letter, 0), number)
+
+        if stamp[:2] != cached_stamp:
+            # Only the bytes appended since the cache was written
+            data = f.read()
+            self._apply(_parse_bytes(data))
+            self._offset += len(data)
+            self._tail_guard = (self._tail_guard + data)[-_TAIL_GUARD_BYTES:]
+            if len(data) >= SNAPSHOT_MIN_BYTES:
+                digest.update(data)
+                self._write_cache(digest)
+        return True
+
+    def _write_cache(self, digest) -> None:
+        """Persist the current snapshot; *digest* hashes the file bytes it covers."""
+        if self.snapshot_path is None:
+            return
+        rows = self._rows
+        holes = [i for i, t in enumerate(rows) if t is None]
+        live = [t if t is not None else _HOLE for t in rows]
+        cache = {
+            "format": _SNAPSHOT_FORMAT,
+            "size": self._snapshot_stamp[0],
+            "mtime_ns": self._snapshot_stamp[1],
+            "digest": digest.digest(),
+            "tail_guard": self._tail_guard,
+            "dead": self._dead,
+            "markers": self._markers,
+            "hwm": dict(self._serials()),
+            "holes": holes,
+            "columns": [
+                [t.serial_number for t in live],
+                [t.description for t in live],
+                [t.paid_by for t in live],
+                [t.date for t in live],
+                [t.group for t in live],
+                [t.category for t in live],
+                [t.split for t in live],
+                [t.amount for t in live],
+            ],
+        }
+        # A cache only saves time; skip the fsync and never fail the load
+        tmp = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp, 'wb') as c:
+                c.write(marshal.dumps(cache))
+            os.replace(tmp, self.snapshot_path)
+        except OSError:
+            pass
+
+    def _read_tail(self, f, size: int) -> bool:
+        """
+        Parse only the bytes appended since the snapshot was taken.
+        Returns False when the file was not simply appended to.
+        """
+        if self._rows is None or size <= self._offset:
+            return False
+        f.seek(self._offset - len(self._tail_guard))
+        if f.read(len(self._tail_guard)) != self._tail_guard:
+            return False
+        data = f.read()
+        self._apply(_parse_bytes(data))
+        self._offset += len(data)
+        self._tail_guard = (self._tail_guard + data)[-_TAIL_GUARD_BYTES:]
+        return True
+
+    def _reset_snapshot(
+        self,
+        rows: Optional[List[Transaction]],
+        data: bytes,
+        stamp: Optional[Tuple[int, int, int, int]],
+    ) -> None:
+        """Replace the snapshot with *rows*, known to be stored as *data*."""
+        # File-ordered rows; deleted entries become None until compaction
+        self._rows: Optional[List[Optional[Transaction]]] = None
+        # serial_number → positions of its live rows in self._rows
+        self._index: Dict[str, List[int]] = {}
+        # Rows a compaction would drop: tombstoned entries plus the markers
+        self._dead = 0
+        self._markers = 0
+        self._snapshot_stamp = stamp
+        self._offset = len(data)
+        self._tail_guard = data[-_TAIL_GUARD_BYTES:]
+        if rows is not None:
+            self._rows = []
+            self._apply(rows)
+
+    def _apply(self, items: List[Union[Transaction, str]]) -> None:
+        """Fold parsed rows and delete markers into the snapshot, in file order."""
+        self._bump_serials([t for t in items if not isinstance(t, str)])
+        for item in items:
+            if isinstance(item, str):
+                slots = self._index.pop(item, [])
+                for i in slots:
+                    self._rows[i] = None
+                self._dead += len(slots) + 1
+                self._markers += 1
+            else:
+                self._index.setdefault(item.serial_number, []).append(len(self._rows))
+                self._rows.append(item)
+
+    def next_serial(self, letter: str) -> str:
+        """
+        Return the next unused serial number for *letter*, e.g. "A004".
+        Numbers are never reused, even after the newest entry is deleted.
+        """
+        self._refresh()
+        return f"{letter}{self._serials().get(letter, 0) + 1:03d}"
 
+    def serial_marks(self) -> Dict[str, int]:
+        """
+        Highest serial number ever used per letter, including deleted and
+        compacted-away entries, e.g. {"A": 3}.
+        """
+        self._refresh()
+        return dict(self._serials())
+
+    def _serials(self) -> Dict[str, int]:
+        """Return the serial high-water marks, reading the sidecar on first use."""
+        if self._serial_hwm is None:
+            # Missing or corrupt sidecar: rebuilt from the CSV rows as they load
+            self._serial_hwm = self._read_sidecar()
+        return self._serial_hwm
+
+    def _read_sidecar(self) -> Dict[str, int]:
+        """High-water marks stored in the sidecar; empty if unreadable."""
+        try:
+            with open(self.serials_path, encoding='utf-8') as f:
+                stored = json.load(f)
+            return {str(k): int(v) for k, v in stored.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _bump_serials(self, transactions: List[Transaction]) -> bool:
+        """Raise high-water marks to cover *transactions*; True if any changed."""
+        hwm = self._serials()
+        changed = False
+        for t in transactions:
+            parts = _split_serial(t.serial_number)
+            if parts and parts[1] > hwm.get(parts[0], 0):
+                hwm[parts[0]] = parts[1]
+                changed = True
+        return changed
+
+    def _merge_sidecar(self) -> Dict[str, int]:
+        """
+        Fold marks other writers stored in the sidecar (e.g. serials they
+        deleted and compacted away) into ours. Call under the write lock.
+        """
+        hwm = self._serials()
+        for letter, number in self._read_sidecar().items():
+            if number > hwm.get(letter, 0):
+                hwm[letter] = number
+        return hwm
+
+    def _write_serials(self) -> None:
+        """
+        Atomically persist the serial high-water marks to the sidecar,
+        never lowering a mark another writer stored. Call under the write lock.
+        """
+        data = json.dumps(self._merge_sidecar(), sort_keys=True).encode('utf-8')
+        timings = _atomic_write(self.serials_path, data)
+        self.write_timings["serials"] = sum(timings.values())
+
+    def _append(self, data: bytes, items: List[Union[Transaction, str]]) -> None:
+        """Append encoded *data* and fold the matching *items* into the snapshot."""
+        with self._open_locked('ab', fcntl.LOCK_EX) as f:
+            self._write_locked(f, data, items)
+
+    def _write_locked(self, f, data: bytes, items: List[Union[Transaction, str]]) -> None:
+        """Append *data* through the exclusively locked handle *f*."""
+        before = os.fstat(f.fileno())
+        f.write(data)
+        f.flush()
+        after = os.fstat(f.fileno())
+        self._note_write(_file_stamp(before), _file_stamp(after))
+        # Persist the serial counters while still holding the lock so the
+        # sidecar never lags behind the rows another process can see. A
+        # deleted serial may be the only record of its high-water mark.
+        txns = [t for t in items if not isinstance(t, str)]
+        if self._bump_serials(txns) or len(txns) < len(items):
+            self._write_serials()
+
+        # Only extend the snapshot if nobody else touched the file since it
+        # was taken; otherwise the next load_all() catches up from the offset.
+        if (
+            self._rows is not None
+            and _file_stamp(before) == self._snapshot_stamp
+        ):
+            self._apply(items)
+            self._snapshot_stamp = _file_stamp(after)
+            self._offset = after.st_size
+            self._tail_guard = (self._tail_guard + data)[-_TAIL_GUARD_BYTES:]
+
+    def _save_numbered(
+        self,
+        transactions: List[Transaction],
+        letter_for: Callable[[Transaction], str],
+        only_taken: bool,
+    ) -> int:
+        """
+        Append *transactions* after giving them fresh serials, all of them or
+        (with *only_taken*) those whose serial is live in the ledger or
+        repeats earlier in the batch. Serials are chosen while holding the
+        write lock, so concurrent writers never pick the same number.
+        Renumbers *transactions* in place; returns how many changed.
+        """
+        with self._open_locked('a+b', fcntl.LOCK_EX) as f:
+            self._catch_up(f)
+            # Numbers retired by another writer's compaction live only in
+            # its sidecar
+            floor = dict(self._merge_sidecar())
+            if only_taken:
+                # Kept serials later in the batch must not be handed out
+                for t in transactions:
+                    parts = _split_serial(t.serial_number)
+                    if parts and parts[1] > floor.get(parts[0], 0):
+                        floor[parts[0]] = parts[1]
+
+            taken = set(self._index)
+            changed = 0
+            for t in transactions:
+                if not only_taken or t.serial_number in taken:
+                    letter = letter_for(t)
+                    floor[letter] = floor.get(letter, 0) + 1
+                    t.serial_number = f"{letter}{floor[letter]:03d}"
+                    changed += 1
+                taken.add(t.serial_number)
+            if transactions:
+                self._write_locked(
+                    f, _encode_rows([t.to_csv_row() for t in transactions]), transactions
+                )
+        return changed
+
+    @traced("repo.save")
     def save(self, txn: Transaction) -> None:
         """
         Append a single transaction to the CSV file.
         Creates the file if it does not exist.
         """
-        with self._open_locked('a', fcntl.LOCK_EX) as f:
-            writer = csv.writer(f)
-            writer.writerow(txn.to_csv_row())
+        self._append(_encode_row(txn), [txn])
+
+    @traced("repo.save_many")
+    def save_many(self, transactions: Iterable[Transaction]) -> None:
+        """Append several transactions with a single locked write."""
+        txns = list(transactions)
+        if txns:
+            self._append(_encode_rows([t.to_csv_row() for t in txns]), txns)
+
+    @traced("repo.save_new")
+    def save_new(self, txn: Transaction, letter: str) -> Transaction:
+        """
+        Save *txn* under the next unused serial number for *letter*.
+        Unlike next_serial() followed by save(), the number is picked under
+        the write lock. Returns the saved copy.
+        """
+        saved = dataclasses.replace(txn)
+        self._save_numbered([saved], lambda t: letter, only_taken=False)
+        return saved
+
+    @traced("repo.save_renumbered")
+    def save_renumbered(
+        self,
+        transactions: Iterable[Transaction],
+        letter_for: Callable[[Transaction], str],
+    ) -> int:
+        """
+        Append *transactions* (e.g. a bulk import), giving any whose serial
+        is already taken the next free number for `letter_for(txn)`.
+        Renumbers them in place; returns how many were renumbered.
+        """
+        return self._save_numbered(list(transactions), letter_for, only_taken=True)
 
+    @traced("repo.delete")
     def delete(self, serial_number: str) -> None:
         """
         Delete a transaction by its serial number.
-        Rewrites the CSV file without the matching entry.
+        Appends a tombstone row and compacts the file once enough have piled up.
+        """
+        self._refresh()
+        if serial_number not in self._index:
+            return
+        self._append(
+            _encode_rows([[TOMBSTONE_MARKER, serial_number]]), [serial_number]
+        )
+        appended = self._own_write
+        if self.maybe_compact() and self._own_write[0] == appended[1]:
+            self._own_write = (appended[0], self._own_write[1])
+
+    @traced("repo.delete_where")
+    def delete_where(self, match: Callable[[Transaction], bool]) -> List[Transaction]:
+        """
+        Delete every transaction *match* accepts with one rewrite rather than
+        a tombstone each. *match* is applied under the exclusive lock after
+        catching up with other writers, so rows saved meanwhile are not lost.
+        Deleted serials stay retired. Returns the deleted rows.
+        """
+        doomed: List[Transaction] = []
+
+        def keep(rows: List[Transaction], marks: Dict[str, int]) -> List[Transaction]:
+            kept = []
+            for t in rows:
+                (doomed if match(t) else kept).append(t)
+            return kept
+        self._rewrite(keep)
+        return doomed
+
+    def dead_ratio(self) -> float:
+        """Return the fraction of file rows a compaction would remove."""
+        total = len(self._rows or []) + self._markers
+        return self._dead / total if total else 0.0
+
+    def maybe_compact(self) -> bool:
+        """Compact the file if the dead-row ratio crossed the threshold."""
+        if self.dead_ratio() < self.compact_threshold:
+            return False
+        self.compact()
+        return True
+
+    @traced("repo.compact")
+    def compact(self) -> None:
+        """
+        Rewrite the CSV with only the live rows, dropping all tombstones.
+        The new content goes to a sibling temp file that is fsynced and then
+        renamed over the original, so readers never see a partial ledger.
+        """
+        if not os.path.exists(self.csv_path):
+            return
+        with self._open_locked('rb', fcntl.LOCK_EX) as f:
+            # Pick up anything appended since our last look before rewriting
+            self._catch_up(f)
+            live = [t for t in self._rows if t is not None]
+            data = _encode_rows([t.to_csv_row() for t in live])
+            tmp_path, timings = _write_temp(self.csv_path, data)
+            # The rename keeps inode and mtime; stat now, before another
+            # writer can append to the new file
+            stamp = _file_stamp(os.stat(tmp_path))
+            self._note_write(_file_stamp(os.fstat(f.fileno())), stamp)
+            if _LOCK_FILE:
+                # Windows cannot rename over an open file; the lock file
+                # keeps other writers out until the rename is done
+                f.close()
+            timings["replace"] = _replace(tmp_path, self.csv_path)
+        self.write_timings.update(timings)
+
+        self._reset_snapshot(live, data, stamp)
+
+    @traced("repo.replace_all")
+    def replace_all(self, transactions: Iterable[Transaction]) -> None:
+        """
+        Atomically replace the whole ledger with *transactions*. Serial
+        high-water marks never go down. Rows other writers append meanwhile
+        are dropped; use rewrite() to build on the current rows instead.
+        """
+        live = list(transactions)
+        self._rewrite(lambda rows, marks: live)
+
+    @traced("repo.rewrite")
+    def rewrite(
+        self,
+        update: Callable[[List[Transaction], Dict[str, int]], Iterable[Transaction]],
+    ) -> List[Transaction]:
+        """
+        Atomically replace the ledger with `update(rows, serial_marks)` (e.g.
+        a sync merge). *update* runs under the exclusive lock after catching
+        up with other writers, so rows appended since the caller last loaded
+        are in *rows* instead of being lost. Returns the rows written.
+        """
+        return self._rewrite(update)
+
+    def _rewrite(
+        self,
+        update: Callable[[List[Transaction], Dict[str, int]], Iterable[Transaction]],
+    ) -> List[Transaction]:
+        # 'a+b' creates a missing file and still allows reading it back
+        with self._open_locked('a+b', fcntl.LOCK_EX) as f:
+            # Fold in the outgoing rows so their serials stay retired
+            self._catch_up(f)
+            rows = [t for t in self._rows if t is not None]
+            live = list(update(rows, dict(self._merge_sidecar())))
+            data = _encode_rows([t.to_csv_row() for t in live])
+            self._bump_serials(live)
+            self._write_serials()
+            tmp_path, timings = _write_temp(self.csv_path, data)
+            stamp = _file_stamp(os.stat(tmp_path))
+            self._note_write(_file_stamp(os.fstat(f.fileno())), stamp)
+            if _LOCK_FILE:
+                # As in compact(): rename while the lock file is still held
+                f.close()
+            timings["replace"] = _replace(tmp_path, self.csv_path)
+        self.write_timings.update(timings)
+
+        self._reset_snapshot(live, data, stamp)
+        return live
+
+
+class SQLiteRepository:
+    """
+    A repository backed by a SQLite database, interchangeable with CSVRepository.
+
+    Rows are indexed on serial_number, group, category and date, and the
+    database runs in WAL mode so readers in other processes never block on
+    a writer.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            serial_number TEXT NOT NULL,
+            description   TEXT NOT NULL,
+            paid_by       TEXT NOT NULL,
+            date          TEXT NOT NULL,
+            "group"       TEXT NOT NULL,
+            category      TEXT NOT NULL,
+            split         REAL NOT NULL,
+            amount        REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_serial ON transactions(serial_number);
+        CREATE INDEX IF NOT EXISTS idx_transactions_group ON transactions("group");
+        CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category);
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+        CREATE TABLE IF NOT EXISTS serials (
+            letter TEXT PRIMARY KEY,
+            hwm    INTEGER NOT NULL
+        );
+    """
+
+    _COLUMNS = 'serial_number, description, paid_by, date, "group", category, split, amount'
+
+    def __init__(self, db_path: str) -> None:
+        """
+        :param db_path: Path to the SQLite database file (created if missing).
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # The controller's BackgroundRunner calls in from its worker thread;
+        # it runs one task at a time, so the connection is never shared
+        # concurrently
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed data safe across crashes; NORMAL skips the
+        # per-commit fsync of the main database file.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def stamp(self) -> int:
+        """
+        Return a value that changes whenever another connection commits.
+        Mirrors CSVRepository.stamp() for external-change detection.
+        """
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def only_own_write(self, before: int, after: int) -> bool:
+        """
+        True if no other connection committed between stamps *before* and
+        *after*. Mirrors CSVRepository.only_own_write(); our own commits
+        leave data_version unchanged.
+        """
+        return before == after
+
+    @traced("repo.load_all")
+    def load_all(self) -> List[Transaction]:
+        """Load all transactions in insertion order."""
+        rows = self._conn.execute(
+            f"SELECT {self._COLUMNS} FROM transactions ORDER BY id"
+        )
+        return [Transaction(*row) for row in rows]
+
+    def next_serial(self, letter: str) -> str:
+        """
+        Return the next unused serial number for *letter*, e.g. "A004".
+        Numbers are never reused, even after the newest entry is deleted.
+        """
+        row = self._conn.execute(
+            "SELECT hwm FROM serials WHERE letter = ?", (letter,)
+        ).fetchone()
+        return f"{letter}{(row[0] if row else 0) + 1:03d}"
+
+    def serial_marks(self) -> Dict[str, int]:
+        """Highest serial number ever used per letter, e.g. {"A": 3}."""
+        return dict(self._conn.execute("SELECT letter, hwm FROM serials"))
+
+    @traced("repo.save")
+    def save(self, txn: Transaction) -> None:
+        """Insert a single transaction."""
+        with self._conn:
+            self._insert([txn])
+
+    @traced("repo.save_new")
+    def save_new(self, txn: Transaction, letter: str) -> Transaction:
+        """
+        Save *txn* under the next unused serial number for *letter*, picked
+        inside a write transaction. Returns the saved copy.
+        """
+        saved = dataclasses.replace(txn)
+        with self._conn:
+            # Take the write lock before reading the counter
+            self._conn.execute("BEGIN IMMEDIATE")
+            saved.serial_number = self.next_serial(letter)
+            self._insert([saved])
+        return saved
+
+    @traced("repo.save_many")
+    def save_many(self, transactions: Iterable[Transaction]) -> None:
+        """Insert several transactions in one transaction."""
+        with self._conn:
+            self._insert(list(transactions))
+
+    @traced("repo.delete")
+    def delete(self, serial_number: str) -> None:
+        """Delete every transaction with the given serial number."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM transactions WHERE serial_number = ?", (serial_number,)
+            )
+
+    def import_csv(self, csv_path: str) -> int:
+        """
+        One-shot import of a CSV ledger, in either the current or the legacy
+        layout (and honouring tombstones). Returns the number of rows imported.
         """
-        transactions = self.load_all()
-        remaining = [t for t in transactions if t.serial_number != serial_number]
+        source = CSVRepository(csv_path, snapshot_cache=False)
+        transactions = source.load_all()
+        with self._conn:
+            self._insert(transactions)
+            # Carry over counters for serials that were deleted before import
+            self._conn.executemany(
+                "INSERT INTO serials (letter, hwm) VALUES (?, ?) "
+                "ON CONFLICT(letter) DO UPDATE SET hwm = MAX(hwm, excluded.hwm)",
+                source.serial_marks().items(),
+            )
+        return len(transactions)
 
-        with self._open_locked('w', fcntl.LOCK_EX) as f:
-            writer = csv.writer(f)
-            for t in remaining:
-                writer.writerow(t.to_csv_row())
+    def _insert(self, transactions: List[Transaction]) -> None:
+        """Insert rows and raise serial high-water marks; caller commits."""
+        self._conn.executemany(
+            f"INSERT INTO transactions ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (t.serial_number, t.description, t.paid_by, t.date,
+                 t.group, t.category, t.split, t.amount)
+                for t in transactions
+            ),
+        )
+        hwm: Dict[str, int] = {}
+        for t in transactions:
+            parts = _split_serial(t.serial_number)
+            if parts:
+                hwm[parts[0]] = max(hwm.get(parts[0], 0), parts[1])
+        self._conn.executemany(
+            "INSERT INTO serials (letter, hwm) VALUES (?, ?) "
+            "ON CONFLICT(letter) DO UPDATE SET hwm = MAX(hwm, excluded.hwm)",
+            hwm.items(),
+        )
@@ -12,8 +12,11 @@ from splitter_app.config import (
 from splitter_app.config import default_config_path  # your ~/.config/.../token.json
 from splitter_app.config import CREDENTIALS_FILE as _orig_credentials_file
 import splitter_app.config as _config
+from splitter_app.services.google_api import invalidate_services
+from splitter_app.tracing import span, traced
 
 
+@traced("auth.ensure_credentials")
 def ensure_credentials() -> str:
     """
     Make sure we have a valid token.json in the user config dir.
@@ -33,7 +36,8 @@ def ensure_credentials() -> str:
     # 3) If no (valid) creds, run the OAuth flow
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            with span("auth.refresh"):
+                creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(
                 CLIENT_SECRETS_FILE, SCOPES
@@ -48,6 +52,8 @@ def ensure_credentials() -> str:
             f.write(creds.to_json())
         # in case the file already existed, force permissions to 600
         os.chmod(token_path, 0o600)
+        # clients built from the old token (and its identity) are stale now
+        invalidate_services(token_path_str)
 
     # 4) Monkey-patch config.CREDENTIALS_FILE so download/upload use the new token
     _config.CREDENTIALS_FILE = token_path_str
@@ -2,49 +2,453 @@
 """
 Wrapper around Google Drive CSV upload/download using the shared google_api module.
 Provides simple, project-specific functions to sync the transactions CSV.
-Handles existing file permission issues by removing or resetting permissions.
+Handles existing file permission issues by resetting permissions.
+
+The remote md5Checksum/version/modifiedTime seen at the last sync are kept
+in a small JSON sync-state file next to the CSV, so an unchanged Drive file
+is not downloaded again. New bytes go to a temporary file that replaces the
+CSV only once the download has completed.
+
+The same file records the local CSV's size/mtime after each sync. Upload is
+skipped when the CSV still has that stamp, or when its MD5 matches the
+remote md5Checksum (e.g. an add that was deleted again).
+
+sync_csv() is the delta sync: local adds/deletes are journaled by serial
+number (SyncJournal), the remote copy is merged with them three-way, and
+only a merge that changed the remote ledger is uploaded. Serial collisions
+between machines are resolved by renumbering the local row and reported
+as SyncConflicts rather than overwritten.
+
+The Google client stack is imported on the first transfer, so importing
+this module (e.g. for SyncJournal at startup) stays cheap.
 """
+import hashlib
+import json
 import os
-from .google_api import upload_to_drive as _upload_to_drive, \
-                         download_from_drive as _download_from_drive
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 # Import the config module so we can read its values dynamically.  This allows
 # tests and the authentication flow to modify paths at runtime (e.g. when
 # `ensure_credentials` updates `config.CREDENTIALS_FILE`).
 from splitter_app import config
 
-__all__ = ["download_csv", "upload_csv"]
+from splitter_app.models import Transaction
+from splitter_app.persistence import CSVRepository, _split_serial
+from splitter_app.tracing import traced
+
+__all__ = [
+    "download_csv", "upload_csv", "local_changed",
+    "sync_state_path", "read_sync_state",
+    "SyncJournal", "SyncConflict", "SyncResult", "merge_ledgers", "sync_csv",
+]
+
+
+def _google_api():
+    """
+    Import the Drive client wrapper on first use. It pulls in
+    googleapiclient, which the app should not pay for until a sync runs.
+    """
+    from splitter_app.services import google_api
+    return google_api
+
+
+def _download_from_drive(*args, **kwargs) -> dict:
+    return _google_api().download_from_drive(*args, **kwargs)
+
+
+def _upload_to_drive(*args, **kwargs) -> dict:
+    return _google_api().upload_to_drive(*args, **kwargs)
+
+
+def sync_state_path() -> str:
+    """Path of the sync-state file kept next to the local CSV."""
+    return f"{config.LOCAL_CSV_PATH}.sync.json"
+
+
+def read_sync_state() -> Optional[dict]:
+    """Remote metadata recorded at the last sync of DRIVE_FILE_ID, if any."""
+    try:
+        with open(sync_state_path(), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("file_id") != config.DRIVE_FILE_ID:
+        return None
+    return state
+
+
+def _write_sync_state(meta: dict, local_stamp: Optional[list] = None) -> None:
+    """
+    Record remote *meta* plus the stamp of the local CSV those bytes match:
+    *local_stamp* if given (taken before the bytes were read), else the
+    current one.
+    """
+    path = sync_state_path()
+    tmp = f"{path}.tmp"
+    state = {
+        "file_id": config.DRIVE_FILE_ID,
+        **meta,
+        "local_stamp": local_stamp or _file_stamp(config.LOCAL_CSV_PATH),
+    }
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _file_stamp(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
 
-def download_csv():
+def _md5(path: str) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_changed() -> bool:
+    """True if the local CSV differs from the copy last synced with Drive."""
+    state = read_sync_state()
+    if state is None:
+        return True
+    stamp = _file_stamp(config.LOCAL_CSV_PATH)
+    if state.get("local_stamp") == stamp:
+        return False
+    if _md5(config.LOCAL_CSV_PATH) != state.get("md5Checksum"):
+        return True
+    # Same bytes with a new mtime: remember the stamp to skip hashing next time
+    _write_sync_state({k: state.get(k) for k in _google_api().SYNC_FIELDS}, stamp)
+    return False
+
+
+@traced("drive.download_csv")
+def download_csv() -> bool:
     """
     Download the transactions CSV from Google Drive to the local path.
-    If a previous CSV exists, try to remove it first to avoid permission errors.
+    Skips the transfer when the remote revision matches the last sync and a
+    local copy exists. Returns True if new bytes replaced the local CSV.
     """
+    path = config.LOCAL_CSV_PATH
     # Ensure target directory exists
-    os.makedirs(os.path.dirname(config.LOCAL_CSV_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
 
-    # If the file already exists, attempt to remove or reset permissions
-    if os.path.exists(config.LOCAL_CSV_PATH):
+    known = read_sync_state() if os.path.exists(path) else None
+    part = f"{path}.part"
+    if os.path.exists(part):
+        os.remove(part)  # left over from an interrupted download
+    try:
+        meta = _download_from_drive(
+            config.DRIVE_FILE_ID, part, config.CREDENTIALS_FILE, known=known
+        )
+        if not os.path.exists(part):
+            # Unchanged remote: nothing was written
+            return False
+        # Swap the complete download in; reset permissions on the old copy first
         try:
-            os.chmod(config.LOCAL_CSV_PATH, 0o666)
-            os.remove(config.LOCAL_CSV_PATH)
+            if os.path.exists(path):
+                os.chmod(path, 0o666)
+            os.replace(part, path)
         except PermissionError:
             raise PermissionError(
-                f"Cannot overwrite existing CSV at '{config.LOCAL_CSV_PATH}'.\n"
+                f"Cannot overwrite existing CSV at '{path}'.\n"
                 "Please close any programs that may be using it or adjust file permissions."
             )
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
 
-    # Perform download
-    _download_from_drive(
-        config.DRIVE_FILE_ID, config.LOCAL_CSV_PATH, config.CREDENTIALS_FILE
-    )
+    if meta:
+        _write_sync_state(meta)
+    return True
 
 
-def upload_csv():
+@traced("drive.upload_csv")
+def upload_csv(force: bool = False) -> bool:
     """
     Upload the local transactions CSV to Google Drive, replacing the existing file.
+    Unless *force* is set, does nothing when the CSV is unchanged since the
+    last sync. Returns True if the file was uploaded.
     """
     if not os.path.exists(config.LOCAL_CSV_PATH):
         raise FileNotFoundError(f"Local CSV not found: {config.LOCAL_CSV_PATH}")
-    _upload_to_drive(
+    if not force and not local_changed():
+        print("Transactions unchanged since last sync; skipping upload")
+        return False
+    # Stamp the file before it is read: a row saved during the upload then
+    # leaves the stamp changed, and the next check compares checksums
+    stamp = _file_stamp(config.LOCAL_CSV_PATH)
+    meta = _upload_to_drive(
         config.DRIVE_FILE_ID, config.LOCAL_CSV_PATH, config.CREDENTIALS_FILE
     )
+    if meta:
+        _write_sync_state(meta, stamp)
+    return True
+
+
+# --- Delta sync -------------------------------------------------------------
+
+def journal_path() -> str:
+    """Path of the local change journal kept next to the CSV."""
+    return f"{config.LOCAL_CSV_PATH}.journal"
+
+
+class SyncJournal:
+    """
+    Append-only record of serial numbers added or deleted locally since the
+    last sync, one JSON object per line.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path or journal_path()
+
+    def record_add(self, serial_number: str) -> None:
+        self._append({"op": "add", "serial": serial_number})
+
+    def record_delete(self, serial_number: str) -> None:
+        self._append({"op": "delete", "serial": serial_number})
+
+    def _append(self, entry: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def changes(self) -> Tuple[Set[str], Set[str]]:
+        """
+        Net (added, deleted) serials. A serial added and deleted again
+        since the last sync appears in neither set.
+        """
+        added: Set[str] = set()
+        deleted: Set[str] = set()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return added, deleted
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            serial = entry.get("serial")
+            if entry.get("op") == "add":
+                added.add(serial)
+            elif entry.get("op") == "delete":
+                if serial in added:
+                    added.discard(serial)
+                else:
+                    deleted.add(serial)
+        return added, deleted
+
+    def mark(self) -> int:
+        """Position after every change recorded so far, for clear(upto=...)."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def clear(self, upto: Optional[int] = None) -> None:
+        """
+        Forget the recorded changes. With *upto* (from mark()), keep the
+        entries recorded after that mark.
+        """
+        try:
+            if upto is not None:
+                with open(self.path, "rb") as f:
+                    f.seek(upto)
+                    rest = f.read()
+                if rest:
+                    tmp = f"{self.path}.tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(rest)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp, self.path)
+                    return
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class SyncConflict:
+    """A local change that could not be applied to the remote copy as-is."""
+    serial_number: str
+    reason: str
+    renumbered_to: Optional[str] = None
+
+
+@dataclass
+class SyncResult:
+    """What sync_csv() did."""
+    downloaded: bool = False
+    uploaded: bool = False
+    pulled: int = 0        # rows added on Drive since the last sync
+    dropped: int = 0       # local rows deleted on Drive since the last sync
+    conflicts: List[SyncConflict] = field(default_factory=list)
+
+
+def merge_ledgers(
+    local: List[Transaction],
+    remote: List[Transaction],
+    added: Set[str],
+    deleted: Set[str],
+    hwm: Optional[Dict[str, int]] = None,
+    has_base: bool = True,
+) -> Tuple[List[Transaction], List[SyncConflict]]:
+    """
+    Three-way merge by serial number. The common base is implied by the
+    journal: every local row that was not *added* since the last sync, plus
+    the *deleted* serials.
+
+    - Remote rows win for everything the journal does not mention, so rows
+      added or deleted on Drive carry over.
+    - Journaled local adds are appended; journaled deletes are removed.
+    - A local add whose serial is taken remotely by a different row gets the
+      next free serial for its letter (above *hwm*) and is reported.
+    - Without a base (*has_base* False: no earlier sync is recorded) a local
+      row missing from Drive cannot be told apart from one deleted there, so
+      every local row counts as an add and nothing local is dropped.
+    """
+    if not has_base:
+        added = set(added) | {t.serial_number for t in local}
+    remote_by_serial = {t.serial_number: t for t in remote}
+    merged = [t for t in remote if t.serial_number not in deleted]
+    conflicts: List[SyncConflict] = []
+
+    top = dict(hwm or {})
+    for t in list(local) + list(remote):
+        parts = _split_serial(t.serial_number)
+        if parts:
+            top[parts[0]] = max(top.get(parts[0], 0), parts[1])
+
+    for t in local:
+        if t.serial_number not in added:
+            continue
+        theirs = remote_by_serial.get(t.serial_number)
+        if theirs is None:
+            merged.append(t)
+        elif theirs != t:
+            parts = _split_serial(t.serial_number)
+            letter = parts[0] if parts else "Z"
+            top[letter] = top.get(letter, 0) + 1
+            serial = f"{letter}{top[letter]:03d}"
+            merged.append(Transaction(
+                serial_number=serial,
+                description=t.description,
+                paid_by=t.paid_by,
+                date=t.date,
+                group=t.group,
+                category=t.category,
+                split=t.split,
+                amount=t.amount,
+            ))
+            conflicts.append(SyncConflict(
+                t.serial_number,
+                f"also added on Drive with different details; kept both, "
+                f"local entry renumbered to {serial}",
+                renumbered_to=serial,
+            ))
+    return merged, conflicts
+
+
+def _inline(fn: Callable[[], Any]) -> Any:
+    return fn()
+
+
+def _merge_into_local(
+    path: str, remote_path: str, meta: dict, journal: SyncJournal,
+    result: SyncResult, has_base: bool,
+) -> Tuple[bool, int]:
+    """
+    Merge the downloaded copy into the local CSV. Returns whether the merge
+    must be uploaded, and the journal mark the upload will cover.
+    """
+    remote = CSVRepository(remote_path, snapshot_cache=False).load_all()
+
+    def merge(local: List[Transaction], marks: Dict[str, int]) -> List[Transaction]:
+        # Runs under the ledger's write lock, so rows another writer
+        # appended after our last look are merged rather than overwritten
+        added, deleted = journal.changes()
+        merged, result.conflicts = merge_ledgers(
+            local, remote, added, deleted, hwm=marks, has_base=has_base
+        )
+        merged_serials = {t.serial_number for t in merged}
+        local_serials = {t.serial_number for t in local}
+        result.pulled = len(merged_serials - local_serials)
+        result.dropped = len(local_serials - merged_serials)
+        return merged
+
+    merged = CSVRepository(path).rewrite(merge)
+    if merged == remote and (not meta or _md5(path) == meta.get("md5Checksum")):
+        # The ledger now holds exactly Drive's bytes
+        if meta:
+            _write_sync_state(meta)
+        return False, journal.mark()
+    # Renumbered rows are local adds until the upload lands
+    for c in result.conflicts:
+        if c.renumbered_to:
+            journal.record_add(c.renumbered_to)
+    return True, journal.mark()
+
+
+@traced("drive.sync")
+def sync_csv(
+    journal: Optional[SyncJournal] = None,
+    exclusive: Optional[Callable[[Callable[[], Any]], Any]] = None,
+) -> SyncResult:
+    """
+    Merge the local CSV with the Drive copy and upload the result if it
+    differs from what Drive holds. Returns a SyncResult; conflicts are
+    listed there rather than raised.
+
+    :param exclusive: Runs the steps that read or replace the local CSV and
+                      journal, e.g. on the app's writer thread so a queued
+                      save cannot land between the merge and the swap. The
+                      transfers run on the calling thread. Default: inline.
+    """
+    journal = journal or SyncJournal()
+    exclusive = exclusive or _inline
+    path = config.LOCAL_CSV_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    result = SyncResult()
+
+    state = read_sync_state() if os.path.exists(path) else None
+    remote_path = f"{path}.remote"
+    if os.path.exists(remote_path):
+        os.remove(remote_path)
+    try:
+        meta = _download_from_drive(
+            config.DRIVE_FILE_ID, remote_path, config.CREDENTIALS_FILE, known=state
+        )
+        result.downloaded = os.path.exists(remote_path)
+        if not result.downloaded:
+            # Drive unchanged since the last sync, so the local file is
+            # already the merge; only local edits may need uploading
+            mark = exclusive(journal.mark)
+            result.uploaded = upload_csv()
+        else:
+            upload, mark = exclusive(
+                lambda: _merge_into_local(
+                    path, remote_path, meta, journal, result, has_base=state is not None
+                )
+            )
+            if upload:
+                result.uploaded = upload_csv(force=True)
+    finally:
+        # The remote copy, and the lock file reading it creates on Windows
+        for leftover in (remote_path, f"{remote_path}.lock"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    # Changes journaled while the upload ran are left for the next sync
+    exclusive(lambda: journal.clear(upto=mark))
+    for c in result.conflicts:
+        print(f"Sync conflict on {c.serial_number}: {c.reason}")
+    return result
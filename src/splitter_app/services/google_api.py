@@ -4,47 +4,161 @@ from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 import io
+import os
+import re
+import threading
+import time
 
-def _service(credentials_path):
-    creds = Credentials.from_authorized_user_file(credentials_path)
-    return build('drive', 'v3', credentials=creds)
+from splitter_app.tracing import traced
 
-def _whoami(service):
+# Remote fields recorded after each sync; if all match, the bytes match too
+SYNC_FIELDS = ("md5Checksum", "version", "modifiedTime")
+
+# Uploads above this size use the resumable protocol, in chunks of
+# UPLOAD_CHUNK_SIZE (a multiple of 256 KiB as the API requires)
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Uploads reuse an access check younger than this many seconds
+PREFLIGHT_MAX_AGE = 300.0
+
+# Process-wide caches keyed by token path: built clients per (path, api,
+# version), the authed user's identity, and per-file preflight results.
+# Dropped by invalidate_services() whenever auth.ensure_credentials writes
+# a new token.
+_SERVICES = {}
+_IDENTITIES = {}
+_PREFLIGHTS = {}
+_CACHE_LOCK = threading.Lock()
+
+def _service(credentials_path, api='drive', version='v3'):
+    key = (credentials_path, api, version)
+    with _CACHE_LOCK:
+        service = _SERVICES.get(key)
+        if service is None:
+            creds = Credentials.from_authorized_user_file(credentials_path)
+            # Discovery document from the installed package: no HTTP fetch
+            service = build(api, version, credentials=creds,
+                            static_discovery=True, cache_discovery=False)
+            _SERVICES[key] = service
+    return service
+
+def invalidate_services(credentials_path=None):
+    """Forget cached clients/identities for *credentials_path* (or all)."""
+    with _CACHE_LOCK:
+        if credentials_path is None:
+            _SERVICES.clear()
+            _IDENTITIES.clear()
+            _PREFLIGHTS.clear()
+            return
+        for cache in (_SERVICES, _PREFLIGHTS):
+            for key in [k for k in cache if k[0] == credentials_path]:
+                del cache[key]
+        _IDENTITIES.pop(credentials_path, None)
+
+def _about_request(service):
     # Works with Drive scope: returns the authed user email/display name
-    about = service.about().get(fields='user(displayName,emailAddress)').execute()
-    return about['user']['emailAddress'], about['user']['displayName']
+    return service.about().get(fields='user(displayName,emailAddress)')
 
-def _assert_file_accessible(service, file_id: str):
+def _file_request(service, file_id: str):
     # Preflight: verify the file exists *and* the authed user can see it.
     return service.files().get(
         fileId=file_id,
         supportsAllDrives=True,
-        fields='id,name,driveId,owners(emailAddress,displayName),permissions'
-    ).execute()
+        fields='id,name,driveId,owners(emailAddress,displayName),permissions,'
+               + ','.join(SYNC_FIELDS)
+    )
+
+def _preflight(service, credentials_path, file_id, max_age=0.0):
+    """
+    Look up the authed user and *file_id*'s metadata in one round trip.
+
+    A check younger than *max_age* seconds is reused without any request.
+    Otherwise only files().get() is sent if the identity is already known,
+    or both lookups go out as a single batch request.
+    Returns (email, metadata, error); *error* is the HttpError of the
+    metadata lookup, if any.
+    """
+    key = (credentials_path, file_id)
+    identity = _IDENTITIES.get(credentials_path)
+    cached = _PREFLIGHTS.get(key)
+    if identity and cached and time.monotonic() - cached[0] < max_age:
+        return identity[0], cached[1], None
+
+    meta = error = None
+    if identity is None:
+        results = {}
+
+        def collect(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        batch = service.new_batch_http_request(callback=collect)
+        batch.add(_about_request(service), request_id='about')
+        batch.add(_file_request(service, file_id), request_id='file')
+        batch.execute()
+        about, about_error = results['about']
+        if about_error is not None:
+            raise about_error
+        identity = (about['user']['emailAddress'], about['user']['displayName'])
+        _IDENTITIES[credentials_path] = identity
+        meta, error = results['file']
+    else:
+        try:
+            meta = _file_request(service, file_id).execute()
+        except HttpError as e:
+            error = e
+
+    if error is None:
+        _PREFLIGHTS[key] = (time.monotonic(), meta)
+    return identity[0], meta, error
+
+def sync_metadata(meta):
+    """The SYNC_FIELDS subset of a files().get() response."""
+    return {k: meta.get(k) for k in SYNC_FIELDS}
+
+def same_revision(meta, known):
+    """True if *meta* describes the same remote revision as *known*."""
+    if not known or not meta.get('version'):
+        return False
+    return all(meta.get(k) == known.get(k) for k in SYNC_FIELDS)
 
+@traced("drive.upload")
 def upload_to_drive(drive_file_id, local_file_path, credentials_path):
     service = _service(credentials_path)
-    email, _ = _whoami(service)
-
-    try:
-        _assert_file_accessible(service, drive_file_id)
-    except HttpError as e:
+    email, _, e = _preflight(
+        service, credentials_path, drive_file_id, max_age=PREFLIGHT_MAX_AGE
+    )
+    if e is not None:
         if e.resp.status == 404:
             raise FileNotFoundError(
                 f"Drive file '{drive_file_id}' not found or not shared with {email}. "
                 "If the file lives in a Shared Drive, ensure `supportsAllDrives=True` "
                 "is used (it is), and that this user has at least Editor access."
             ) from e
-        raise
+        raise e
 
-    media_body = MediaFileUpload(local_file_path, mimetype='text/csv')
+    # Large files go up in resumable chunks so a dropped connection only
+    # costs the current chunk
+    resumable = os.path.getsize(local_file_path) > RESUMABLE_THRESHOLD
+    media_body = MediaFileUpload(
+        local_file_path, mimetype='text/csv',
+        resumable=resumable, chunksize=UPLOAD_CHUNK_SIZE if resumable else -1,
+    )
     try:
-        updated = service.files().update(
+        request = service.files().update(
             fileId=drive_file_id,
             media_body=media_body,
-            fields='id',
+            fields='id,' + ','.join(SYNC_FIELDS),
             supportsAllDrives=True
-        ).execute()
+        )
+        if resumable:
+            updated = None
+            while updated is None:
+                status, updated = request.next_chunk()
+                if status:
+                    print(f"Upload progress: {int(status.progress() * 100)}%")
+        else:
+            updated = request.execute()
     except HttpError as e:
         if e.resp.status in (403, 404):
             raise PermissionError(
@@ -53,20 +167,28 @@ def upload_to_drive(drive_file_id, local_file_path, credentials_path):
             ) from e
         raise
     print(f"Updated file ID: {updated.get('id')}")
+    return sync_metadata(updated)
 
-def download_from_drive(file_id, output_path, credentials_path):
+@traced("drive.download")
+def download_from_drive(file_id, output_path, credentials_path, known=None):
+    """
+    Download *file_id* to *output_path* unless its metadata matches *known*
+    (the sync_metadata of the last download). Returns the remote
+    sync_metadata either way; *output_path* is untouched when skipped.
+    """
     service = _service(credentials_path)
-    email, _ = _whoami(service)
-
-    try:
-        meta = _assert_file_accessible(service, file_id)
-        print(f"Downloading '{meta['name']}' (id={meta['id']}) as {email}")
-    except HttpError as e:
+    # Always fresh: the version decides whether to download at all
+    email, meta, e = _preflight(service, credentials_path, file_id)
+    if e is not None:
         if e.resp.status == 404:
             raise FileNotFoundError(
                 f"Drive file '{file_id}' not found or not shared with {email}."
             ) from e
-        raise
+        raise e
+    if same_revision(meta, known):
+        print(f"'{meta['name']}' unchanged (version {meta['version']}); skipping download")
+        return sync_metadata(meta)
+    print(f"Downloading '{meta['name']}' (id={meta['id']}) as {email}")
 
     request = service.files().get_media(fileId=file_id, supportsAllDrives=True)
     with io.FileIO(output_path, 'wb') as fh:
@@ -77,12 +199,12 @@ def download_from_drive(file_id, output_path, credentials_path):
             if status:
                 print(f"Download progress: {int(status.progress() * 100)}%")
     print(f"Downloaded to {output_path}")
+    return sync_metadata(meta)
 
 
 def read_sheet(spreadsheet_id, range_name, credentials_path):
     """Return values from a Google Sheet range."""
-    creds = Credentials.from_authorized_user_file(credentials_path)
-    service = build('sheets', 'v4', credentials=creds)
+    service = _service(credentials_path, 'sheets', 'v4')
     result = (
         service.spreadsheets()
         .values()
@@ -90,3 +212,44 @@ def read_sheet(spreadsheet_id, range_name, credentials_path):
         .execute()
     )
     return result.get("values", [])
+
+
+# A1 ranges that can be paged: "Sheet1!A:H", "A2:H", "'My Sheet'!B10:I500"
+_A1_RANGE_RE = re.compile(
+    r"(?:(?P<sheet>.+)!)?(?P<c1>[A-Za-z]+)(?P<r1>\d*):(?P<c2>[A-Za-z]+)(?P<r2>\d*)"
+)
+
+def offset_range(range_name, offset):
+    """*range_name* starting *offset* rows further down, e.g. A:H, 10 → A11:H."""
+    m = _A1_RANGE_RE.fullmatch(range_name)
+    if m is None:
+        raise ValueError(f"Cannot page through range {range_name!r}")
+    prefix = f"{m['sheet']}!" if m['sheet'] else ""
+    start = int(m['r1'] or 1) + offset
+    return f"{prefix}{m['c1']}{start}:{m['c2']}{m['r2']}"
+
+def read_sheet_pages(spreadsheet_id, range_name, credentials_path, page_rows=5000):
+    """
+    Yield the rows of *range_name* one page (list of rows) at a time,
+    requesting *page_rows* rows per values().get call. The API leaves out
+    blank rows at the end of each window, so a short page does not mean the
+    sheet ended: paging stops at the first empty page, or at the range's own
+    end row.
+    """
+    m = _A1_RANGE_RE.fullmatch(range_name)
+    if m is None:
+        raise ValueError(f"Cannot page through range {range_name!r}")
+    prefix = f"{m['sheet']}!" if m['sheet'] else ""
+    start = int(m['r1'] or 1)
+    last = int(m['r2']) if m['r2'] else None
+    values = _service(credentials_path, 'sheets', 'v4').spreadsheets().values()
+    while last is None or start <= last:
+        end = start + page_rows - 1 if last is None else min(start + page_rows - 1, last)
+        rows = values.get(
+            spreadsheetId=spreadsheet_id,
+            range=f"{prefix}{m['c1']}{start}:{m['c2']}{end}",
+        ).execute().get("values", [])
+        if not rows:
+            return
+        yield rows
+        start = end + 1
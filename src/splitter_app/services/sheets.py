@@ -1,24 +1,136 @@
 # src/splitter_app/services/sheets.py
-"""Utilities for reading transactions from Google Sheets."""
+"""
+Utilities for reading transactions from Google Sheets.
+The sheet is read in pages of PAGE_ROWS rows, so large sheets stream in as
+Transactions instead of arriving as one huge response.
+
+SheetPoller re-reads an append-mostly sheet incrementally: it remembers how
+many rows it has seen and a checksum of the last TAIL_WINDOW of them, and
+falls back to a full read only when that window no longer matches.
+"""
+import hashlib
+import json
+from typing import Iterator, List, Optional, Tuple
+
 from splitter_app import config
 from splitter_app.models import Transaction
-from .google_api import read_sheet as _read_sheet
+from .google_api import read_sheet_pages as _read_sheet_pages, offset_range
 
-__all__ = ["load_transactions"]
+__all__ = [
+    "load_transactions", "iter_transactions", "iter_transaction_pages",
+    "import_transactions", "SheetPoller", "PAGE_ROWS", "TAIL_WINDOW",
+]
 
-def load_transactions():
-    """Fetch transactions from the configured Google Sheet."""
-    values = _read_sheet(
+# Rows requested per Sheets API call
+PAGE_ROWS = 5000
+
+# Rows above the watermark re-read on each poll to catch edits mid-sheet
+TAIL_WINDOW = 20
+
+
+def _parse_row(row: List[str]) -> Optional[Transaction]:
+    """Transaction for a sheet row; None for short, header or malformed rows."""
+    if len(row) < 8:
+        return None
+    try:
+        return Transaction.from_csv_row(row)
+    except (ValueError, IndexError):
+        return None
+
+
+def iter_transaction_pages(page_rows: int = PAGE_ROWS) -> Iterator[List[Transaction]]:
+    """Yield the configured sheet's transactions one page at a time."""
+    pages = _read_sheet_pages(
         config.SHEETS_SPREADSHEET_ID,
         config.SHEETS_RANGE,
         config.CREDENTIALS_FILE,
+        page_rows=page_rows,
     )
-    transactions: list[Transaction] = []
-    for row in values:
-        if len(row) < 8:
-            continue
-        try:
-            transactions.append(Transaction.from_csv_row(row))
-        except (ValueError, IndexError):
-            continue
-    return transactions
+    for rows in pages:
+        page = [t for t in map(_parse_row, rows) if t is not None]
+        if page:
+            yield page
+
+
+def iter_transactions(page_rows: int = PAGE_ROWS) -> Iterator[Transaction]:
+    """Yield the configured sheet's transactions as their pages arrive."""
+    for page in iter_transaction_pages(page_rows):
+        yield from page
+
+
+def load_transactions() -> List[Transaction]:
+    """Fetch transactions from the configured Google Sheet."""
+    return list(iter_transactions())
+
+
+def import_transactions(repo, page_rows: int = PAGE_ROWS) -> int:
+    """
+    Append the sheet's transactions to *repo* with one write per page.
+    Returns the number of transactions imported.
+    """
+    count = 0
+    for page in iter_transaction_pages(page_rows):
+        repo.save_many(page)
+        count += len(page)
+    return count
+
+
+def _checksum(rows: List[List[str]]) -> str:
+    return hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+class SheetPoller:
+    """
+    Incremental reader for the configured sheet.
+
+    The first poll reads every row. Later polls fetch from TAIL_WINDOW rows
+    above the last row seen (the tail window plus A{n+1}:H). If the window's
+    checksum still matches, only the new rows are returned. Otherwise the
+    sheet was edited or trimmed above the watermark and is read again in
+    full.
+    """
+
+    def __init__(self, page_rows: int = PAGE_ROWS, tail_window: int = TAIL_WINDOW):
+        self.page_rows = page_rows
+        self.tail_window = tail_window
+        self.last_row = 0          # raw rows seen, counted from the range start
+        self._tail_sum: Optional[str] = None
+
+    def poll(self) -> Tuple[List[Transaction], bool]:
+        """
+        Return (transactions, reset). With reset=False the transactions are
+        new rows to append; with reset=True they replace everything read so
+        far.
+        """
+        if self._tail_sum is None:
+            return self._read_all(), True
+        keep = min(self.tail_window, self.last_row)
+        rows = self._rows_from(self.last_row - keep)
+        if len(rows) < keep or _checksum(rows[:keep]) != self._tail_sum:
+            return self._read_all(), True
+        new = rows[keep:]
+        if new:
+            self._remember(rows, self.last_row - keep)
+        return [t for t in map(_parse_row, new) if t is not None], False
+
+    def _read_all(self) -> List[Transaction]:
+        rows = self._rows_from(0)
+        self._remember(rows, 0)
+        return [t for t in map(_parse_row, rows) if t is not None]
+
+    def _rows_from(self, offset: int) -> List[List[str]]:
+        """Raw rows from *offset* rows below the configured range start."""
+        rows: List[List[str]] = []
+        for page in _read_sheet_pages(
+            config.SHEETS_SPREADSHEET_ID,
+            offset_range(config.SHEETS_RANGE, offset),
+            config.CREDENTIALS_FILE,
+            page_rows=self.page_rows,
+        ):
+            rows.extend(page)
+        return rows
+
+    def _remember(self, rows: List[List[str]], offset: int) -> None:
+        """Move the watermark to the end of *rows* (read from *offset*)."""
+        self.last_row = offset + len(rows)
+        self._tail_sum = _checksum(rows[-self.tail_window:] if rows else [])
@@ -0,0 +1,46 @@
+# src/splitter_app/startup.py
+"""
+Startup timing for the Contribution Splitter app.
+Records milestones (first paint, local ledger loaded, Drive sync finished)
+relative to process start so slow cold starts show up in the console.
+"""
+import time
+from typing import Dict, Optional
+
+from PySide6.QtCore import QEvent, QObject
+
+
+class StartupMetrics(QObject):
+    """
+    Collects named startup milestones in milliseconds since `start`.
+    Only the first occurrence of each milestone is kept.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        super().__init__()
+        self.start = time.perf_counter() if start is None else start
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        """Record *name* now (if not already recorded); returns its time in ms."""
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self.start) * 1000.0
+        return self.marks[name]
+
+    def watch_first_paint(self, widget) -> None:
+        """Mark "first_paint" when *widget* is first painted."""
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Type.Paint:
+            self.mark("first_paint")
+            obj.removeEventFilter(self)
+        return False
+
+    def summary(self) -> str:
+        """One-line report, e.g. "Startup: first_paint 84.2 ms | ..."."""
+        parts = [f"{name} {ms:.1f} ms" for name, ms in self.marks.items()]
+        return "Startup: " + (" | ".join(parts) if parts else "no milestones")
+
+    def report(self) -> None:
+        print(self.summary())
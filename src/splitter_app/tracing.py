@@ -0,0 +1,225 @@
+# src/splitter_app/tracing.py
+"""
+Lightweight span timing for the Contribution Splitter app.
+
+Set the SPLITTER_TRACE environment variable (config.TRACE_PATH) to a file
+path to record how long repository I/O, share allocation, table population,
+auth refresh and Drive transfers take. On exit the spans are written there
+as a Chrome trace (open in chrome://tracing or ui.perfetto.dev) together
+with per-operation latency histograms, and a summary is printed.
+
+When tracing is off, `span()` returns a shared no-op context manager and
+`traced` functions cost one extra call and a global lookup.
+"""
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from splitter_app import config
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+HISTOGRAM_BOUNDS_MS = [
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+]
+
+
+class _NullSpan:
+    """Stand-in returned by span() while tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed operation; use as a context manager."""
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+    def set(self, **args) -> None:
+        """Attach result details (row counts, bytes, ...) to the span."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects finished spans from any thread."""
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: Where dump() writes the Chrome trace JSON.
+        """
+        self.path = path
+        self.origin = time.perf_counter_ns()
+        # (name, start_ns, end_ns, thread id, args) in completion order
+        self.events: List[tuple] = []
+        self.thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: int, end: int, args: dict) -> None:
+        thread = threading.current_thread()
+        with self._lock:
+            self.events.append((name, start, end, thread.ident, args))
+            self.thread_names.setdefault(thread.ident, thread.name)
+
+    def durations_ms(self) -> Dict[str, List[float]]:
+        """Span durations per operation name, sorted ascending."""
+        per_op: Dict[str, List[float]] = {}
+        for name, start, end, _, _ in self.events:
+            per_op.setdefault(name, []).append((end - start) / 1e6)
+        for values in per_op.values():
+            values.sort()
+        return per_op
+
+    def histograms(self) -> Dict[str, dict]:
+        """Count/total/percentiles plus bucket counts per operation."""
+        result = {}
+        for name, values in self.durations_ms().items():
+            buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+            for ms in values:
+                buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, ms)] += 1
+            result[name] = {
+                "count": len(values),
+                "total_ms": sum(values),
+                "p50_ms": _percentile(values, 0.50),
+                "p95_ms": _percentile(values, 0.95),
+                "max_ms": values[-1],
+                "bounds_ms": HISTOGRAM_BOUNDS_MS,
+                "buckets": buckets,
+            }
+        return result
+
+    def chrome_trace(self) -> dict:
+        """The spans as Chrome trace-event JSON ("X" complete events, µs)."""
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+             "args": {"name": tname}}
+            for tid, tname in self.thread_names.items()
+        ]
+        for name, start, end, tid, args in self.events:
+            events.append({
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - self.origin) / 1000.0,
+                "dur": (end - start) / 1000.0,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "histograms": self.histograms(),
+        }
+
+    def summary(self) -> str:
+        """Plain-text table of the histograms."""
+        lines = [f"{'operation':<28} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} "
+                 f"{'max ms':>9} {'total ms':>10}"]
+        for name, h in sorted(self.histograms().items()):
+            lines.append(
+                f"{name:<28} {h['count']:>6} {h['p50_ms']:9.2f} {h['p95_ms']:9.2f} "
+                f"{h['max_ms']:9.2f} {h['total_ms']:10.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self) -> None:
+        """Write the Chrome trace to `path` and print the summary."""
+        with self._lock:
+            trace = self.chrome_trace()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        print(self.summary())
+        print(f"Trace written to {self.path}")
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+_tracer: Optional[Tracer] = None
+_exit_hook_installed = False
+
+
+def enable(path: str) -> Tracer:
+    """Start recording spans; they are dumped to *path* at interpreter exit."""
+    global _tracer, _exit_hook_installed
+    _tracer = Tracer(path)
+    if not _exit_hook_installed:
+        atexit.register(_dump_at_exit)
+        _exit_hook_installed = True
+    return _tracer
+
+
+def disable() -> None:
+    """Stop recording and drop the spans collected so far."""
+    global _tracer
+    _tracer = None
+
+
+def tracer() -> Optional[Tracer]:
+    """The active tracer, or None when tracing is off."""
+    return _tracer
+
+
+def _dump_at_exit() -> None:
+    if _tracer is not None and _tracer.events:
+        _tracer.dump()
+
+
+def span(name: str, **args):
+    """
+    Time the enclosed block as *name*, e.g.
+    `with span("drive.download", file_id=fid) as s: ...; s.set(bytes=n)`.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, args)
+
+
+def traced(name: str) -> Callable:
+    """Decorator timing every call of the function as span *name*."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with Span(_tracer, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if config.TRACE_PATH:
+    enable(config.TRACE_PATH)
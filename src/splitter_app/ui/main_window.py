@@ -1,13 +1,19 @@
 # src/splitter_app/ui/main_window.py
 
+from typing import Optional
+
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QLabel, QLineEdit, QComboBox,
-    QPushButton, QTableWidget, QTableWidgetItem, QGridLayout,
+    QPushButton, QTableWidget, QTableView, QGridLayout,
     QDateEdit, QVBoxLayout, QMessageBox, QHeaderView, QDoubleSpinBox, QHBoxLayout,
-    QFrame
+    QFrame, QAbstractItemView
 )
 from PySide6.QtCore import Qt, QDate, Signal
 
+from splitter_app.ui.transaction_model import (
+    SERIAL_COLUMN, TransactionTableModel,
+)
+
 class MainWindow(QMainWindow):
     """
     The pure-UI layer for the Contribution Splitter.
@@ -126,17 +132,20 @@ class MainWindow(QMainWindow):
         main_layout.addLayout(form_layout)
 
         # --- TRANSACTIONS TABLE ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "serial_number", "Description", "Paid By", "Group",
-            "Date", "Amount", "Category", "Split"
-        ])
-        self.table.setColumnHidden(0, True)  # hide serial internally
+        # View → model over the controller's ledger (the model sorts itself)
+        self.transaction_model = TransactionTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.transaction_model)
+        self.table.setColumnHidden(SERIAL_COLUMN, True)  # hide serial internally
         hdr = self.table.horizontalHeader()
-        for col in range(self.table.columnCount()):
-            hdr.setSectionResizeMode(col, QHeaderView.ResizeMode.Stretch)
+        hdr.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.table.setAlternatingRowColors(True)
+        # Start in ledger order; a header click sorts, a third click unsorts
+        hdr.setSortIndicatorClearable(True)
+        hdr.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
         self.table.setSortingEnabled(True)
         main_layout.addWidget(self.table)
 
@@ -188,26 +197,43 @@ class MainWindow(QMainWindow):
         }
         self.transaction_added.emit(data)
 
+    def set_transaction_model(self, model: TransactionTableModel) -> None:
+        """Show *model* (owned by the controller) in the transactions table."""
+        self.transaction_model = model
+        self.table.setModel(model)
+        hdr = self.table.horizontalHeader()
+        if hdr.sortIndicatorSection() >= 0:
+            model.sort(hdr.sortIndicatorSection(), hdr.sortIndicatorOrder())
+
+    def selected_serial(self) -> Optional[str]:
+        """Return the serial_number of the selected row, or None."""
+        rows = self.table.selectionModel().selectedRows(SERIAL_COLUMN)
+        return rows[0].data() if rows else None
+
     def _on_delete_clicked(self):
         """
         Emits transaction_deleted with the serial_number of the selected row.
         """
-        if self.table.selectedItems():
-            sn = self.table.item(self.table.currentRow(), 0).text()
+        sn = self.selected_serial()
+        if sn is not None:
             self.transaction_deleted.emit(sn)
         else:
             QMessageBox.warning(self, "No Entry Selected",
                                 "Please select an entry to delete.",
                                 QMessageBox.StandardButton.Ok, QMessageBox.StandardButton.Cancel)
-        
+
+    def show_error(self, title: str, message: str) -> None:
+        """Report a failure from background work (load/save/delete)."""
+        QMessageBox.warning(self, title, message)
+
     def _on_split_changed(self, payer_frac: float):
         """Update the ower label whenever payer changes."""
         ower_frac = round(1.0 - payer_frac, 1)
         self.ower_label.setText(f"Ower: {ower_frac:.1f}")
 
-    # (Optionally, you can add methods like `set_transactions(...)`,
-    #  `update_summary_text(...)`, `populate_group_summary(...)` here
-    #  to let your controller push data back into the UI.)
+    # (Optionally, you can add methods like `update_summary_text(...)`,
+    #  `populate_group_summary(...)` here to let your controller push data
+    #  back into the UI.)
 
 if __name__ == "__main__":
     import sys
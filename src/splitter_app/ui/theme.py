@@ -54,7 +54,7 @@ def apply_light_minimal_theme(app: QApplication, icon_name: str = "wallet-icon.i
 
     app.setStyleSheet(
         """
-        QTableWidget {
+        QTableWidget, QTableView {
             gridline-color: #d0d0d0;
             alternate-background-color: #fafafa;
         }
@@ -0,0 +1,199 @@
+# src/splitter_app/ui/transaction_model.py
+"""
+Qt item model exposing a TransactionTable to a QTableView.
+Cells are formatted on demand in data(), so refreshing the view never
+allocates per-cell items, and single adds/deletes emit row signals instead
+of resetting the whole view.
+
+Sorting is done here rather than in a QSortFilterProxyModel: the proxy
+compares rows through Python data() calls on every reset and insert, while
+sort() argsorts the table's column arrays and keeps a row permutation.
+"""
+from typing import List, Optional
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from splitter_app.models import Transaction, TransactionTable, format_cents
+from splitter_app.tracing import traced
+
+# Role returning raw values (cents, floats, ISO dates) for numeric-aware sorting
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+HEADERS = [
+    "serial_number", "Description", "Paid By", "Group",
+    "Date", "Amount", "Category", "Split",
+]
+SERIAL_COLUMN = 0
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """
+    Read-only table model backed directly by a TransactionTable.
+    Mutate the ledger through `append` / `remove_serial` so attached views
+    receive row insert/remove notifications.
+    """
+
+    def __init__(self, table: Optional[TransactionTable] = None, parent=None):
+        super().__init__(parent)
+        self._table = table if table is not None else TransactionTable()
+        # View row -> table row while sorted; None shows the ledger order
+        self._order: Optional[np.ndarray] = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    @property
+    def table(self) -> TransactionTable:
+        return self._table
+
+    @traced("view.set_table")
+    def set_table(self, table: TransactionTable) -> None:
+        """Show a different ledger (e.g. after a full reload)."""
+        self.beginResetModel()
+        self._table = table
+        self._order = self._sorted_order()
+        self.endResetModel()
+
+    def append(self, txn: Transaction) -> None:
+        """Append one transaction to the ledger and the view."""
+        self.extend([txn])
+
+    @traced("view.extend")
+    def extend(self, txns: List[Transaction]) -> None:
+        """Append a batch of transactions with a single insert notification."""
+        if not txns:
+            return
+        first = len(self._table)
+        self.beginInsertRows(QModelIndex(), first, first + len(txns) - 1)
+        self._table.extend(txns)
+        if self._order is not None:
+            self._order = np.concatenate(
+                [self._order, np.arange(first, len(self._table), dtype=np.intp)])
+        self.endInsertRows()
+        if self._order is not None:
+            # The new rows went in at the bottom; move them into place
+            self._apply_order(self._sorted_order())
+
+    def remove_serial(self, serial_number: str) -> List[Transaction]:
+        """Remove every row with *serial_number*; returns the removed rows."""
+        hits = self._table.indices_of(serial_number)
+        if len(hits) == 1:
+            row = self._view_row(hits[0])
+            self.beginRemoveRows(QModelIndex(), row, row)
+            removed = self._table.remove_serial(serial_number)
+            self._drop_from_order(hits)
+            self.endRemoveRows()
+        elif hits:
+            # Duplicate serials from old ledgers: rare enough to just reset
+            self.beginResetModel()
+            removed = self._table.remove_serial(serial_number)
+            self._drop_from_order(hits)
+            self.endResetModel()
+        else:
+            removed = []
+        return removed
+
+    # --- Sorting ---------------------------------------------------------------
+    def _table_row(self, row: int) -> int:
+        return row if self._order is None else int(self._order[row])
+
+    def _view_row(self, table_row: int) -> int:
+        if self._order is None:
+            return table_row
+        return int(np.flatnonzero(self._order == table_row)[0])
+
+    def _drop_from_order(self, hits: List[int]) -> None:
+        """Remove table rows *hits* from the permutation and close the gaps."""
+        if self._order is None:
+            return
+        order = self._order[~np.isin(self._order, hits)]
+        self._order = order - np.searchsorted(np.sort(hits), order)
+
+    def _sort_key(self, column: int) -> np.ndarray:
+        """Integer or float key per table row whose order matches *column*'s."""
+        t = self._table
+        if column == 0:
+            return np.unique(np.array(t.serial_numbers, dtype=str), return_inverse=True)[1]
+        if column == 1:
+            return np.unique(np.array(t.descriptions, dtype=str), return_inverse=True)[1]
+        if column == 4:
+            return t.date_codes
+        if column == 5:
+            return t.amount_cents
+        if column == 7:
+            return t.split
+        pool, codes = {
+            2: (t.paid_by_pool, t.paid_by_codes),
+            3: (t.group_pool, t.group_codes),
+            6: (t.category_pool, t.category_codes),
+        }[column]
+        # Rank each interned string alphabetically, then look the codes up
+        rank = np.empty(len(pool.values), dtype=np.intp)
+        rank[np.argsort(np.array(pool.values, dtype=str), kind="stable")] = np.arange(len(pool.values))
+        return rank[codes]
+
+    def _sorted_order(self) -> Optional[np.ndarray]:
+        if self._sort_column < 0:
+            return None
+        key = self._sort_key(self._sort_column)
+        if self._sort_order == Qt.SortOrder.DescendingOrder:
+            key = -key
+        return np.argsort(key, kind="stable")
+
+    def _apply_order(self, order: Optional[np.ndarray]) -> None:
+        """Switch to *order*, keeping selections on the same transactions."""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        if persistent:
+            n = len(self._table)
+            new_row = np.arange(n)
+            if order is not None:
+                new_row[order] = np.arange(n)
+            self.changePersistentIndexList(persistent, [
+                self.index(int(new_row[self._table_row(i.row())]), i.column())
+                for i in persistent
+            ])
+        self._order = order
+        self.layoutChanged.emit()
+
+    @traced("view.sort")
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder) -> None:
+        """Sort the view by *column*; -1 restores the ledger order."""
+        self._sort_column = column
+        self._sort_order = order
+        self._apply_order(self._sorted_order())
+
+    # --- QAbstractTableModel interface -------------------------------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._table)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, SORT_ROLE):
+            return None
+        t = self._table.row(self._table_row(index.row()))
+        col = index.column()
+        if col == 0:
+            return t.serial_number
+        if col == 1:
+            return t.description
+        if col == 2:
+            return t.paid_by
+        if col == 3:
+            return t.group
+        if col == 4:
+            return t.date
+        if col == 5:
+            return t.amount_cents if role == SORT_ROLE else format_cents(t.amount_cents)
+        if col == 6:
+            return t.category
+        if col == 7:
+            return t.split if role == SORT_ROLE else f"{t.split:.1f}"
+        return None
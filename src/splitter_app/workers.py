@@ -0,0 +1,190 @@
+# src/splitter_app/workers.py
+"""
+Task runners used by the controller to keep disk I/O and aggregation off
+the Qt GUI thread.
+
+Both runners share one interface:
+
+    runner.submit(fn, on_done=None, on_partial=None, on_error=None)
+
+`fn` is called with a single `report` callable it may use to stream partial
+results. The callbacks always run on the thread that owns the runner (the
+GUI thread for BackgroundRunner), so they may touch widgets and models.
+
+`runner.call(fn)` runs a plain `fn()` in the runner's queue and blocks the
+calling (non-GUI) thread until it returns, so another thread can slip a step
+in between the writer's queued saves.
+"""
+import threading
+import time
+from typing import Any, Callable, List, Optional, Set
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+def _ignore(_value: Any) -> None:
+    pass
+
+
+class InlineRunner:
+    """
+    Runs each task synchronously on the calling thread.
+    Used by tests and headless callers where there is no event loop.
+    """
+
+    def submit(
+        self,
+        fn: Callable[[Callable[[Any], None]], Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_partial: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        try:
+            result = fn(on_partial or _ignore)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        if on_done is not None:
+            on_done(result)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        return fn()
+
+    def busy(self) -> bool:
+        return False
+
+    def wait(self, msecs: int = -1) -> bool:
+        return True
+
+
+class WorkerSignals(QObject):
+    """Signals a Task uses to hand results back to the GUI thread."""
+    partial = Signal(object)
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class Task(QRunnable):
+    """QRunnable that calls `fn(report)` and emits its outcome."""
+
+    def __init__(self, fn: Callable[[Callable[[Any], None]], Any]):
+        super().__init__()
+        self.fn = fn
+        # Created on the submitting thread, so emits from the worker are
+        # queued back to it
+        self.signals = WorkerSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.fn(self.signals.partial.emit)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class BackgroundRunner:
+    """
+    Runs tasks on a private QThreadPool.
+
+    The pool has a single thread, so tasks execute one at a time in
+    submission order: repositories are not thread-safe, and an add followed
+    by a delete must reach the disk in that order.
+    """
+
+    def __init__(self, pool: Optional[QThreadPool] = None):
+        if pool is None:
+            pool = QThreadPool()
+            pool.setMaxThreadCount(1)
+        self.pool = pool
+        # Keep tasks (and their signal objects) alive until delivered
+        self._pending: Set[Task] = set()
+
+    def submit(
+        self,
+        fn: Callable[[Callable[[Any], None]], Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_partial: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        task = Task(fn)
+        task.setAutoDelete(False)
+        if on_partial is not None:
+            task.signals.partial.connect(on_partial)
+
+        def finished(result, task=task):
+            self._pending.discard(task)
+            if on_done is not None:
+                on_done(result)
+
+        def failed(exc, task=task):
+            self._pending.discard(task)
+            if on_error is not None:
+                on_error(exc)
+
+        task.signals.finished.connect(finished)
+        task.signals.failed.connect(failed)
+        self._pending.add(task)
+        self._start(task)
+
+    def _start(self, task: Task) -> None:
+        self.pool.start(task)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run `fn()` after the tasks already queued and return its result (or
+        raise its exception) on the calling thread. Must not be called from
+        the runner's own thread.
+        """
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = fn()
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        # No signals: the caller is not the GUI thread and has no event loop
+        self._start(QRunnable.create(run))
+        done.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def busy(self) -> bool:
+        """True while any submitted task has not delivered its result yet."""
+        return bool(self._pending)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Block until the pool is idle (results are delivered by the event loop)."""
+        return self.pool.waitForDone(msecs)
+
+
+class ThreadRunner(BackgroundRunner):
+    """
+    Runs each task on its own daemon thread, for slow network work (token
+    refresh, an interactive OAuth flow, Drive transfers) that must neither
+    queue behind nor hold up the single-threaded writer. A task still stuck
+    at exit does not keep the process alive.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._threads: List[threading.Thread] = []
+
+    def _start(self, task: QRunnable) -> None:
+        thread = threading.Thread(target=task.run, name="splitter-sync", daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Block until every task thread has finished, or *msecs* elapse."""
+        deadline = None if msecs < 0 else time.monotonic() + msecs / 1000
+        for thread in list(self._threads):
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(t.is_alive() for t in self._threads)
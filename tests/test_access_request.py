@@ -1,5 +1,7 @@
 import pytest
 
+from splitter_app.workers import InlineRunner
+
 
 def test_request_access_link_opened(monkeypatch):
     import splitter_app.main as main_module
@@ -12,35 +14,50 @@ def test_request_access_link_opened(monkeypatch):
         def exec(self):
             return 0
 
+        def exit(self, code=0):
+            pass
+
     monkeypatch.setattr(main_module, "QApplication", lambda *a, **k: DummyApp())
-    monkeypatch.setattr(main_module, "apply_dark_fusion", lambda app: None)
+    monkeypatch.setattr(main_module, "apply_light_minimal_theme", lambda app: None)
 
     # Simulate credential and download behavior
-    monkeypatch.setattr(main_module, "ensure_credentials", lambda: "token")
+    import splitter_app.services.auth as auth_module
+    monkeypatch.setattr(auth_module, "ensure_credentials", lambda: "token")
 
-    def fake_download():
+    def fake_sync(journal=None, exclusive=None):
         raise FileNotFoundError("not shared")
 
-    monkeypatch.setattr(main_module, "download_csv", fake_download)
+    monkeypatch.setattr(main_module, "sync_csv", fake_sync)
 
     # Avoid running real UI components
     class DummyWin:
         def show(self):
             pass
 
+        def installEventFilter(self, obj):
+            pass
+
     monkeypatch.setattr(main_module, "MainWindow", lambda *a, **k: DummyWin())
 
+    # Run the background sync inline so its error handler fires at once
     class DummyController:
-        def __init__(self, *a, **k):
-            pass
+        def __init__(self, *a, runner=None, sync_runner=None, **k):
+            self.runner = runner
+            self.sync_runner = sync_runner
 
-        def initialize(self):
+        def initialize(self, on_loaded=None):
             pass
 
+        def sync(self, fetch, on_done=None, on_error=None):
+            self.sync_runner.submit(lambda report: fetch(),
+                                    on_done=on_done, on_error=on_error)
+
+    monkeypatch.setattr(main_module, "BackgroundRunner", InlineRunner)
+    monkeypatch.setattr(main_module, "ThreadRunner", InlineRunner)
+
     monkeypatch.setattr(main_module, "SplitterController", DummyController)
 
-    # Skip uploads and file existence checks
-    monkeypatch.setattr(main_module, "upload_csv", lambda: None)
+    # Skip the exit sync via file existence checks
     monkeypatch.setattr(main_module.os.path, "exists", lambda p: False)
 
     # Capture URL opening
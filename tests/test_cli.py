@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from splitter_app import cli, config
+from splitter_app.models import Transaction
+from splitter_app.persistence import CSVRepository
+from splitter_app.services.drive import SyncJournal
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(config, "LOCAL_CSV_PATH", str(path))
+    CSVRepository(str(path)).save_many([
+        Transaction("A001", "Dinner", "Adrian", "2024-03-01", "trip", "Food & Drinks", 0.5, 40.0),
+        Transaction("B001", "Train", "Vic", "2024-03-02", "trip", "Travel", 0.5, 20.0),
+        Transaction("C001", "Milk", "Vic", "2025-01-05", "general", "Groceries", 1.0, 5.0),
+    ])
+    return path
+
+
+def test_balance_and_groups(ledger, capsys):
+    assert cli.main(["balance"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "Total: $65.00", "Adrian: $10.00", "Vic: -$10.00",
+    ]
+
+    assert cli.main(["groups", "--json"]) == 0
+    out = json.loads(capsys.readouterr().out)
+    assert out["groups"]["trip"] == {"Adrian": "10.00", "Vic": "-10.00"}
+    assert out["groups"]["general"] == {"Adrian": "0.00", "Vic": "0.00"}
+    assert out["total"] == {"Adrian": "10.00", "Vic": "-10.00"}
+
+
+def test_export_with_filters(ledger, tmp_path):
+    out = tmp_path / "out.csv"
+    assert cli.main(["export", str(out), "--group", "trip", "--paid-by", "Vic"]) == 0
+    with open(out, newline="", encoding="utf-8") as f:
+        assert [row[0] for row in csv.reader(f)] == ["B001"]
+
+
+def test_import_renumbers_taken_serials_and_journals(ledger, tmp_path, capsys):
+    # Legacy layout; A001 is already in the ledger
+    src = tmp_path / "other.csv"
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["A001", "Lunch", "Vic", "trip", "2024-04-01", "12.00", "Food & Drinks", "Even (1/2 each)"])
+        w.writerow(["A007", "Cafe", "Vic", "trip", "2024-04-02", "4.00", "Food & Drinks", "Even (1/2 each)"])
+    assert cli.main(["import", str(src)]) == 0
+    assert "Imported 2 transactions (1 renumbered)" in capsys.readouterr().out
+
+    serials = [t.serial_number for t in CSVRepository(str(ledger)).load_all()]
+    assert serials == ["A001", "B001", "C001", "A008", "A007"]
+    assert SyncJournal().changes() == ({"A007", "A008"}, set())
+
+
+def test_delete_by_filter(ledger, capsys):
+    assert cli.main(["delete"]) == 2
+    assert cli.main(["delete", "--group", "trip", "--dry-run"]) == 0
+    assert "2 transactions would be deleted" in capsys.readouterr().out
+    assert len(CSVRepository(str(ledger)).load_all()) == 3
+
+    assert cli.main(["delete", "--group", "trip", "--before", "2024-03-02"]) == 0
+    repo = CSVRepository(str(ledger))
+    assert [t.serial_number for t in repo.load_all()] == ["B001", "C001"]
+    assert repo.next_serial("A") == "A002"
+    assert SyncJournal().changes() == (set(), {"A001"})
+
+
+def test_delete_keeps_rows_saved_meanwhile(ledger, monkeypatch):
+    real_load_all = CSVRepository.load_all
+
+    def load_then_another_process_saves(self):
+        rows = real_load_all(self)
+        monkeypatch.setattr(CSVRepository, "load_all", real_load_all)
+        CSVRepository(str(ledger)).save(
+            Transaction("A002", "New", "Vic", "2025-06-01", "trip", "Food & Drinks", 0.5, 8.0))
+        return rows
+    monkeypatch.setattr(CSVRepository, "load_all", load_then_another_process_saves)
+
+    assert cli.main(["delete", "--before", "2025-01-01"]) == 0
+    assert [t.serial_number for t in CSVRepository(str(ledger)).load_all()] == ["C001", "A002"]
+    assert SyncJournal().changes() == (set(), {"A001", "B001"})
+
+
+def test_cli_does_not_import_qt(ledger):
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    code = (
+        "import sys; from splitter_app.cli import main\n"
+        f"main(['--csv', {str(ledger)!r}, 'balance'])\n"
+        "print(sorted(m for m in sys.modules if m.startswith(('PySide6', 'google'))))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=src),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.splitlines()[-1] == "[]"
+
+
+def test_relative_paths(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "LOCAL_CSV_PATH", config.LOCAL_CSV_PATH)
+    CSVRepository("other.csv").save(
+        Transaction("A001", "Dinner", "Adrian", "2024-03-01", "trip", "Food & Drinks", 0.5, 40.0))
+
+    assert cli.main(["--csv", "ledger.csv", "import", "other.csv"]) == 0
+    assert config.LOCAL_CSV_PATH == str(tmp_path / "ledger.csv")
+    assert [t.serial_number for t in CSVRepository("ledger.csv").load_all()] == ["A001"]
+    assert cli.main(["--csv", "ledger.csv", "balance"]) == 0
+    assert "Total: $40.00" in capsys.readouterr().out
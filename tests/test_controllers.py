@@ -1,3 +1,5 @@
+import dataclasses
+
 import pytest
 
 from splitter_app.controllers import SplitterController
@@ -10,15 +12,37 @@ class DummyRepo:
     """In-memory stand-in for CSVRepository—no disk or network access."""
     def __init__(self, _path):
         self._storage = []
+        self._version = 0
+        self._hwm = {}
 
     def load_all(self):
         return list(self._storage)
 
     def save(self, txn):
         self._storage.append(txn)
+        self._version += 1
+        letter, num = txn.serial_number[0], int(txn.serial_number[1:])
+        self._hwm[letter] = max(self._hwm.get(letter, 0), num)
+
+    def next_serial(self, letter):
+        return f"{letter}{self._hwm.get(letter, 0) + 1:03d}"
+
+    def save_new(self, txn, letter):
+        txn = dataclasses.replace(txn, serial_number=self.next_serial(letter))
+        self.save(txn)
+        return txn
 
     def delete(self, serial):
         self._storage = [t for t in self._storage if t.serial_number != serial]
+        self._version += 1
+
+    def stamp(self):
+        return self._version
+
+    def only_own_write(self, before, after):
+        # Every write in this stand-in is the controller's own unless a
+        # test bumps _version behind its back
+        return after - before <= 1
 
 class DummySignal:
     """Minimal Qt-like signal: supports .connect() and .emit()."""
@@ -44,6 +68,12 @@ class DummyWindow:
         self.table = None
         self.group_summary_table = None
 
+    def set_transaction_model(self, model):
+        self.transaction_model = model
+
+    def show_error(self, title, message):
+        raise AssertionError(f"{title}: {message}")
+
 # --- Apply the dummy repo to all tests in this module ---
 @pytest.fixture(autouse=True)
 def use_dummy_repo(monkeypatch):
@@ -108,3 +138,113 @@ def test_calculate_group_summary():
 
     assert summary["trip"]["Adrian"] == pytest.approx(50.0)
     assert summary["trip"]["Vic"]    == pytest.approx(10.0)
+
+# --- Tests for incremental balance updates ---
+
+def test_add_and_delete_update_running_totals():
+    win = DummyWindow()
+    ctrl = SplitterController(win)
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    ctrl.initialize()
+
+    base = {"description": "", "date": "2025-07-14", "group": "trip",
+            "category": "Other", "split": 0.5}
+    ctrl.add_transaction(dict(base, paid_by="Adrian", amount="40"))
+    ctrl.add_transaction(dict(base, paid_by="Vic", amount="10"))
+    assert ctrl.ledger.net_balances() == {"Adrian": pytest.approx(15.0),
+                                          "Vic": pytest.approx(-15.0)}
+
+    ctrl.delete_transaction(ctrl.txns[0].serial_number)
+    assert [t.amount for t in ctrl.txns] == [10.0]
+    assert ctrl.ledger.net_balances() == {"Adrian": pytest.approx(-5.0),
+                                          "Vic": pytest.approx(5.0)}
+
+def test_external_change_triggers_rebuild():
+    win = DummyWindow()
+    ctrl = SplitterController(win)
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    ctrl.initialize()
+
+    # Another process writes to the ledger behind the controller's back
+    ctrl.repo.save(Transaction("D001", "", "Vic", "", "trip", "Other", 1.0, 30.0))
+    ctrl.add_transaction({"description": "", "paid_by": "Adrian", "date": "",
+                          "group": "trip", "category": "Other", "split": 1.0,
+                          "amount": "5"})
+    assert [t.serial_number for t in ctrl.txns] == ["D001", "D002"]
+    assert ctrl.ledger.total == pytest.approx(35.0)
+
+
+def test_change_made_while_saving_triggers_rebuild():
+    ctrl = SplitterController(DummyWindow())
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    ctrl.initialize()
+
+    save_new = ctrl.repo.save_new
+    def save_new_after_other_writer(txn, letter):
+        # Another process saves after the controller's last look
+        ctrl.repo.save(Transaction("D001", "", "Vic", "", "trip", "Other", 1.0, 30.0))
+        return save_new(txn, letter)
+    ctrl.repo.save_new = save_new_after_other_writer
+    ctrl.add_transaction({"description": "", "paid_by": "Adrian", "date": "",
+                          "group": "trip", "category": "Other", "split": 1.0,
+                          "amount": "5"})
+    assert [t.serial_number for t in ctrl.txns] == ["D001", "D002"]
+    assert ctrl.ledger.total == pytest.approx(35.0)
+
+    delete = ctrl.repo.delete
+    def delete_after_other_writer(serial):
+        ctrl.repo.save(Transaction("D003", "", "Vic", "", "trip", "Other", 1.0, 7.0))
+        delete(serial)
+    ctrl.repo.delete = delete_after_other_writer
+    ctrl.delete_transaction("D001")
+    assert [t.serial_number for t in ctrl.txns] == ["D002", "D003"]
+    assert ctrl.ledger.total == pytest.approx(12.0)
+
+
+def test_sync_merges_changed_rows_without_reset():
+    # A synced copy should only touch the rows that actually changed
+    ctrl = SplitterController(DummyWindow())
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    for i in range(1, 4):
+        ctrl.repo.save(Transaction(f"D{i:03d}", "", "Vic", "", "g", "Other", 1.0, 10.0))
+    ctrl.initialize()
+
+    resets = []
+    ctrl.model.modelReset.connect(lambda: resets.append(True))
+
+    def fetch():
+        # Remote copy: D002 edited, D003 gone, D004 new
+        ctrl.repo._storage = [
+            Transaction("D001", "", "Vic", "", "g", "Other", 1.0, 10.0),
+            Transaction("D002", "", "Vic", "", "g", "Other", 1.0, 25.0),
+            Transaction("D004", "", "Adrian", "", "g", "Other", 1.0, 5.0),
+        ]
+        ctrl.repo._version += 1
+
+    synced = []
+    ctrl.sync(fetch, on_done=synced.append)
+
+    assert synced == [None] and not resets
+    assert sorted((t.serial_number, t.amount) for t in ctrl.txns) == [
+        ("D001", 10.0), ("D002", 25.0), ("D004", 5.0)]
+    assert ctrl.ledger.total == pytest.approx(40.0)
+
+
+def test_adds_and_deletes_are_journaled_for_sync():
+    class Journal:
+        def __init__(self):
+            self.entries = []
+        def record_add(self, serial):
+            self.entries.append(("add", serial))
+        def record_delete(self, serial):
+            self.entries.append(("delete", serial))
+
+    journal = Journal()
+    ctrl = SplitterController(DummyWindow(), journal=journal)
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    ctrl.initialize()
+    ctrl.add_transaction({"description": "", "paid_by": "Adrian", "date": "",
+                          "group": "g", "category": "Other", "split": 1.0,
+                          "amount": "5"})
+    ctrl.delete_transaction("D001")
+    assert journal.entries == [("add", "D001"), ("delete", "D001")]
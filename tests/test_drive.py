@@ -1,7 +1,17 @@
+import hashlib
+import json
 import os
+import threading
 import pytest
 from pathlib import Path
 import splitter_app.services.drive as drive_module
+import splitter_app.services.google_api as google_api
+from splitter_app.models import Transaction
+from splitter_app import persistence
+from splitter_app.persistence import CSVRepository
+
+# Remote sync metadata as returned by google_api.download_from_drive
+META = {"md5Checksum": "abc", "version": "7", "modifiedTime": "2025-07-14T00:00:00Z"}
 
 def test_download_csv_success(tmp_path, monkeypatch):
     # TC-G2: when no existing file, should call underlying download
@@ -13,21 +23,64 @@ def test_download_csv_success(tmp_path, monkeypatch):
     monkeypatch.setattr(drive_module.config, "DRIVE_FILE_ID", fake_id)
     monkeypatch.setattr(drive_module.config, "CREDENTIALS_FILE", fake_cred)
     called = {}
-    def fake_download(file_id, out_path, cred_path):
-        called['args'] = (file_id, out_path, cred_path)
+    def fake_download(file_id, out_path, cred_path, known=None):
+        called['args'] = (file_id, cred_path, known)
+        Path(out_path).write_text("fresh")
+        return META
     monkeypatch.setattr(drive_module, "_download_from_drive", fake_download)
-    drive_module.download_csv()
-    assert called['args'] == (fake_id, str(fake_path), fake_cred)
+    assert drive_module.download_csv() is True
+    assert called['args'] == (fake_id, fake_cred, None)
+    assert fake_path.read_text() == "fresh"
+    state = drive_module.read_sync_state()
+    assert {k: state[k] for k in ("file_id", *META)} == {"file_id": fake_id, **META}
+
+def test_download_csv_skips_unchanged_remote(tmp_path, monkeypatch):
+    # TC-G2: matching md5/version since the last sync → no transfer
+    fake_path = tmp_path / "transactions.csv"
+    fake_path.write_text("local")
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    monkeypatch.setattr(drive_module.config, "DRIVE_FILE_ID", "FAKEID")
+    Path(drive_module.sync_state_path()).write_text(
+        json.dumps({"file_id": "FAKEID", **META}))
+    seen = {}
+    def fake_download(file_id, out_path, cred_path, known=None):
+        seen['known'] = known
+        return META   # unchanged: nothing written
+    monkeypatch.setattr(drive_module, "_download_from_drive", fake_download)
+    assert drive_module.download_csv() is False
+    assert seen['known']["version"] == "7"
+    assert fake_path.read_text() == "local"
+
+    # state recorded for a different Drive file is ignored
+    monkeypatch.setattr(drive_module.config, "DRIVE_FILE_ID", "OTHER")
+    assert drive_module.read_sync_state() is None
+
+def test_download_csv_failure_keeps_local_copy(tmp_path, monkeypatch):
+    # TC-G2: an interrupted download must not cost us the local CSV
+    fake_path = tmp_path / "transactions.csv"
+    fake_path.write_text("data")
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    def failing_download(file_id, out_path, cred_path, known=None):
+        Path(out_path).write_text("partial")
+        raise ConnectionError("reset")
+    monkeypatch.setattr(drive_module, "_download_from_drive", failing_download)
+    with pytest.raises(ConnectionError):
+        drive_module.download_csv()
+    assert fake_path.read_text() == "data"
+    assert not Path(f"{fake_path}.part").exists()
 
 def test_download_csv_permission_error(tmp_path, monkeypatch):
-    # TC-G2: simulate permission error when removing existing file
+    # TC-G2: simulate permission error when replacing the existing file
     fake_path = tmp_path / "transactions.csv"
     fake_path.write_text("data")
     monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
-    # make os.remove raise PermissionError
-    monkeypatch.setattr(drive_module.os, "remove", lambda p: (_ for _ in ()).throw(PermissionError("locked")))
+    monkeypatch.setattr(drive_module, "_download_from_drive",
+                        lambda f, out, c, known=None: Path(out).write_text("new") and META)
+    # make os.replace raise PermissionError
+    monkeypatch.setattr(drive_module.os, "replace", lambda a, b: (_ for _ in ()).throw(PermissionError("locked")))
     with pytest.raises(PermissionError):
         drive_module.download_csv()
+    assert fake_path.read_text() == "data"
 
 def test_upload_csv_file_not_found(tmp_path, monkeypatch):
     # TC-G3: upload when no local CSV should raise FileNotFoundError
@@ -51,3 +104,261 @@ def test_upload_csv_success(tmp_path, monkeypatch):
     monkeypatch.setattr(drive_module, "_upload_to_drive", fake_upload)
     drive_module.upload_csv()
     assert called['args'] == (fake_id, str(fake_path), fake_cred)
+
+def _synced_copy(tmp_path, monkeypatch, content=b"a,b\n"):
+    """Local CSV plus a sync state saying Drive holds the same bytes."""
+    fake_path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    monkeypatch.setattr(drive_module.config, "DRIVE_FILE_ID", "FILEID")
+    def fake_download(file_id, out_path, cred_path, known=None):
+        Path(out_path).write_bytes(content)
+        return dict(META, md5Checksum=hashlib.md5(content).hexdigest())
+    monkeypatch.setattr(drive_module, "_download_from_drive", fake_download)
+    drive_module.download_csv()
+    uploads = []
+    monkeypatch.setattr(drive_module, "_upload_to_drive",
+                        lambda *a: uploads.append(a) or dict(META, version="8"))
+    return fake_path, uploads
+
+def test_upload_csv_skips_unchanged_ledger(tmp_path, monkeypatch):
+    # TC-G3: read-only session → no upload at all
+    fake_path, uploads = _synced_copy(tmp_path, monkeypatch)
+    assert drive_module.upload_csv() is False
+    # rewritten with identical bytes (new mtime) → hash matches, still skipped
+    fake_path.write_bytes(b"a,b\n")
+    os.utime(fake_path, ns=(1, 1))
+    assert drive_module.upload_csv() is False
+    assert uploads == []
+    assert drive_module.upload_csv(force=True) is True
+    assert len(uploads) == 1
+
+def test_upload_csv_after_change_records_new_revision(tmp_path, monkeypatch):
+    # TC-G3: edited ledger is uploaded once, then considered synced
+    fake_path, uploads = _synced_copy(tmp_path, monkeypatch)
+    with open(fake_path, "ab") as f:
+        f.write(b"c,d\n")
+    assert drive_module.upload_csv() is True
+    assert drive_module.read_sync_state()["version"] == "8"
+    assert drive_module.upload_csv() is False
+    assert len(uploads) == 1
+
+def test_upload_csv_does_not_mark_rows_saved_during_upload_synced(tmp_path, monkeypatch):
+    fake_path, _ = _synced_copy(tmp_path, monkeypatch)
+    CSVRepository(str(fake_path)).save(_t("A001", 1.0))
+    drive = {}
+
+    def upload_while_saving(file_id, local_path, cred_path):
+        drive["bytes"] = Path(local_path).read_bytes()
+        if not drive.get("saved"):
+            # The writer thread saves a row after the bytes were read
+            CSVRepository(str(fake_path)).save(_t("A002", 2.0))
+            drive["saved"] = True
+        return dict(META, md5Checksum=hashlib.md5(drive["bytes"]).hexdigest(), version="8")
+    monkeypatch.setattr(drive_module, "_upload_to_drive", upload_while_saving)
+    assert drive_module.upload_csv() is True
+
+    # A002 is not on Drive yet, so the next upload must not be skipped
+    assert drive_module.local_changed()
+    assert drive_module.upload_csv() is True
+    assert drive["bytes"] == fake_path.read_bytes()
+
+def test_upload_to_drive_uses_resumable_chunks_for_large_files(tmp_path, monkeypatch):
+    # TC-G3: big files are sent with next_chunk() until the response arrives
+    big = tmp_path / "big.csv"
+    big.write_bytes(b"x" * 10)
+    monkeypatch.setattr(google_api, "RESUMABLE_THRESHOLD", 5)
+    media = {}
+    monkeypatch.setattr(google_api, "MediaFileUpload",
+                        lambda path, **kw: media.update(kw) or object())
+    monkeypatch.setattr(google_api, "_preflight",
+                        lambda service, cred, fid, max_age=0.0: ("me@x", {}, None))
+
+    class Request:
+        calls = 0
+        def next_chunk(self):
+            Request.calls += 1
+            if Request.calls < 3:
+                return None, None
+            return None, {"id": "F", **META}
+
+    class Service:
+        def files(self):
+            return self
+        def update(self, **kw):
+            return Request()
+    monkeypatch.setattr(google_api, "_service", lambda cred: Service())
+
+    assert google_api.upload_to_drive("F", str(big), "cred") == META
+    assert media["resumable"] is True
+    assert Request.calls == 3
+
+# --- Delta sync ---------------------------------------------------------------
+
+def _t(serial, amount, paid_by="Vic"):
+    return Transaction(serial, "", paid_by, "2025-07-14", "g", "Other", 1.0, amount)
+
+def test_merge_ledgers_three_way_by_serial():
+    # base was D001, D002; here D002 was deleted and D003 added locally,
+    # while Drive deleted D001 and added D004
+    local = [_t("D001", 1.0), _t("D003", 3.0)]
+    remote = [_t("D002", 2.0), _t("D004", 4.0)]
+    merged, conflicts = drive_module.merge_ledgers(local, remote, {"D003"}, {"D002"})
+    assert [t.serial_number for t in merged] == ["D004", "D003"]
+    assert conflicts == []
+
+def test_merge_ledgers_renumbers_serial_collisions():
+    # Both machines handed out D002 for different entries
+    local = [_t("D001", 1.0), _t("D002", 5.0, "Adrian")]
+    remote = [_t("D001", 1.0), _t("D002", 9.0)]
+    merged, conflicts = drive_module.merge_ledgers(local, remote, {"D002"}, set(), hwm={"D": 7})
+    assert [(t.serial_number, t.amount) for t in merged] == [
+        ("D001", 1.0), ("D002", 9.0), ("D008", 5.0)]
+    assert [(c.serial_number, c.renumbered_to) for c in conflicts] == [("D002", "D008")]
+
+    # the same row added on both sides is not a conflict
+    merged, conflicts = drive_module.merge_ledgers(remote, remote, {"D002"}, set())
+    assert merged == remote and conflicts == []
+
+def _csv_bytes(txns):
+    return "".join(",".join(t.to_csv_row()) + "\r\n" for t in txns).encode()
+
+def test_sync_csv_merges_both_sides_and_uploads_once(tmp_path, monkeypatch):
+    fake_path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    monkeypatch.setattr(drive_module.config, "DRIVE_FILE_ID", "FILEID")
+    drive = {"bytes": _csv_bytes([_t("D001", 1.0), _t("D002", 2.0)]), "version": 1}
+
+    def fake_download(file_id, out_path, cred_path, known=None):
+        meta = {"md5Checksum": hashlib.md5(drive["bytes"]).hexdigest(),
+                "version": str(drive["version"]), "modifiedTime": "t"}
+        if not google_api.same_revision(meta, known):
+            Path(out_path).write_bytes(drive["bytes"])
+        return meta
+    def fake_upload(file_id, local_path, cred_path):
+        drive["bytes"] = Path(local_path).read_bytes()
+        drive["version"] += 1
+        return {"md5Checksum": hashlib.md5(drive["bytes"]).hexdigest(),
+                "version": str(drive["version"]), "modifiedTime": "t"}
+    monkeypatch.setattr(drive_module, "_download_from_drive", fake_download)
+    monkeypatch.setattr(drive_module, "_upload_to_drive", fake_upload)
+
+    journal = drive_module.SyncJournal()
+    first = drive_module.sync_csv(journal)
+    assert first.downloaded and not first.uploaded and first.pulled == 2
+
+    # Local session: add D003, delete D002 (journaled like the controller does)
+    repo = CSVRepository(str(fake_path))
+    repo.save(_t("D003", 3.0, "Adrian"))
+    journal.record_add("D003")
+    repo.delete("D002")
+    journal.record_delete("D002")
+    # Meanwhile on another machine: D001 deleted, a different D003 added
+    drive["bytes"] = _csv_bytes([_t("D002", 2.0), _t("D003", 7.0)])
+    drive["version"] += 1
+
+    result = drive_module.sync_csv(journal)
+    assert result.downloaded and result.uploaded
+    assert [(c.serial_number, c.renumbered_to) for c in result.conflicts] == [("D003", "D004")]
+    expected = [("D003", 7.0), ("D004", 3.0)]
+    assert [(t.serial_number, t.amount) for t in CSVRepository(str(fake_path)).load_all()] == expected
+    uploaded = tmp_path / "uploaded.csv"
+    uploaded.write_bytes(drive["bytes"])
+    assert [(t.serial_number, t.amount) for t in CSVRepository(str(uploaded)).load_all()] == expected
+    assert journal.changes() == (set(), set())
+
+    # Nothing changed anywhere: neither transfer happens
+    again = drive_module.sync_csv(journal)
+    assert not again.downloaded and not again.uploaded
+
+def test_sync_csv_keeps_changes_journaled_during_upload(tmp_path, monkeypatch):
+    fake_path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    monkeypatch.setattr(drive_module, "_download_from_drive",
+                        lambda *a, **k: Path(a[1]).write_bytes(_csv_bytes([_t("D001", 1.0)])) and {})
+    journal = drive_module.SyncJournal()
+    repo = CSVRepository(str(fake_path))
+    repo.save(_t("D002", 2.0))
+    journal.record_add("D002")
+
+    def upload_while_saving(file_id, local_path, cred_path):
+        # The writer adds a row after the merge, before the upload finishes
+        repo.save(_t("D003", 3.0))
+        journal.record_add("D003")
+        return {}
+    monkeypatch.setattr(drive_module, "_upload_to_drive", upload_while_saving)
+
+    steps = []
+    def exclusive(fn):
+        steps.append(fn)
+        return fn()
+    result = drive_module.sync_csv(journal, exclusive=exclusive)
+
+    assert result.uploaded and len(steps) == 2  # merge/swap, then journal trim
+    assert journal.changes() == ({"D003"}, set())
+    assert [t.serial_number for t in repo.load_all()] == ["D001", "D002", "D003"]
+
+def test_merge_ledgers_without_base_keeps_local_rows():
+    # No sync state: D002 may be new here or deleted on Drive; keep it
+    local = [_t("D001", 1.0), _t("D002", 2.0), _t("D003", 5.0, "Adrian")]
+    remote = [_t("D001", 1.0), _t("D003", 3.0)]
+    merged, conflicts = drive_module.merge_ledgers(local, remote, set(), set(), has_base=False)
+    assert [(t.serial_number, t.amount) for t in merged] == [
+        ("D001", 1.0), ("D003", 3.0), ("D002", 2.0), ("D004", 5.0)]
+    assert [(c.serial_number, c.renumbered_to) for c in conflicts] == [("D003", "D004")]
+
+def test_sync_csv_without_state_uploads_unjournaled_local_rows(tmp_path, monkeypatch):
+    fake_path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    # Rows written before any sync (e.g. the sync state file was lost)
+    CSVRepository(str(fake_path)).save(_t("D001", 1.0))
+    CSVRepository(str(fake_path)).save(_t("D005", 5.0))
+    drive = {"bytes": _csv_bytes([_t("D001", 1.0), _t("D002", 2.0)])}
+
+    def fake_download(file_id, out_path, cred_path, known=None):
+        Path(out_path).write_bytes(drive["bytes"])
+        return {}
+    def fake_upload(file_id, local_path, cred_path):
+        drive["bytes"] = Path(local_path).read_bytes()
+        return {}
+    monkeypatch.setattr(drive_module, "_download_from_drive", fake_download)
+    monkeypatch.setattr(drive_module, "_upload_to_drive", fake_upload)
+
+    # Big enough for a snapshot cache, which the throwaway remote copy skips
+    monkeypatch.setattr(persistence, "SNAPSHOT_MIN_BYTES", 0)
+    result = drive_module.sync_csv(drive_module.SyncJournal())
+    assert result.uploaded and result.dropped == 0
+    assert not any(".remote" in p.name for p in tmp_path.iterdir())
+    expected = ["D001", "D002", "D005"]
+    assert [t.serial_number for t in CSVRepository(str(fake_path)).load_all()] == expected
+    uploaded = tmp_path / "uploaded.csv"
+    uploaded.write_bytes(drive["bytes"])
+    assert [t.serial_number for t in CSVRepository(str(uploaded)).load_all()] == expected
+
+def test_sync_csv_merges_rows_appended_during_the_merge(tmp_path, monkeypatch):
+    fake_path = tmp_path / "transactions.csv"
+    monkeypatch.setattr(drive_module.config, "LOCAL_CSV_PATH", str(fake_path))
+    monkeypatch.setattr(drive_module, "_download_from_drive",
+                        lambda *a, **k: Path(a[1]).write_bytes(_csv_bytes([_t("D001", 1.0)])) and {})
+    monkeypatch.setattr(drive_module, "_upload_to_drive", lambda *a: {})
+    journal = drive_module.SyncJournal()
+    CSVRepository(str(fake_path)).save(_t("D001", 1.0))
+
+    real_merge = drive_module.merge_ledgers
+    writers = []
+
+    def merge_while_another_process_saves(*args, **kwargs):
+        # Another process appends a journaled row while the merge runs
+        def save():
+            CSVRepository(str(fake_path)).save(_t("D002", 2.0))
+            journal.record_add("D002")
+        t = threading.Thread(target=save)
+        t.start()
+        t.join(0.2)
+        writers.append(t)
+        return real_merge(*args, **kwargs)
+    monkeypatch.setattr(drive_module, "merge_ledgers", merge_while_another_process_saves)
+
+    drive_module.sync_csv(journal)
+    for t in writers:
+        t.join(5)
+    assert [t.serial_number for t in CSVRepository(str(fake_path)).load_all()] == ["D001", "D002"]
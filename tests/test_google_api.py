@@ -0,0 +1,234 @@
+import json
+import re
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+
+import splitter_app.services.google_api as google_api
+from splitter_app.services import auth
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    google_api.invalidate_services()
+    yield
+    google_api.invalidate_services()
+
+
+@pytest.fixture
+def counted_build(monkeypatch):
+    calls = {"creds": 0, "build": []}
+
+    def fake_from_file(path, scopes=None):
+        calls["creds"] += 1
+        return object()
+
+    def fake_build(api, version, **kw):
+        calls["build"].append((api, version, kw["static_discovery"]))
+        return object()
+
+    monkeypatch.setattr(google_api.Credentials, "from_authorized_user_file",
+                        staticmethod(fake_from_file))
+    monkeypatch.setattr(google_api, "build", fake_build)
+    return calls
+
+
+def test_services_are_cached_per_token_and_api(counted_build):
+    drive = google_api._service("tok.json")
+    assert google_api._service("tok.json") is drive
+    sheets = google_api._service("tok.json", "sheets", "v4")
+    assert sheets is not drive
+    assert google_api._service("other.json") is not drive
+    assert counted_build["creds"] == 3
+    # discovery comes from the bundled documents, never the network
+    assert counted_build["build"] == [
+        ("drive", "v3", True), ("sheets", "v4", True), ("drive", "v3", True)]
+
+
+def test_ensure_credentials_refresh_invalidates_cache(tmp_path, monkeypatch, counted_build):
+    token_path = tmp_path / "token.json"
+    token_path.write_text("{}")
+    monkeypatch.setenv(auth.ENV_CREDENTIALS_VAR, str(token_path))
+    cached = google_api._service(str(token_path))
+
+    class Expired:
+        valid = False
+        expired = True
+        refresh_token = "r"
+
+        def refresh(self, request):
+            self.valid = True
+
+        def to_json(self):
+            return "{}"
+
+    monkeypatch.setattr(auth.Credentials, "from_authorized_user_file",
+                        staticmethod(lambda path, scopes=None: Expired()))
+    auth.ensure_credentials()
+    assert google_api._service(str(token_path)) is not cached
+
+
+ABOUT = {"user": {"emailAddress": "me@x", "displayName": "Me"}}
+FILE = {"id": "FID", "name": "transactions.csv", "md5Checksum": "abc",
+        "version": "7", "modifiedTime": "2025-07-14T00:00:00Z"}
+
+
+class MockHttp:
+    """
+    Local HTTP mock standing in for httplib2.Http: answers Drive's about,
+    files.get and media requests, and unpacks multipart batch requests.
+    """
+
+    def __init__(self, file_status=200):
+        self.file_status = file_status
+        self.requests = []
+
+    def request(self, uri, method="GET", body=None, headers=None, **kw):
+        self.requests.append((method, uri.split("?")[0]))
+        if "/batch/" in uri:
+            return self._batch(body, headers)
+        status, payload = self._answer(uri)
+        return httplib2.Response({"status": status,
+                                  "content-type": "application/json"}), payload
+
+    def _answer(self, uri):
+        if "/about" in uri:
+            return 200, json.dumps(ABOUT).encode()
+        if "alt=media" in uri:
+            return 200, b"a,b\n"
+        if self.file_status != 200:
+            return self.file_status, b'{"error": {"code": %d}}' % self.file_status
+        return 200, json.dumps(FILE).encode()
+
+    def _batch(self, body, headers):
+        boundary = re.search(r'boundary="?([^";]+)', headers["content-type"]).group(1)
+        parts = []
+        for part in body.split("--" + boundary)[1:-1]:
+            cid = re.search(r"Content-ID: <(.+)>", part).group(1)
+            uri = re.search(r"^GET (\S+)", part, re.M).group(1)
+            status, payload = self._answer(uri)
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{cid}>\r\n\r\n"
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n"
+                f"{payload.decode()}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--"
+        return httplib2.Response({
+            "status": 200,
+            "content-type": f"multipart/mixed; boundary={boundary}",
+        }), content.encode()
+
+
+@pytest.fixture
+def drive_http(monkeypatch):
+    http = MockHttp()
+    monkeypatch.setattr(google_api, "_service", lambda cred, *a: build(
+        "drive", "v3", http=http, static_discovery=True, cache_discovery=False))
+    return http
+
+
+def test_preflight_batches_whoami_and_metadata(drive_http, tmp_path):
+    out = tmp_path / "out.csv"
+    meta = google_api.download_from_drive("FID", str(out), "tok.json")
+    assert meta["version"] == "7"
+    assert out.read_bytes() == b"a,b\n"
+    # one batch round trip for the preflight, then the media download
+    assert [m for m, _ in drive_http.requests] == ["POST", "GET"]
+    assert "/batch/" in drive_http.requests[0][1]
+
+    # identity is memoized: the next download only re-reads file metadata
+    drive_http.requests.clear()
+    google_api.download_from_drive("FID", str(out), "tok.json", known=meta)
+    assert len(drive_http.requests) == 1
+    assert drive_http.requests[0][1].endswith("/files/FID")
+
+
+def test_upload_skips_fresh_preflight(drive_http, tmp_path, monkeypatch):
+    local = tmp_path / "t.csv"
+    local.write_bytes(b"a,b\n")
+    google_api.download_from_drive("FID", str(tmp_path / "out.csv"), "tok.json")
+    drive_http.requests.clear()
+    monkeypatch.setattr(google_api, "MediaFileUpload", lambda *a, **k: None)
+    updated = {}
+    monkeypatch.setattr(google_api, "_service", lambda cred, *a: FakeUploadService(updated))
+    assert google_api.upload_to_drive("FID", str(local), "tok.json")["version"] == "7"
+    # the access check from the download is reused
+    assert drive_http.requests == []
+    assert updated["fileId"] == "FID"
+
+    assert "preflight" not in updated
+
+    # once stale, the metadata check is repeated before uploading
+    monkeypatch.setattr(google_api, "PREFLIGHT_MAX_AGE", 0.0)
+    google_api.upload_to_drive("FID", str(local), "tok.json")
+    assert updated["preflight"] == "FID"
+
+
+class FakeUploadService:
+    """files().get()/update() stand-in recording what was called."""
+
+    def __init__(self, seen):
+        self.seen = seen
+
+    def files(self):
+        return self
+
+    def get(self, fileId, **kw):
+        self.seen["preflight"] = fileId
+        return type("Req", (), {"execute": lambda _: dict(FILE)})()
+
+    def update(self, **kw):
+        self.seen.update(kw)
+        return type("Req", (), {"execute": lambda _: dict(FILE)})()
+
+
+def test_preflight_not_shared_raises_file_not_found(monkeypatch, tmp_path):
+    http = MockHttp(file_status=404)
+    monkeypatch.setattr(google_api, "_service", lambda cred, *a: build(
+        "drive", "v3", http=http, static_discovery=True, cache_discovery=False))
+    with pytest.raises(FileNotFoundError, match="not shared with me@x"):
+        google_api.download_from_drive("FID", str(tmp_path / "o.csv"), "tok.json")
+    assert len(http.requests) == 1
+
+
+def test_read_sheet_pages_requests_row_windows(monkeypatch):
+    sheet = [[f"r{i}"] for i in range(1, 12)]    # 11 filled rows
+    requested = []
+
+    class Values:
+        def get(self, spreadsheetId, range):
+            requested.append(range)
+            rows = re.search(r"(\d+):H(\d+)$", range)
+            first, last = int(rows.group(1)), int(rows.group(2))
+            return type("Req", (), {"execute": lambda _: {"values": sheet[first - 1:last]}})()
+
+    class Service:
+        def spreadsheets(self):
+            return self
+        def values(self):
+            return Values()
+
+    monkeypatch.setattr(google_api, "_service", lambda cred, *a: Service())
+    pages = list(google_api.read_sheet_pages("S", "Sheet1!A:H", "tok", page_rows=5))
+    assert [len(p) for p in pages] == [5, 5, 1]
+    assert requested == ["Sheet1!A1:H5", "Sheet1!A6:H10", "Sheet1!A11:H15", "Sheet1!A16:H20"]
+
+    requested.clear()
+    pages = list(google_api.read_sheet_pages("S", "A2:H7", "tok", page_rows=5))
+    assert requested == ["A2:H6", "A7:H7"]
+    assert sum(len(p) for p in pages) == 6
+
+    # Blank rows at the end of a window (dropped by the API) are not the end
+    sheet[3:5] = [[], []]
+    trimmed = Values.get
+
+    def get(self, spreadsheetId, range):
+        result = trimmed(self, spreadsheetId, range).execute()
+        while result["values"] and not result["values"][-1]:
+            result["values"].pop()
+        return type("Req", (), {"execute": lambda _: result})()
+    monkeypatch.setattr(Values, "get", get)
+    pages = list(google_api.read_sheet_pages("S", "Sheet1!A:H", "tok", page_rows=5))
+    assert [len(p) for p in pages] == [3, 5, 1]
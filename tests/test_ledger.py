@@ -0,0 +1,114 @@
+import pytest
+
+from splitter_app.ledger import LedgerState
+from splitter_app.models import Transaction
+
+PARTS = ["Adrian", "Vic"]
+
+
+def _txns():
+    return [
+        Transaction("A001", "", "Adrian", "2025-07-14", "trip", "Other", 1.0, 40.0),
+        Transaction("A002", "", "Vic", "2025-07-14", "trip", "Other", 0.5, 20.0),
+        Transaction("A003", "", "Vic", "2025-07-15", "home", "Other", 0.3, 10.0),
+    ]
+
+
+def test_rebuild_totals():
+    state = LedgerState.from_transactions(_txns(), PARTS)
+    assert state.total == pytest.approx(70.0)
+    assert state.group_owed["trip"]["Adrian"] == pytest.approx(50.0)
+    assert state.group_owed["trip"]["Vic"] == pytest.approx(10.0)
+    assert state.group_paid["home"]["Vic"] == pytest.approx(10.0)
+    assert state.net_balances() == {"Adrian": pytest.approx(-17.0), "Vic": pytest.approx(17.0)}
+
+
+def test_apply_and_revert_match_full_rebuild():
+    txns = _txns()
+    state = LedgerState(PARTS)
+    for t in txns:
+        state.apply(t)
+    state.revert(txns[2])
+
+    expected = LedgerState.from_transactions(txns[:2], PARTS)
+    assert state.net_balances() == expected.net_balances()
+    # Reverting the last transaction of a group drops the group entirely
+    assert list(state.group_owed) == ["trip"]
+    assert state.group_owed["trip"] == pytest.approx(expected.group_owed["trip"])
+
+
+def test_table_rebuild_matches_incremental_with_outside_payer():
+    from splitter_app.models import TransactionTable
+    txns = _txns() + [Transaction("A004", "", "Guest", "", "trip", "Other", 0.5, 8.0)]
+    incremental = LedgerState(PARTS)
+    for t in txns:
+        incremental.apply(t)
+    rebuilt = LedgerState.from_transactions(TransactionTable.from_transactions(txns), PARTS)
+
+    assert rebuilt.total == pytest.approx(incremental.total)
+    assert rebuilt.net_balances() == incremental.net_balances()
+    for group in ("trip", "home"):
+        for p in PARTS + ["Guest"]:
+            assert rebuilt.group_owed[group].get(p, 0.0) == pytest.approx(
+                incremental.group_owed[group].get(p, 0.0))
+            assert rebuilt.group_paid[group].get(p, 0.0) == pytest.approx(
+                incremental.group_paid[group].get(p, 0.0))
+
+
+@pytest.mark.parametrize("participants", [["A"], ["A", "B"], ["A", "B", "C"]])
+def test_batch_allocation_matches_scalar(participants):
+    import random
+    from splitter_app.ledger import allocate_shares, share_matrix
+    from splitter_app.models import TransactionTable
+
+    rng = random.Random(1234)
+    payers = participants + ["Z"]
+    txns = [
+        Transaction(f"A{i:03d}", "", rng.choice(payers), "", "g", "Other",
+                    rng.choice([0.0, 0.3, 0.5, 1.0]), round(rng.uniform(0, 500), 2))
+        for i in range(300)
+    ]
+    shares, cols = share_matrix(TransactionTable.from_transactions(txns), participants)
+    for i, t in enumerate(txns):
+        expected = allocate_shares(t.amount, t.split, t.paid_by, participants)
+        got = {c: shares[i, j] for j, c in enumerate(cols) if c in expected}
+        assert got == pytest.approx(expected)
+        assert shares[i].sum() == pytest.approx(round(t.amount, 2))
+
+
+def test_allocate_shares_sums_to_rounded_amount_on_half_cents():
+    from splitter_app.ledger import allocate_shares
+    # 266.45 * 0.5 = 133.225: payer and ower used to both round the same way
+    shares = allocate_shares(266.45, 0.5, "Adrian", PARTS)
+    assert round(sum(shares.values()), 2) == 266.45
+
+
+@pytest.mark.parametrize("participants", [["A"], ["A", "B"], ["A", "B", "C"]])
+def test_cents_batch_matches_scalar_and_sums_exactly(participants):
+    import random
+    from splitter_app.ledger import allocate_cents, share_matrix
+    from splitter_app.models import TransactionTable
+
+    rng = random.Random(99)
+    payers = participants + ["Z"]
+    txns = [
+        Transaction(f"A{i:03d}", "", rng.choice(payers), "", "g", "Other",
+                    rng.choice([0.0, 0.3, 0.5, 1.0]), rng.randrange(0, 50000) / 100)
+        for i in range(300)
+    ]
+    shares, cols = share_matrix(TransactionTable.from_transactions(txns), participants, cents=True)
+    assert shares.dtype.kind == "i"
+    for i, t in enumerate(txns):
+        expected = allocate_cents(t.amount_cents, t.split, t.paid_by, participants)
+        assert {c: int(shares[i, j]) for j, c in enumerate(cols) if c in expected} == expected
+        assert sum(expected.values()) == t.amount_cents
+
+
+def test_running_totals_do_not_drift():
+    state = LedgerState(PARTS)
+    txn = Transaction("A001", "", "Adrian", "", "g", "Other", 0.3, 0.1)
+    for _ in range(1000):
+        state.apply(txn)
+    for _ in range(1000):
+        state.revert(txn)
+    assert state.total_cents == 0 and state.net_balance_cents() == {"Adrian": 0, "Vic": 0}
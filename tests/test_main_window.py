@@ -1,7 +1,9 @@
 import pytest
 from splitter_app.ui.main_window import MainWindow
-from PySide6.QtWidgets import QApplication, QMessageBox, QTableWidgetItem
-from PySide6.QtCore import QDate
+from PySide6.QtWidgets import QApplication, QMessageBox
+from splitter_app.models import Transaction, TransactionTable
+from splitter_app.ui.transaction_model import TransactionTableModel
+from PySide6.QtCore import QDate, Qt
 
 @pytest.fixture(scope="session")
 def app():
@@ -42,8 +44,8 @@ def test_on_add_clicked_emits_transaction_added(app):
 
 def test_on_delete_clicked_no_selection_shows_warning(app, monkeypatch):
     win = MainWindow(["A","B"], ["Cat"])
-    # simulate no row selected
-    monkeypatch.setattr(win.table, "selectedItems", lambda: [])
+    # no row selected
+    assert win.selected_serial() is None
 
     calls = []
     def fake_warning(parent, title, msg, *args, **kwargs):
@@ -58,15 +60,11 @@ def test_on_delete_clicked_no_selection_shows_warning(app, monkeypatch):
 
 def test_on_delete_clicked_emits_serial(app):
     win = MainWindow(["A","B"], ["Cat"])
-    win.table.setRowCount(1)
     serial = "42"
-    item = QTableWidgetItem(serial)
-    win.table.setItem(0, 0, item)
-
-    # avoid needing real selection handling
-    win.table.setCurrentCell(0, 0)
+    table = TransactionTable.from_transactions(
+        [Transaction(serial, "", "A", "2025-07-14", "g", "Cat", 0.5, 1.0)])
+    win.set_transaction_model(TransactionTableModel(table))
     win.table.selectRow(0)
-    win.table.selectedItems = lambda: [item]
 
     captured = {}
     def catcher(sn):
@@ -76,3 +74,50 @@ def test_on_delete_clicked_emits_serial(app):
     win._on_delete_clicked()
 
     assert captured.get('sn') == serial
+
+def test_transaction_model_signals_and_numeric_sort(app):
+    win = MainWindow(["A","B"], ["Cat"])
+    model = TransactionTableModel()
+    win.set_transaction_model(model)
+    inserted, removed = [], []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+
+    for serial, amount in [("A001", 100.0), ("A002", 20.0), ("A003", 3.5)]:
+        model.append(Transaction(serial, "", "A", "2025-07-14", "g", "Cat", 0.5, amount))
+    assert inserted == [(0, 0), (1, 1), (2, 2)]
+    assert model.index(0, 5).data() == "100.00"
+
+    # Sorting the Amount column compares cents, not strings
+    win.table.sortByColumn(5, Qt.SortOrder.AscendingOrder)
+    assert [model.index(r, 0).data() for r in range(3)] == ["A003", "A002", "A001"]
+
+    assert [t.serial_number for t in model.remove_serial("A002")] == ["A002"]
+    assert removed == [(1, 1)]
+    assert model.rowCount() == 2
+    assert [model.index(r, 0).data() for r in range(2)] == ["A003", "A001"]
+
+
+def test_transaction_model_starts_unsorted_and_keeps_sort_on_insert(app):
+    win = MainWindow(["A","B"], ["Cat"])
+    model = TransactionTableModel()
+    win.set_transaction_model(model)
+    assert win.table.horizontalHeader().sortIndicatorSection() == -1
+    model.extend([
+        Transaction(s, "", p, "2025-07-14", "g", "Cat", 0.5, a)
+        for s, p, a in [("A001", "B", 5.0), ("A002", "A", 7.0), ("A003", "B", 1.0)]
+    ])
+    assert [model.index(r, 0).data() for r in range(3)] == ["A001", "A002", "A003"]
+
+    win.table.sortByColumn(2, Qt.SortOrder.DescendingOrder)  # Paid By
+    assert [model.index(r, 0).data() for r in range(3)] == ["A001", "A003", "A002"]
+    win.table.selectRow(2)
+    assert win.selected_serial() == "A002"
+
+    # New rows land in sorted position; the selection follows its transaction
+    model.append(Transaction("A004", "", "C", "2025-07-15", "g", "Cat", 0.5, 2.0))
+    assert [model.index(r, 0).data() for r in range(4)] == ["A004", "A001", "A003", "A002"]
+    assert win.selected_serial() == "A002"
+
+    win.table.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+    assert [model.index(r, 0).data() for r in range(4)] == ["A001", "A002", "A003", "A004"]
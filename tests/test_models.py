@@ -19,3 +19,33 @@ def test_to_csv_row_round_trip():
     txn = Transaction("B002", "Taxi", "Vic", "2025-07-13", "trip", "Travel", 0.3, 45.6)
     row = txn.to_csv_row()
     assert row == ["B002", "Taxi", "Vic", "2025-07-13", "trip", "Travel", "0.3", "45.60"]
+
+def test_transaction_table_round_trip():
+    # TC-M3: columnar storage returns rows equal to the original Transactions
+    from splitter_app.models import TransactionTable
+    txns = [
+        Transaction("A001", "Lunch", "Adrian", "2025-07-14", "general", "Food & Drinks", 0.5, 12.34),
+        Transaction("B002", "Taxi", "Vic", "", "trip", "Travel", 0.3, 45.6),
+        Transaction("A003", "Snack", "Adrian", "2025-07-15", "general", "Food & Drinks", 1.0, 3.0),
+    ]
+    table = TransactionTable.from_transactions(txns)
+    assert len(table) == 3
+    assert table.to_transactions() == txns
+    assert table[1] == txns[1] and table[-1].date == "2025-07-15"
+    # Repeated strings are interned into small code arrays
+    assert table.paid_by_pool.values == ["Adrian", "Vic"]
+    assert table.group_codes.tolist() == [0, 1, 0]
+    assert table.date_codes[0] == 20250714
+
+    removed = table.remove_serial("B002")
+    assert removed == [txns[1]]
+    assert [t.serial_number for t in table] == ["A001", "A003"]
+    assert table.amount.tolist() == [12.34, 3.0]
+
+def test_cents_helpers():
+    # TC-M4: integer cents conversion and formatting
+    from splitter_app.models import to_cents, format_cents
+    assert Transaction("A001", "", "", "", "", "", 0.5, 45.6).amount_cents == 4560
+    assert to_cents(0.1 + 0.2) == 30
+    assert format_cents(1234) == "12.34"
+    assert format_cents(-5) == "-0.05"
@@ -2,6 +2,7 @@ import csv
 import os
 import pytest
 from splitter_app.models import Transaction
+from splitter_app import persistence
 from splitter_app.persistence import CSVRepository
 
 def test_load_all_nonexistent(tmp_path):
@@ -45,3 +46,294 @@ def test_delete_removes_serial(tmp_path):
     loaded = repo.load_all()
     assert len(loaded) == 1
     assert loaded[0].serial_number == "D002"
+
+def test_load_all_reuses_snapshot_when_unchanged(tmp_path, monkeypatch):
+    # Unchanged file: second load must not parse anything
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("E001", "Tea", "Vic", "2025-07-14", "general", "Other", 0.5, 3.0))
+    repo.load_all()
+    monkeypatch.setattr("splitter_app.persistence._parse_bytes",
+                        lambda data: pytest.fail("unexpected re-parse"))
+    repo.save(Transaction("E002", "Cake", "Vic", "2025-07-14", "general", "Other", 0.5, 4.0))
+    assert [t.serial_number for t in repo.load_all()] == ["E001", "E002"]
+
+def test_load_all_reads_only_appended_tail(tmp_path, monkeypatch):
+    # Another process appends: only the new bytes are parsed
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("F001", "Bus", "Adrian", "2025-07-14", "general", "Travel", 0.5, 2.5))
+    repo.load_all()
+    CSVRepository(str(path)).save(
+        Transaction("F002", "Train", "Vic", "2025-07-15", "general", "Travel", 0.5, 7.5))
+
+    from splitter_app import persistence
+    parsed = []
+    real_parse = persistence._parse_bytes
+    def spy(data):
+        parsed.append(data)
+        return real_parse(data)
+    monkeypatch.setattr(persistence, "_parse_bytes", spy)
+
+    assert [t.serial_number for t in repo.load_all()] == ["F001", "F002"]
+    assert len(parsed) == 1 and parsed[0].startswith(b"F002,")
+
+def test_load_all_rereads_replaced_file(tmp_path):
+    # A wholesale replacement (e.g. Drive download) forces a full re-parse
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("G001", "Gas", "Adrian", "2025-07-14", "general", "Travel", 0.5, 40.0))
+    repo.load_all()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["H001", "Hotel", "Vic", "2025-07-14", "trip", "Travel", "0.5", "100.00"])
+        w.writerow(["H002", "Hike", "Vic", "2025-07-15", "trip", "Other", "0.5", "1.00"])
+    assert [t.serial_number for t in repo.load_all()] == ["H001", "H002"]
+
+def test_next_serial_never_reuses_deleted_numbers(tmp_path):
+    # Deleting the newest entry must not free its serial for the next insert
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    for n in range(1, 4):
+        repo.save(Transaction(f"A00{n}", "", "Vic", "2025-07-14", "general", "Food & Drinks", 0.5, 1.0))
+    repo.delete("A003")
+    assert repo.next_serial("A") == "A004"
+    assert repo.next_serial("B") == "B001"
+    # The counters survive a restart via the sidecar file
+    assert CSVRepository(str(path)).next_serial("A") == "A004"
+
+def test_next_serial_rebuilt_from_rows_without_sidecar(tmp_path):
+    path = tmp_path / "txns.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(["C007", "Milk", "Vic", "2025-07-14", "general", "Groceries", "0.5", "2.00"])
+    assert CSVRepository(str(path)).next_serial("C") == "C008"
+
+def test_delete_appends_tombstone_until_compaction(tmp_path):
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path), compact_threshold=1.1)  # never auto-compact
+    for n in range(1, 4):
+        repo.save(Transaction(f"D00{n}", "", "Vic", "2025-07-14", "general", "Other", 0.5, 1.0))
+    repo.delete("D002")
+
+    rows = list(csv.reader(open(path, newline="", encoding="utf-8")))
+    assert len(rows) == 4 and rows[-1][1] == "D002"
+    # Both this instance and a fresh reader honour the tombstone
+    assert [t.serial_number for t in repo.load_all()] == ["D001", "D003"]
+    assert [t.serial_number for t in CSVRepository(str(path)).load_all()] == ["D001", "D003"]
+
+    repo.compact()
+    rows = list(csv.reader(open(path, newline="", encoding="utf-8")))
+    assert [r[0] for r in rows] == ["D001", "D003"]
+    assert repo.dead_ratio() == 0.0
+
+def test_delete_compacts_past_threshold(tmp_path):
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path), compact_threshold=0.5)
+    for n in range(1, 7):
+        repo.save(Transaction(f"E00{n}", "", "Vic", "2025-07-14", "general", "Other", 0.5, 1.0))
+    repo.delete("E001")  # 2 dead rows of 7: below threshold
+    assert sum(1 for _ in open(path, encoding="utf-8")) == 7
+    repo.delete("E002")  # 4 dead rows of 8: compacts
+    assert [r[0] for r in csv.reader(open(path, newline="", encoding="utf-8"))] == \
+        ["E003", "E004", "E005", "E006"]
+
+def test_compact_replaces_file_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path), compact_threshold=1.1)
+    repo.save(Transaction("F001", "", "Vic", "2025-07-14", "general", "Other", 0.5, 1.0))
+    repo.save(Transaction("F002", "", "Vic", "2025-07-14", "general", "Other", 0.5, 1.0))
+    repo.delete("F001")
+    before = path.read_bytes()
+
+    # A crash while the new content is written leaves the original intact
+    def boom(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr("splitter_app.persistence.os.fsync", boom)
+    with pytest.raises(OSError):
+        repo.compact()
+    assert path.read_bytes() == before
+    assert not any(n.endswith(".tmp") for n in os.listdir(tmp_path))
+
+    monkeypatch.undo()
+    repo.compact()
+    assert [t.serial_number for t in CSVRepository(str(path)).load_all()] == ["F002"]
+    assert set(repo.write_timings) >= {"lock_wait", "write", "fsync", "replace"}
+
+def test_mixed_layouts_detected_per_block(tmp_path, monkeypatch):
+    # Legacy rows after the first one skip the current-layout attempt entirely
+    from splitter_app import persistence
+    path = tmp_path / "txns.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        for n in range(1, 4):
+            w.writerow([f"A00{n}", "Dinner", "Adrian", "trip", "2025-07-12", "30.00",
+                        "Food & Drinks", "Even (1/2 each)"])
+        w.writerow(["B001", "Taxi", "Vic", "2025-07-13", "trip", "Travel", "0.3", "45.60"])
+        w.writerow(["B002", "Bus", "Vic", "2025-07-13", "trip", "Travel", "1.0", "2.50"])
+    attempts = []
+    real_current = persistence._parse_current
+    def spy(row):
+        attempts.append(row[0])
+        return real_current(row)
+    monkeypatch.setattr(persistence, "_parse_current", spy)
+
+    loaded = CSVRepository(str(path)).load_all()
+    assert [t.serial_number for t in loaded] == ["A001", "A002", "A003", "B001", "B002"]
+    assert [t.split for t in loaded] == [0.5, 0.5, 0.5, 0.3, 1.0]
+    assert attempts == ["A001", "B001", "B002"]
+
+def _spy_parse(monkeypatch):
+    from splitter_app import persistence
+    parsed = []
+    real_parse = persistence._parse_bytes
+    def spy(data):
+        parsed.append(data)
+        return real_parse(data)
+    monkeypatch.setattr(persistence, "_parse_bytes", spy)
+    return parsed
+
+def test_snapshot_cache_skips_parse_on_next_launch(tmp_path, monkeypatch):
+    monkeypatch.setattr("splitter_app.persistence.SNAPSHOT_MIN_BYTES", 0)
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    for i in range(1, 4):
+        repo.save(Transaction(f"J{i:03d}", "Jam", "Vic", "2025-07-14", "general", "Other", 0.5, i))
+    repo.delete("J003")
+    expected = CSVRepository(str(path)).load_all()
+    assert os.path.exists(f"{path}.snapshot")
+
+    parsed = _spy_parse(monkeypatch)
+    fresh = CSVRepository(str(path))
+    assert fresh.load_all() == expected
+    assert parsed == []
+    # Deleted numbers stay reserved even without the serials sidecar
+    os.remove(f"{path}.serials.json")
+    assert CSVRepository(str(path)).next_serial("J") == "J004"
+
+def test_snapshot_cache_parses_only_grown_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr("splitter_app.persistence.SNAPSHOT_MIN_BYTES", 0)
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("K001", "Kale", "Vic", "2025-07-14", "general", "Food", 0.5, 2.0))
+    CSVRepository(str(path)).load_all()
+    repo.save(Transaction("K002", "Kiwi", "Adrian", "2025-07-15", "general", "Food", 0.5, 3.0))
+
+    parsed = _spy_parse(monkeypatch)
+    assert [t.serial_number for t in CSVRepository(str(path)).load_all()] == ["K001", "K002"]
+    assert len(parsed) == 1 and parsed[0].startswith(b"K002,")
+
+def test_snapshot_cache_ignored_when_file_rewritten(tmp_path, monkeypatch):
+    monkeypatch.setattr("splitter_app.persistence.SNAPSHOT_MIN_BYTES", 0)
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("L001", "Lime", "Vic", "2025-07-14", "general", "Food", 0.5, 2.0))
+    CSVRepository(str(path)).load_all()
+    # Same length, different bytes: the hash check must reject the cache
+    path.write_bytes(path.read_bytes().replace(b"Lime", b"Leek"))
+    assert [t.description for t in CSVRepository(str(path)).load_all()] == ["Leek"]
+
+    # Corrupt cache files are a miss, not an error
+    with open(f"{path}.snapshot", "wb") as f:
+        f.write(b"\x00garbage")
+    assert [t.description for t in CSVRepository(str(path)).load_all()] == ["Leek"]
+
+def test_load_all_rereads_grown_replacement(tmp_path):
+    # An atomic replace that keeps the old tail bytes is not an append
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("A001", "Rent", "Adrian", "2025-07-01", "home", "Other", 0.5, 10.0))
+    for i in range(2, 5):
+        repo.save(Transaction(f"A{i:03d}", "Snack", "Vic", "2025-07-02", "home", "Other", 0.5, 1.0))
+    repo.load_all()
+    other = CSVRepository(str(tmp_path / "other.csv"), snapshot_cache=False)
+    rows = [t for t in repo.load_all()]
+    rows[0] = Transaction("A001", "Rent", "Adrian", "2025-07-01", "home", "Other", 0.5, 90.0)
+    rows.append(Transaction("A005", "Snack", "Vic", "2025-07-03", "home", "Other", 0.5, 1.0))
+    other.replace_all(rows)
+    os.replace(tmp_path / "other.csv", path)
+    assert [t.amount for t in repo.load_all()][0] == pytest.approx(90.0)
+    assert len(repo.load_all()) == 5
+
+def test_save_new_picks_serial_under_lock(tmp_path):
+    # Two repositories on one file: the second must not reuse the number
+    # the first one took after it had already loaded
+    path = tmp_path / "txns.csv"
+    a, b = CSVRepository(str(path)), CSVRepository(str(path))
+    base = Transaction("", "Tea", "Vic", "2025-07-14", "general", "Other", 0.5, 3.0)
+    assert a.save_new(base, "D").serial_number == "D001"
+    b.load_all()
+    assert a.save_new(base, "D").serial_number == "D002"
+    assert b.save_new(base, "D").serial_number == "D003"
+    assert base.serial_number == ""
+    assert [t.serial_number for t in a.load_all()] == ["D001", "D002", "D003"]
+
+def test_save_renumbered_only_changes_taken_serials(tmp_path):
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("A001", "Tea", "Vic", "2025-07-14", "general", "Other", 0.5, 3.0))
+    incoming = [
+        Transaction("A001", "Jam", "Vic", "2025-07-15", "general", "Other", 0.5, 1.0),
+        Transaction("A004", "Bun", "Vic", "2025-07-15", "general", "Other", 0.5, 1.0),
+        Transaction("A004", "Pie", "Vic", "2025-07-15", "general", "Other", 0.5, 1.0),
+    ]
+    assert CSVRepository(str(path)).save_renumbered(incoming, lambda t: "A") == 2
+    assert [t.serial_number for t in repo.load_all()] == ["A001", "A005", "A004", "A006"]
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_compact_keeps_file_permissions(tmp_path):
+    path = tmp_path / "txns.csv"
+    repo = CSVRepository(str(path))
+    repo.save(Transaction("M001", "Mop", "Vic", "2025-07-14", "home", "Other", 0.5, 9.0))
+    os.chmod(path, 0o644)
+    repo.compact()
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert os.stat(f"{path}.serials.json").st_mode & 0o777 == 0o666 & ~persistence._UMASK
+
+def test_serial_marks_include_deleted(tmp_path):
+    repo = CSVRepository(str(tmp_path / "txns.csv"))
+    for serial in ("A001", "A002"):
+        repo.save(Transaction(serial, "Lunch", "Vic", "2025-07-14", "general", "Food & Drinks", 0.5, 1.0))
+    repo.delete("A002")
+    repo.compact()
+    assert CSVRepository(str(tmp_path / "txns.csv")).serial_marks() == {"A": 2}
+
+def test_serials_deleted_by_another_instance_stay_retired(tmp_path):
+    path = str(tmp_path / "txns.csv")
+    mine = CSVRepository(path)
+    for i in range(1, 5):
+        mine.save(Transaction(f"A{i:03d}", "", "Vic", "2025-07-14", "g", "Other", 1.0, 1.0))
+    theirs = CSVRepository(path)
+    theirs.load_all()
+
+    # Another instance adds A005, deletes it and compacts it away
+    mine.save(Transaction("A005", "", "Vic", "2025-07-14", "g", "Other", 1.0, 1.0))
+    mine.delete("A005")
+    mine.compact()
+
+    # The stale instance writes the sidecar without lowering A's mark
+    saved = theirs.save_new(Transaction("", "", "Vic", "2025-07-14", "g", "Other", 1.0, 1.0), "B")
+    assert saved.serial_number == "B001"
+    assert CSVRepository(path).next_serial("A") == "A006"
+    saved = theirs.save_new(Transaction("", "", "Vic", "2025-07-14", "g", "Other", 1.0, 1.0), "A")
+    assert saved.serial_number == "A006"
+
+def test_only_own_write_tells_other_writers_apart(tmp_path):
+    path = str(tmp_path / "txns.csv")
+    mine, theirs = CSVRepository(path, compact_threshold=0.5), CSVRepository(path)
+    row = Transaction("", "", "Vic", "2025-07-14", "g", "Other", 1.0, 1.0)
+    mine.save_new(row, "A")
+
+    stamp = mine.stamp()
+    mine.save_new(row, "A")
+    assert mine.only_own_write(stamp, mine.stamp())
+
+    # A delete and the compaction it triggers count as one write
+    stamp = mine.stamp()
+    mine.delete("A001")
+    assert [t.serial_number for t in mine.load_all()] == ["A002"]
+    assert mine.only_own_write(stamp, mine.stamp())
+
+    stamp = mine.stamp()
+    theirs.save_new(row, "B")
+    mine.save_new(row, "A")
+    assert not mine.only_own_write(stamp, mine.stamp())
@@ -1,5 +1,8 @@
 import os
 import fcntl
+import threading
+import pytest
+from splitter_app import persistence
 from splitter_app.persistence import CSVRepository
 from splitter_app.models import Transaction
 
@@ -27,3 +30,66 @@ def test_load_all_uses_shared_lock(tmp_path, monkeypatch):
     monkeypatch.setattr("splitter_app.persistence.fcntl.flock", fake_flock)
     repo.load_all()
     assert fcntl.LOCK_SH in calls
+
+@pytest.mark.parametrize("rewrite", ["compact", "replace_all"])
+@pytest.mark.parametrize("lock_file", [False, True], ids=["ledger-lock", "lock-file"])
+def test_append_during_rewrite_waits_for_rename(tmp_path, monkeypatch, lock_file, rewrite):
+    # lock-file is the Windows scheme: the rename happens after the ledger
+    # handle is closed, but before the lock is released
+    monkeypatch.setattr(persistence, "_LOCK_FILE", lock_file)
+    path = str(tmp_path / "data.csv")
+    repo = CSVRepository(path)
+    for serial in ("A001", "A002"):
+        repo.save(Transaction(serial, "", "", "", "", "Other", 1.0, 10.0))
+    repo.delete("A001")
+
+    other = CSVRepository(path)
+    other.load_all()
+    replace = persistence._replace
+    blocked = []
+
+    def replace_with_concurrent_save(tmp, dest):
+        if dest == path:
+            # Another writer tries to append in the rewrite window
+            t = threading.Thread(target=other.save,
+                                 args=(Transaction("A003", "", "", "", "", "Other", 1.0, 1.0),))
+            t.start()
+            t.join(0.2)
+            blocked.append(t.is_alive())
+            writers.append(t)
+        return replace(tmp, dest)
+
+    writers = []
+    monkeypatch.setattr(persistence, "_replace", replace_with_concurrent_save)
+    if rewrite == "compact":
+        repo.compact()
+    else:
+        repo.replace_all([Transaction("A002", "", "", "", "", "Other", 1.0, 10.0)])
+    for t in writers:
+        t.join(5)
+
+    assert blocked == [True]
+    assert [t.serial_number for t in CSVRepository(path).load_all()] == ["A002", "A003"]
+
+def test_replace_retries_while_target_is_busy(tmp_path, monkeypatch):
+    # Windows refuses the rename while another program has the ledger open
+    target, tmp = tmp_path / "data.csv", tmp_path / "data.csv.tmp"
+    target.write_bytes(b"old")
+    tmp.write_bytes(b"new")
+    real_replace = os.replace
+    refusals = [PermissionError("in use")] * 2
+
+    def busy_replace(src, dst):
+        if refusals:
+            raise refusals.pop()
+        real_replace(src, dst)
+    monkeypatch.setattr(persistence.os, "replace", busy_replace)
+    persistence._replace(str(tmp), str(target))
+    assert target.read_bytes() == b"new" and not refusals
+
+    tmp.write_bytes(b"newer")
+    refusals[:] = [PermissionError("in use")] * 1000
+    monkeypatch.setattr(persistence, "_REPLACE_RETRY_SECONDS", 0.05)
+    with pytest.raises(PermissionError):
+        persistence._replace(str(tmp), str(target))
+    assert target.read_bytes() == b"new" and not tmp.exists()
@@ -0,0 +1,76 @@
+import csv
+import threading
+import pytest
+from splitter_app.models import Transaction
+from splitter_app.persistence import CSVRepository, SQLiteRepository
+
+def _txn(serial, amount=1.0):
+    return Transaction(serial, "Lunch", "Vic", "2025-07-14", "general", "Food & Drinks", 0.5, amount)
+
+def test_save_load_delete(tmp_path):
+    repo = SQLiteRepository(str(tmp_path / "ledger.db"))
+    repo.save(_txn("A001", 10.0))
+    repo.save(_txn("A002", 20.0))
+    assert repo.load_all() == [_txn("A001", 10.0), _txn("A002", 20.0)]
+    repo.delete("A001")
+    assert [t.serial_number for t in repo.load_all()] == ["A002"]
+    repo.delete("A002")
+    assert repo.next_serial("A") == "A003"
+
+def test_wal_mode_and_indexes(tmp_path):
+    repo = SQLiteRepository(str(tmp_path / "ledger.db"))
+    conn = repo._conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexed = {row[2] for row in conn.execute(
+        "SELECT * FROM sqlite_master WHERE type = 'index'").fetchall()
+        for row in conn.execute(f"PRAGMA index_info({row[1]})")}
+    assert {"serial_number", "group", "category", "date"} <= indexed
+
+def test_stamp_changes_on_external_commit(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    repo = SQLiteRepository(path)
+    stamp = repo.stamp()
+    SQLiteRepository(path).save(_txn("A001"))
+    assert repo.stamp() != stamp
+
+def test_import_csv_both_layouts(tmp_path):
+    csv_path = tmp_path / "txns.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["A001", "Lunch", "Adrian", "2025-07-14", "general", "Food & Drinks", "0.5", "12.34"])
+        w.writerow(["A003", "Dinner", "Adrian", "trip", "2025-07-12", "30.00", "Food & Drinks", "Even (1/2 each)"])
+        w.writerow(["not", "a", "row"])
+    repo = SQLiteRepository(str(tmp_path / "ledger.db"))
+    assert repo.import_csv(str(csv_path)) == 2
+    loaded = repo.load_all()
+    assert loaded == CSVRepository(str(csv_path)).load_all()
+    assert loaded[1].group == "trip" and loaded[1].split == pytest.approx(0.5)
+    assert repo.next_serial("A") == "A004"
+
+def test_usable_from_worker_thread(tmp_path):
+    # BackgroundRunner calls the repository from its own thread
+    repo = SQLiteRepository(str(tmp_path / "ledger.db"))
+    repo.save(_txn("A001"))
+    errors = []
+
+    def work():
+        try:
+            repo.save_new(_txn(""), "A")
+            repo.delete("A001")
+        except Exception as e:
+            errors.append(e)
+    t = threading.Thread(target=work)
+    t.start()
+    t.join()
+    assert errors == []
+    assert [t.serial_number for t in repo.load_all()] == ["A002"]
+    assert repo.serial_marks() == {"A": 2}
+
+def test_import_csv_leaves_no_snapshot_cache(tmp_path, monkeypatch):
+    from splitter_app import persistence
+    monkeypatch.setattr(persistence, "SNAPSHOT_MIN_BYTES", 0)
+    csv_path = tmp_path / "other.csv"
+    CSVRepository(str(csv_path), snapshot_cache=False).save(_txn("A001"))
+    SQLiteRepository(str(tmp_path / "ledger.db")).import_csv(str(csv_path))
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("other")) == [
+        "other.csv", "other.csv.serials.json"]
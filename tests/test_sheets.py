@@ -1,4 +1,5 @@
 import splitter_app.services.sheets as sheets_module
+from splitter_app.persistence import CSVRepository
 
 
 def test_load_transactions(monkeypatch):
@@ -15,12 +16,84 @@ def test_load_transactions(monkeypatch):
 
     called = {}
 
-    def fake_read(sheet_id, rng, cred):
+    def fake_read(sheet_id, rng, cred, page_rows):
         called["args"] = (sheet_id, rng, cred)
-        return sample
+        yield sample
 
-    monkeypatch.setattr(sheets_module, "_read_sheet", fake_read)
+    monkeypatch.setattr(sheets_module, "_read_sheet_pages", fake_read)
     txns = sheets_module.load_transactions()
 
     assert called["args"] == (fake_id, fake_range, fake_cred)
     assert [t.serial_number for t in txns] == ["A001", "B002"]
+
+
+def _row(n):
+    return [f"D{n:03d}", "", "Vic", "2024-01-01", "g", "Other", "1.0", str(n)]
+
+
+def test_pages_stream_and_import_one_write_per_page(monkeypatch, tmp_path):
+    pages = [[["serial_number", "header"], _row(1), _row(2)], [_row(3), ["short"]]]
+    fetched = []
+
+    def fake_read(sheet_id, rng, cred, page_rows):
+        for page in pages:
+            fetched.append(len(page))
+            yield page
+
+    monkeypatch.setattr(sheets_module, "_read_sheet_pages", fake_read)
+
+    # nothing is requested until the generator is consumed
+    it = sheets_module.iter_transactions(page_rows=3)
+    assert fetched == []
+    assert next(it).serial_number == "D001"
+    assert fetched == [3]
+
+    repo = CSVRepository(str(tmp_path / "t.csv"))
+    writes = []
+    original = repo.save_many
+    monkeypatch.setattr(repo, "save_many", lambda txns: writes.append(len(txns)) or original(txns))
+    assert sheets_module.import_transactions(repo, page_rows=3) == 3
+    assert writes == [2, 1]
+    assert [t.serial_number for t in repo.load_all()] == ["D001", "D002", "D003"]
+
+
+def test_poller_fetches_only_new_rows_until_an_edit(monkeypatch):
+    sheet = [_row(n) for n in range(1, 31)]
+    requests = []
+
+    def fake_read(sheet_id, rng, cred, page_rows):
+        requests.append(rng)
+        start = int(rng.split("!A")[1].split(":")[0])
+        rows = sheet[start - 1:]
+        for i in range(0, len(rows), page_rows):
+            yield rows[i:i + page_rows]
+
+    monkeypatch.setattr(sheets_module.config, "SHEETS_RANGE", "Sheet1!A:H")
+    monkeypatch.setattr(sheets_module, "_read_sheet_pages", fake_read)
+    poller = sheets_module.SheetPoller(tail_window=5)
+
+    txns, reset = poller.poll()
+    assert reset and len(txns) == 30 and poller.last_row == 30
+
+    # nothing new: only the 5-row tail window is re-read
+    assert poller.poll() == ([], False)
+    assert requests[-1] == "Sheet1!A26:H"
+
+    sheet.extend([_row(31), _row(32)])
+    txns, reset = poller.poll()
+    assert not reset
+    assert [t.serial_number for t in txns] == ["D031", "D032"]
+    assert poller.last_row == 32
+    assert poller.poll() == ([], False)
+    assert requests[-1] == "Sheet1!A28:H"
+
+    # an edit inside the tail window forces a full re-read
+    sheet[29] = _row(99)
+    txns, reset = poller.poll()
+    assert reset and len(txns) == 32
+    assert requests[-1] == "Sheet1!A1:H"
+
+    # rows removed at the end are noticed too
+    del sheet[-3:]
+    txns, reset = poller.poll()
+    assert reset and len(txns) == 29
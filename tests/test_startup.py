@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from PySide6.QtWidgets import QApplication, QWidget
+
+from splitter_app.startup import StartupMetrics
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_marks_keep_first_occurrence():
+    metrics = StartupMetrics(start=0.0)
+    first = metrics.mark("local_ledger")
+    assert metrics.mark("local_ledger") == first
+    assert metrics.summary().startswith("Startup: local_ledger ")
+
+
+def test_first_paint_is_recorded(app):
+    metrics = StartupMetrics()
+    w = QWidget()
+    metrics.watch_first_paint(w)
+    w.show()
+    w.repaint()
+    app.processEvents()
+    assert "first_paint" in metrics.marks
+    w.close()
+
+
+def test_main_import_defers_google_client_stack():
+    # The Google libraries are only imported once a sync runs
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    code = (
+        "import sys, splitter_app.main\n"
+        "print(' '.join(m for m in sys.modules if m.startswith("
+        "('googleapiclient', 'google_auth_oauthlib', 'google.auth.transport'))))"
+    )
+    env = dict(os.environ, PYTHONPATH=src, QT_QPA_PLATFORM="offscreen")
+    out = subprocess.run([sys.executable, "-c", code], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.split() == []
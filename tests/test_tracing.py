@@ -0,0 +1,72 @@
+import json
+import threading
+
+import pytest
+
+from splitter_app import tracing
+from splitter_app.models import Transaction
+from splitter_app.persistence import CSVRepository
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    t = tracing.enable(str(tmp_path / "trace.json"))
+    yield t
+    tracing.disable()
+
+
+def test_disabled_span_is_shared_noop():
+    tracing.disable()
+    assert tracing.span("a") is tracing.span("b")
+    with tracing.span("a") as s:
+        s.set(rows=1)
+
+    @tracing.traced("f")
+    def f(x):
+        return x + 1
+    assert f(1) == 2
+    assert tracing.tracer() is None
+
+
+def test_spans_recorded_across_threads(tracer):
+    @tracing.traced("work")
+    def work():
+        with tracing.span("inner", kind="test") as s:
+            s.set(rows=3)
+
+    work()
+    t = threading.Thread(target=work, name="worker")
+    t.start()
+    t.join()
+    names = [e[0] for e in tracer.events]
+    assert names == ["inner", "work", "inner", "work"]
+    assert tracer.events[0][4] == {"kind": "test", "rows": 3}
+    assert "worker" in tracer.thread_names.values()
+
+
+def test_span_marks_errors(tracer):
+    with pytest.raises(ValueError):
+        with tracing.span("boom"):
+            raise ValueError("x")
+    assert tracer.events[0][4] == {"error": "ValueError"}
+
+
+def test_dump_writes_chrome_trace_and_histograms(tracer, tmp_path, capsys):
+    repo = CSVRepository(str(tmp_path / "txns.csv"))
+    repo.save(Transaction("A001", "Tea", "Vic", "2025-07-14", "general", "Other", 0.5, 3.0))
+    repo.load_all()
+    repo.delete("A001")
+    tracer.dump()
+
+    with open(tracer.path, encoding="utf-8") as f:
+        trace = json.load(f)
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    # Deleting the only row compacts; nested spans finish before their parent
+    assert [e["name"] for e in spans] == ["repo.save", "repo.load_all", "repo.compact", "repo.delete"]
+    assert spans[1]["args"] == {"rows": 1}
+    assert all(e["dur"] >= 0 and e["cat"] == "repo" for e in spans)
+
+    hist = trace["histograms"]["repo.save"]
+    assert hist["count"] == 1 and sum(hist["buckets"]) == 1
+    assert len(hist["buckets"]) == len(hist["bounds_ms"]) + 1
+    assert "repo.load_all" in capsys.readouterr().out
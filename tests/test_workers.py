@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+import splitter_app.controllers as controllers
+from splitter_app.models import Transaction
+from splitter_app.workers import BackgroundRunner, InlineRunner, ThreadRunner
+from test_controllers import DummyRepo, DummyWindow
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def _drain(app, runner, timeout=5.0):
+    """Wait for the pool, then let the event loop deliver queued results."""
+    deadline = time.monotonic() + timeout
+    while runner.busy() and time.monotonic() < deadline:
+        runner.wait(50)
+        app.processEvents()
+    assert not runner.busy()
+
+
+def test_inline_runner_reports_and_raises():
+    got = []
+    InlineRunner().submit(lambda report: report(1) or 2,
+                          on_done=got.append, on_partial=got.append)
+    assert got == [1, 2]
+
+    def boom(report):
+        raise ValueError("bad")
+    with pytest.raises(ValueError):
+        InlineRunner().submit(boom)
+    InlineRunner().submit(boom, on_error=got.append)
+    assert isinstance(got[-1], ValueError)
+
+
+def test_background_runner_delivers_on_gui_thread_in_order(app):
+    runner = BackgroundRunner()
+    gui = threading.get_ident()
+    workers, delivered = [], []
+
+    def task(n):
+        def fn(report):
+            workers.append(threading.get_ident())
+            report(f"partial{n}")
+            return n
+        return fn
+
+    for n in range(3):
+        runner.submit(task(n),
+                      on_done=lambda r: delivered.append((r, threading.get_ident())),
+                      on_partial=lambda r: delivered.append((r, threading.get_ident())))
+    _drain(app, runner)
+
+    assert gui not in workers
+    assert [r for r, _ in delivered] == ["partial0", 0, "partial1", 1, "partial2", 2]
+    assert {tid for _, tid in delivered} == {gui}
+
+
+def test_background_runner_reports_errors(app):
+    runner = BackgroundRunner()
+    errors = []
+
+    def boom(report):
+        raise RuntimeError("disk full")
+    runner.submit(boom, on_error=errors.append)
+    _drain(app, runner)
+    assert [str(e) for e in errors] == ["disk full"]
+
+
+def test_controller_streams_load_and_serialises_writes(app, monkeypatch):
+    monkeypatch.setattr(controllers, "CSVRepository", DummyRepo)
+    monkeypatch.setattr(controllers, "LOAD_CHUNK_ROWS", 2)
+    runner = BackgroundRunner()
+    ctrl = controllers.SplitterController(DummyWindow(), runner=runner)
+    ctrl._refresh_view = lambda txns, ledger=None: None
+    for i in range(1, 6):
+        ctrl.repo.save(Transaction(f"D{i:03d}", "", "Vic", "", "g", "Other", 1.0, 1.0))
+
+    batches = []
+    ctrl.model.rowsInserted.connect(lambda parent, first, last: batches.append((first, last)))
+    ctrl.initialize()
+    base = {"description": "", "paid_by": "Adrian", "date": "", "group": "g",
+            "category": "Other", "split": 1.0, "amount": "2"}
+    ctrl.add_transaction(base)
+    ctrl.delete_transaction("D001")
+    _drain(app, runner)
+
+    assert batches[:3] == [(0, 1), (2, 3), (4, 4)]
+    assert [t.serial_number for t in ctrl.txns] == ["D002", "D003", "D004", "D005", "D006"]
+    assert ctrl.ledger.total == pytest.approx(6.0)
+    assert [t.serial_number for t in ctrl.repo.load_all()] == [t.serial_number for t in ctrl.txns]
+
+
+def test_thread_runner_does_not_queue_behind_writer(app):
+    writer, sync = BackgroundRunner(), ThreadRunner()
+    release = threading.Event()
+    order = []
+    writer.submit(lambda report: release.wait(5) and order.append("save"))
+
+    def fetch(report):
+        order.append("download")
+        release.set()
+        # The local swap still waits for the queued save
+        return writer.call(lambda: order.append("swap") or "merged")
+
+    results = []
+    sync.submit(fetch, on_done=results.append)
+    _drain(app, sync)
+    _drain(app, writer)
+    assert order == ["download", "save", "swap"] and results == ["merged"]
+
+    # A stuck sync only holds up wait() for as long as asked
+    stuck = threading.Event()
+    sync.submit(lambda report: stuck.wait(5))
+    assert sync.wait(50) is False
+    stuck.set()
+    assert sync.wait(5000) is True